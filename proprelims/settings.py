@@ -42,17 +42,17 @@ INSTALLED_APPS = [
 # === MIDDLEWARE ===
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'quiz.middleware.AnswerDraftMiddleware',
+    'quiz.middleware.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
     'allauth.account.middleware.AccountMiddleware',
-    'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
 ]
 
 # Security for production
@@ -96,6 +96,44 @@ DATABASES = {
     }
 }
 
+# Read-only pages (see quiz/db_routing.py) read from a replica when
+# DB_REPLICA_HOST is set; without it everything uses the primary.
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST')
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        # Tests create a separate database here, so DB_REPLICA_HOST must
+        # be writable when running them.
+        'TEST': {'NAME': 'test_replica'},
+    }
+DATABASE_ROUTERS = ['quiz.db_routing.ReplicaRouter']
+# Creates the unmanaged quiz tables in the test database
+TEST_RUNNER = 'quiz.test_runner.QuizTestRunner'
+# How long a browser keeps reading from the primary after it writes.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 30))
+
+# === CACHE ===
+# Shared by every worker and machine: version keys, attempted sets, rate
+# limits and cached pages must be seen by all of them. Production needs
+# Redis (REDIS_URL) or memcached (CACHE_BACKEND/CACHE_LOCATION); the
+# database cache would put a query back on every cached lookup, and
+# ``check --deploy`` fails with it (quiz.E002). Local runs without
+# REDIS_URL use the table created by ``manage.py createcachetable``.
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.redis.RedisCache' if REDIS_URL
+                             else 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', REDIS_URL or 'django_cache'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+# Each worker re-reads a cached version key at most this often, so edits
+# reach other workers' in-process caches within this many seconds.
+CACHE_VERSION_CHECK_INTERVAL = int(os.getenv('CACHE_VERSION_CHECK_INTERVAL', 5))
+
 # === PASSWORD VALIDATION ===
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -176,3 +214,70 @@ EMAIL_HOST_PASSWORD = ''
 DEFAULT_FROM_EMAIL = ''
 
 RATELIMIT_VIEW = 'quiz.views.rate_limit_exceeded'
+
+# === QUESTION SET CACHE (per worker) ===
+QUESTION_CACHE_MAX_ENTRIES = int(os.getenv('QUESTION_CACHE_MAX_ENTRIES', 256))
+QUESTION_CACHE_MAX_BYTES = int(os.getenv('QUESTION_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+QUESTION_CACHE_TTL = int(os.getenv('QUESTION_CACHE_TTL', 300))
+
+# === RECOMMENDED BOOKS ===
+RECOMMENDED_BOOKS_TTL = int(os.getenv('RECOMMENDED_BOOKS_TTL', 900))
+
+# === HOME PAGE POOLS ===
+HOME_POOL_TTL = int(os.getenv('HOME_POOL_TTL', 300))
+HOME_POOL_SIZE = int(os.getenv('HOME_POOL_SIZE', 500))
+
+# === QUIZ SEARCH ===
+# Set to False on PostgreSQL servers without the pg_trgm extension.
+QUIZ_SEARCH_TRIGRAM = os.getenv('QUIZ_SEARCH_TRIGRAM', 'true').lower() == 'true'
+QUIZ_PAGE_CACHE_TTL = int(os.getenv('QUIZ_PAGE_CACHE_TTL', 60))
+# Each worker rebuilds its exam-tag index at least this often.
+TAG_INDEX_TTL = int(os.getenv('TAG_INDEX_TTL', 3600))
+# Per-user attempted quiz IDs and attempt counts; submits update them
+# directly, the TTL bounds how long a missed update can be served.
+ATTEMPTED_SET_TTL = int(os.getenv('ATTEMPTED_SET_TTL', 3600))
+ATTEMPT_COUNT_TTL = int(os.getenv('ATTEMPT_COUNT_TTL', 600))
+
+# === ISSUE REPORTS ===
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
+TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
+ISSUE_REPORT_TRANSPORT = os.getenv('ISSUE_REPORT_TRANSPORT', 'quiz.notifications.TelegramTransport')
+# Deliver from a thread in each web process; turn off when running
+# `manage.py deliver_reports --loop` as a separate process instead.
+ISSUE_REPORT_WORKER = os.getenv('ISSUE_REPORT_WORKER', 'true').lower() == 'true'
+ISSUE_REPORT_TIMEOUT = int(os.getenv('ISSUE_REPORT_TIMEOUT', 10))
+ISSUE_REPORT_COALESCE_SECONDS = int(os.getenv('ISSUE_REPORT_COALESCE_SECONDS', 2))
+ISSUE_REPORT_POLL_INTERVAL = int(os.getenv('ISSUE_REPORT_POLL_INTERVAL', 60))
+ISSUE_REPORT_RETRY_BASE = int(os.getenv('ISSUE_REPORT_RETRY_BASE', 30))
+ISSUE_REPORT_RETRY_MAX = int(os.getenv('ISSUE_REPORT_RETRY_MAX', 3600))
+ISSUE_REPORT_MAX_ATTEMPTS = int(os.getenv('ISSUE_REPORT_MAX_ATTEMPTS', 8))
+ISSUE_REPORT_BATCH_SIZE = int(os.getenv('ISSUE_REPORT_BATCH_SIZE', 50))
+
+# === SOLUTIONS PAGES ===
+SOLUTIONS_CACHE_TTL = int(os.getenv('SOLUTIONS_CACHE_TTL', 86400))
+# Bump after changing the solutions templates to expire cached pages and ETags.
+SOLUTIONS_CACHE_REVISION = int(os.getenv('SOLUTIONS_CACHE_REVISION', 1))
+# How often the answer statistics shown on solutions pages are refreshed.
+SOLUTIONS_STATS_REFRESH = int(os.getenv('SOLUTIONS_STATS_REFRESH', 3600))
+
+# === ANSWER DRAFTS ===
+# Quizzes in progress: 'cache' keeps drafts in ANSWER_DRAFT_CACHE, 'cookie'
+# in a signed cookie per quiz. Neither touches the session table. The
+# cache must be shared by all workers and must not be the database cache
+# (quiz.E003), so drafts use cookies unless Redis is configured.
+ANSWER_DRAFT_BACKEND = os.getenv('ANSWER_DRAFT_BACKEND', 'cache' if REDIS_URL else 'cookie')
+ANSWER_DRAFT_CACHE = os.getenv('ANSWER_DRAFT_CACHE', 'default')
+ANSWER_DRAFT_TTL = int(os.getenv('ANSWER_DRAFT_TTL', 3 * 3600))
+ANSWER_DRAFT_MAX_BYTES = int(os.getenv('ANSWER_DRAFT_MAX_BYTES', 3072))
+
+# === ATTEMPT RECORDING ===
+# Submitted attempts are journaled to ATTEMPT_JOURNAL_DIR and written in
+# batches by a background thread; false writes them inside the request.
+# In production the journal must be on a volume that survives deploys
+# (fly.toml mounts one); ``check --deploy`` warns otherwise.
+ATTEMPT_WRITE_BEHIND = os.getenv('ATTEMPT_WRITE_BEHIND', 'true').lower() == 'true'
+ATTEMPT_JOURNAL_DIR = os.getenv('ATTEMPT_JOURNAL_DIR', str(BASE_DIR / 'var' / 'attempt_journal'))
+ATTEMPT_FLUSH_INTERVAL = int(os.getenv('ATTEMPT_FLUSH_INTERVAL', 2))
+ATTEMPT_BATCH_SIZE = int(os.getenv('ATTEMPT_BATCH_SIZE', 500))
+ATTEMPT_MAX_PENDING = int(os.getenv('ATTEMPT_MAX_PENDING', 5000))
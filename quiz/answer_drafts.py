@@ -0,0 +1,152 @@
+# quiz/answer_drafts.py
+"""
+Storage for answers of quizzes in progress.
+
+Drafts used to live in ``request.session``. With the database session
+backend, every quiz start cost an UPDATE of ``django_session``, or an
+INSERT for anonymous visitors. Drafts now go to a store chosen by
+``ANSWER_DRAFT_BACKEND``:
+
+* ``cache``: one cache entry per user and quiz. Anonymous visitors are
+  identified by a random token in a signed cookie.
+* ``cookie``: the draft itself travels in a signed cookie per quiz.
+
+Both stores expire drafts after ``ANSWER_DRAFT_TTL`` seconds. Both refuse
+drafts larger than ``ANSWER_DRAFT_MAX_BYTES``. Cookie changes are written
+to the response by ``quiz.middleware.AnswerDraftMiddleware``. The quiz
+pages autosave their answers through the ``save_answer_draft`` view and
+start from the saved draft when the browser has none. The cache store
+needs a cache that every worker shares and that is not the database, or
+each autosave would be a database write again; the ``quiz.E003`` system
+check enforces this. The cookie store is the default unless Redis is
+configured.
+"""
+import json
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+SALT = 'quiz.answer_drafts'
+TOKEN_COOKIE = 'quiz_draft_id'
+# Answer keys look like "12" or "2_12" and values like "A"
+MAX_FIELD_LENGTH = 32
+
+
+class DraftTooLarge(ValueError):
+    pass
+
+
+def _ttl():
+    return getattr(settings, 'ANSWER_DRAFT_TTL', 3 * 3600)
+
+
+def clean_answers(answers):
+    """Keep the well-formed entries of an answers dict and check its size."""
+    if not isinstance(answers, dict):
+        return {}
+    cleaned = {
+        key: value for key, value in answers.items()
+        if isinstance(key, str) and isinstance(value, str)
+        and len(key) <= MAX_FIELD_LENGTH and len(value) <= MAX_FIELD_LENGTH
+    }
+    size = len(json.dumps(cleaned, separators=(',', ':')))
+    if size > getattr(settings, 'ANSWER_DRAFT_MAX_BYTES', 3072):
+        raise DraftTooLarge(f'Answer draft of {size} bytes is too large')
+    return cleaned
+
+
+class BaseDraftStore:
+    def __init__(self, request):
+        self.request = request
+        # Cookie name -> (value, max_age), or None to delete it
+        self.cookies = {}
+
+    def start(self, quiz_type, quiz_id):
+        """Begin a quiz with an empty draft."""
+        self.clear(quiz_type, quiz_id)
+
+    def apply(self, response):
+        """Write pending cookie changes to ``response``."""
+        for name, cookie in self.cookies.items():
+            if cookie is None:
+                response.delete_cookie(name, samesite='Lax')
+            else:
+                value, max_age = cookie
+                response.set_signed_cookie(
+                    name, value, salt=SALT, max_age=max_age, httponly=True, samesite='Lax',
+                    secure=getattr(settings, 'SESSION_COOKIE_SECURE', False),
+                )
+        return response
+
+
+class CacheDraftStore(BaseDraftStore):
+    def _owner(self, create=False):
+        user = getattr(self.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        token = self.request.get_signed_cookie(TOKEN_COOKIE, default=None, salt=SALT)
+        if token is None and create:
+            token = secrets.token_urlsafe(16)
+            self.cookies[TOKEN_COOKIE] = (token, _ttl())
+        return token and f'anon:{token}'
+
+    def _key(self, owner, quiz_type, quiz_id):
+        return f'answer_draft:{owner}:{quiz_type}:{quiz_id}'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'ANSWER_DRAFT_CACHE', 'default')]
+
+    def get(self, quiz_type, quiz_id):
+        owner = self._owner()
+        if owner is None:
+            return {}
+        return self.cache.get(self._key(owner, quiz_type, quiz_id)) or {}
+
+    def save(self, quiz_type, quiz_id, answers):
+        answers = clean_answers(answers)
+        self.cache.set(self._key(self._owner(create=True), quiz_type, quiz_id), answers, _ttl())
+
+    def clear(self, quiz_type, quiz_id):
+        owner = self._owner()
+        if owner is not None:
+            self.cache.delete(self._key(owner, quiz_type, quiz_id))
+
+
+class CookieDraftStore(BaseDraftStore):
+    def _name(self, quiz_type, quiz_id):
+        return f'draft_{quiz_type}_{quiz_id}'
+
+    def get(self, quiz_type, quiz_id):
+        value = self.request.get_signed_cookie(self._name(quiz_type, quiz_id), default=None, salt=SALT, max_age=_ttl())
+        if value is None:
+            return {}
+        try:
+            return json.loads(value)
+        except ValueError:
+            return {}
+
+    def save(self, quiz_type, quiz_id, answers):
+        answers = clean_answers(answers)
+        self.cookies[self._name(quiz_type, quiz_id)] = (json.dumps(answers, separators=(',', ':')), _ttl())
+
+    def clear(self, quiz_type, quiz_id):
+        name = self._name(quiz_type, quiz_id)
+        if name in self.request.COOKIES or name in self.cookies:
+            self.cookies[name] = None
+
+
+BACKENDS = {
+    'cache': CacheDraftStore,
+    'cookie': CookieDraftStore,
+}
+
+
+def get_drafts(request):
+    """The answer-draft store for this request."""
+    store = getattr(request, '_answer_drafts', None)
+    if store is None:
+        store = request._answer_drafts = BACKENDS[getattr(settings, 'ANSWER_DRAFT_BACKEND', 'cookie')](request)
+    return store
@@ -0,0 +1,387 @@
+# quiz/attempt_recorder.py
+"""
+Write-behind recording of quiz attempts.
+
+Saving an attempt used to cost a ``UserProfile`` get-or-create plus an
+``update_or_create`` on the attempt table inside the submit request.
+``record`` now appends the attempt to a per-process journal file,
+fsyncs it and returns, so the result page renders at once. A background
+thread then writes the queued attempts in batches:
+
+* one ``INSERT ... ON CONFLICT (user_id, quiz_id) DO UPDATE`` per attempt
+  table, keeping a single attempt per user and quiz,
+* one ``INSERT ... ON CONFLICT DO NOTHING`` for the users' profiles,
+* the score histograms and per-question stats of the affected quizzes and
+  the users' per-tag results (quiz/score_distribution.py,
+  quiz/question_stats.py, quiz/tag_performance.py).
+
+The journal makes a queued attempt survive a crashed worker: journals
+left behind by dead processes are replayed by the next flush in any
+process, or by the ``flush_attempts`` command. Each process holds an
+``flock`` on its own lock file for as long as it runs, so a journal is
+only replayed once that lock has been released; PIDs are not trusted,
+since a restarted container reuses them. ``ATTEMPT_JOURNAL_DIR`` must be on
+storage that outlives a deploy (a mounted volume on Fly), or queued
+attempts are lost with the old machine. Attempts are written in the
+request when ``ATTEMPT_WRITE_BEHIND`` is off, when the journal cannot be
+written, or when ``ATTEMPT_MAX_PENDING`` attempts are already queued.
+
+A batch the database rejects (e.g. an attempt of a user deleted since) is
+retried one attempt at a time. Attempts that still fail are appended to
+``dead-letter.jsonl`` in the journal directory with their error, and the
+queue moves on. Other errors, such as a lost connection, leave the batch
+queued for the next flush.
+
+Bulk inserts bypass ``post_save``, so each flush does the bookkeeping of
+the ``attempt_changed`` receiver itself and sends ``attempts_recorded``.
+A flushed attempt's ``attempt_date`` is the time of the write, normally a
+few seconds after the submission.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, connections, transaction
+from django.dispatch import Signal
+
+from . import question_stats, score_distribution, tag_performance
+from .attempted_sets import record_attempt
+from .models import QuizAttempt, AdvanceQuizAttempt, SuperQuizAttempt, UserProfile
+from .quiz_queries import invalidate_attempt_count
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_MODELS = {
+    'quiz': QuizAttempt,
+    'advance': AdvanceQuizAttempt,
+    'super': SuperQuizAttempt,
+}
+
+# Sent after a batch is written, with ``quiz_type`` and the saved ``attempts``.
+attempts_recorded = Signal()
+
+# Errors caused by the records themselves, which retrying cannot fix
+REJECTED = (IntegrityError, DataError, KeyError, TypeError, ValueError)
+
+
+def _journal_dir():
+    return Path(getattr(settings, 'ATTEMPT_JOURNAL_DIR', Path(settings.BASE_DIR) / 'var' / 'attempt_journal'))
+
+
+_owner = None
+_owner_lock = threading.Lock()
+
+
+def _owner_token():
+    """Token naming this process's journals, created with its held lock file.
+
+    The token is the PID plus the start time, so it is never reused. The
+    lock file is locked before it is renamed into place, so a replaying
+    process never sees it unlocked while its owner runs.
+    """
+    global _owner
+    with _owner_lock:
+        if _owner is None or _owner[0] != os.getpid():
+            if _owner is not None:
+                # Forked: the lock belongs to the parent, which still holds it
+                _owner[2].close()
+            directory = _journal_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            token = f'{os.getpid()}_{time.time_ns()}'
+            pending = directory / f'owner-{token}.lock.new'
+            lock_file = open(pending, 'wb')
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            pending.rename(directory / f'owner-{token}.lock')
+            _owner = (os.getpid(), token, lock_file)
+        return _owner[1]
+
+
+def _lock_if_released(lock_file):
+    """Take a journal owner's lock; False while its process (or a replayer) holds it."""
+    if fcntl is None:
+        # No way to tell a running owner from a dead one
+        return False
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def write_attempts(records):
+    """Upsert journaled attempt records; returns the number of rows written."""
+    by_type = {}
+    for record in records:
+        # Later submissions of the same quiz replace earlier ones
+        by_type.setdefault(record['quiz_type'], {})[(record['user_id'], record['quiz_id'])] = record
+
+    written = []
+    with transaction.atomic():
+        user_ids = {user_id for attempts in by_type.values() for user_id, _ in attempts}
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=user_id) for user_id in sorted(user_ids)], ignore_conflicts=True,
+        )
+        for quiz_type, attempts in sorted(by_type.items()):
+            model = ATTEMPT_MODELS[quiz_type]
+            # Serialize flushes of the same quizzes, so a replaced attempt
+            # (or a first one) is only counted by one of them
+            score_distribution.lock_histograms(quiz_type, {quiz_id for _, quiz_id in attempts})
+            # The attempts being replaced, to take them out of the rollups
+            has_answers = quiz_type in question_stats.ATTEMPT_MODELS
+            previous = {
+                (row['user_id'], row['quiz_id']): row for row in model.objects.select_for_update().filter(
+                    user_id__in={user_id for user_id, _ in attempts},
+                    quiz_id__in={quiz_id for _, quiz_id in attempts},
+                ).values('user_id', 'quiz_id', 'score', 'percentage', *(['answers'] if has_answers else []))
+            }
+            objs = [model(user_id=record['user_id'], quiz_id=record['quiz_id'], **record['fields'])
+                    for record in attempts.values()]
+            update_fields = sorted({name for record in attempts.values() for name in record['fields']} | {'attempt_date'})
+            model.objects.bulk_create(
+                objs, update_conflicts=True, unique_fields=['user', 'quiz'], update_fields=update_fields,
+            )
+            score_distribution.apply_changes(quiz_type, [
+                (quiz_id, previous.get((user_id, quiz_id), {}).get('score'), record['fields']['score'])
+                for (user_id, quiz_id), record in attempts.items()
+            ])
+            tag_performance.apply_changes(quiz_type, [
+                (user_id, quiz_id, previous.get((user_id, quiz_id), {}).get('percentage'), record['fields']['percentage'])
+                for (user_id, quiz_id), record in attempts.items()
+            ])
+            if has_answers:
+                question_stats.apply_changes(quiz_type, [
+                    (quiz_id, previous.get((user_id, quiz_id), {}).get('answers'), record['fields']['answers'])
+                    for (user_id, quiz_id), record in attempts.items()
+                ])
+            written.append((quiz_type, objs))
+
+    for quiz_type, objs in written:
+        for user_id in {obj.user_id for obj in objs}:
+            invalidate_attempt_count(quiz_type, user_id)
+        attempts_recorded.send(sender=ATTEMPT_MODELS[quiz_type], quiz_type=quiz_type, attempts=objs)
+    return sum(len(objs) for _, objs in written)
+
+
+def _dead_letter(record, exc):
+    with open(_journal_dir() / 'dead-letter.jsonl', 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'record': record, 'error': repr(exc)}, separators=(',', ':')) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_batch(records):
+    """``write_attempts``, setting aside the records the database rejects."""
+    try:
+        return write_attempts(records)
+    except REJECTED:
+        logger.warning('Attempt batch of %d rejected; writing it one attempt at a time', len(records))
+    written = 0
+    for record in records:
+        try:
+            written += write_attempts([record])
+        except REJECTED as exc:
+            logger.exception('Moving rejected attempt to the dead-letter file: %r', record)
+            _dead_letter(record, exc)
+    return written
+
+
+def _read_journal(path):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn last line from a crash mid-write
+                logger.warning('Skipping corrupt line in attempt journal %s', path)
+    return records
+
+
+def _journal_owner(name):
+    """Token of the process a journal file belongs to.
+
+    Journals are named ``attempts-<token>.jsonl`` (or ``.<n>.flushing``
+    while being written) and ``replay-<token>-<original name>`` once
+    claimed.
+    """
+    return name.split('-')[1].split('.')[0]
+
+
+def replay_orphans():
+    """Write attempts from journals of processes that are no longer running."""
+    directory = _journal_dir()
+    if not directory.is_dir():
+        return 0
+    mine = _owner_token()
+    journals = {}
+    for path in sorted(directory.iterdir()):
+        if path.name.startswith(('attempts-', 'replay-')):
+            journals.setdefault(_journal_owner(path.name), []).append(path)
+
+    replayed = 0
+    for token, paths in journals.items():
+        if token == mine:
+            continue
+        lock_path = directory / f'owner-{token}.lock'
+        try:
+            lock_file = open(lock_path, 'rb')
+        except FileNotFoundError:
+            # Already replayed by someone else, or left by an older release
+            lock_file = None
+        try:
+            if lock_file is not None and not _lock_if_released(lock_file):
+                continue
+            for path in paths:
+                original = path.name.split('-', 2)[2] if path.name.startswith('replay-') else path.name
+                claimed = path.with_name(f'replay-{mine}-{original}')
+                try:
+                    path.rename(claimed)
+                except FileNotFoundError:
+                    continue  # Another process claimed it first
+                replayed += write_batch(_read_journal(claimed))
+                claimed.unlink()
+            lock_path.unlink(missing_ok=True)
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+    return replayed
+
+
+class AttemptRecorder:
+    """Per-process journal and write-behind queue of attempts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._pending = []
+        self._journal = None
+        self._thread = None
+        self._pid = None
+        self._flush_lock = threading.Lock()
+        # (records, journal path) of batches taken but not yet written
+        self._failed = []
+
+    def _journal_path(self):
+        return _journal_dir() / f'attempts-{_owner_token()}.jsonl'
+
+    def _append(self, record):
+        if self._journal is None or self._pid != os.getpid():
+            # First write in this (possibly forked) process
+            self._journal = open(self._journal_path(), 'a', encoding='utf-8')
+            self._pid = os.getpid()
+            self._pending = []
+        self._journal.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._pending.append(record)
+
+    def record(self, quiz_type, user, quiz_id, **fields):
+        """Queue an attempt, or write it now if it cannot be queued."""
+        record = {'quiz_type': quiz_type, 'user_id': user.pk, 'quiz_id': quiz_id, 'fields': fields}
+
+        queued = False
+        if getattr(settings, 'ATTEMPT_WRITE_BEHIND', True):
+            with self._lock:
+                if len(self._pending) < getattr(settings, 'ATTEMPT_MAX_PENDING', 5000):
+                    try:
+                        self._append(record)
+                        queued = True
+                    except OSError:
+                        logger.exception('Attempt journal unavailable; writing attempt synchronously')
+        if queued:
+            self.wake()
+        else:
+            write_attempts([record])
+        # Listings show the quiz as attempted straight away
+        record_attempt(quiz_type, user.pk, quiz_id)
+
+    def _take(self):
+        """Detach the queued attempts and their journal file for writing."""
+        with self._lock:
+            if not self._pending or self._pid != os.getpid():
+                return [], None
+            records, self._pending = self._pending, []
+            self._journal.close()
+            self._journal = None
+            path = self._journal_path()
+            flushing = path.with_name(f'{path.stem}.{time.time_ns()}.flushing')
+            path.rename(flushing)
+            return records, flushing
+
+    def flush(self):
+        """Write every queued attempt; returns the number of rows written."""
+        written = 0
+        limit = getattr(settings, 'ATTEMPT_BATCH_SIZE', 500)
+        with self._flush_lock:
+            records, path = self._take()
+            if records:
+                self._failed.append((records, path))
+            while self._failed:
+                records, path = self._failed[0]
+                for start in range(0, len(records), limit):
+                    written += write_batch(records[start:start + limit])
+                path.unlink()
+                self._failed.pop(0)
+        return written
+
+    def wake(self):
+        self._event.set()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='attempt-recorder', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = getattr(settings, 'ATTEMPT_FLUSH_INTERVAL', 2)
+        try:
+            replay_orphans()
+        except Exception:
+            logger.exception('Attempt journal replay failed')
+        while True:
+            if self._event.wait(interval * 30):
+                # Let a burst of submissions collect into one batch
+                self._event.clear()
+                time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                # The batch stays journaled and is retried on the next pass
+                logger.exception('Attempt flush failed')
+            finally:
+                connections.close_all()
+
+
+recorder = AttemptRecorder()
+
+
+def _release_owner():
+    """Remove this process's lock file once it has no journals left."""
+    if _owner is None or _owner[0] != os.getpid():
+        return
+    directory, token = _journal_dir(), _owner[1]
+    if not any(directory.glob(f'attempts-{token}.*')) and not any(directory.glob(f'replay-{token}-*')):
+        (directory / f'owner-{token}.lock').unlink(missing_ok=True)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        recorder.flush()
+        _release_owner()
+    except Exception:
+        logger.exception('Attempts left in the journal at exit')
+
+
+def record(quiz_type, user, quiz_id, **fields):
+    recorder.record(quiz_type, user, quiz_id, **fields)
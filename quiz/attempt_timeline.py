@@ -0,0 +1,71 @@
+# quiz/attempt_timeline.py
+"""
+A user's attempt history across the three attempt tables.
+
+``timeline_page`` pages through a user's attempts of one or more quiz
+types, newest first. One query fetches each page: a ``UNION ALL`` of the
+attempt tables ordered by ``(attempt_date, kind, id)``. Every branch gets
+the keyset condition, so each table is read from its
+``(user, attempt_date)`` end and no ``OFFSET`` is scanned. Only the
+columns the attempt cards show are fetched, as plain dicts, so there is no
+model instantiation and no ``select_related`` on the quiz.
+"""
+from django.db.models import CharField, F, Q, Value
+from django.urls import reverse
+
+from .models import QuizAttempt, AdvanceQuizAttempt, SuperQuizAttempt
+from .pagination import KeysetPage, decode_cursor, encode_cursor
+
+# Kind -> (attempt model, label, solutions URL name, field the score is out of)
+KINDS = {
+    'quiz': (QuizAttempt, 'Quiz', 'quiz_solutions', 'total_questions'),
+    'advance': (AdvanceQuizAttempt, 'Sectional Test', 'advance_quiz_solutions', 'total_score'),
+    'super': (SuperQuizAttempt, 'Mock Test', 'super_quiz_solutions', 'total_questions'),
+}
+
+ORDERING = ('-attempt_date', '-kind', '-id')
+FIELDS = ('id', 'quiz_id', 'score', 'percentage', 'attempt_date', 'kind', 'quiz_name', 'out_of')
+
+
+def _after(kind, values):
+    """Rows of ``kind`` strictly after the cursor ``(date, kind, id)``."""
+    date, last_kind, last_id = values
+    if kind < last_kind:
+        return Q(attempt_date__lte=date)
+    if kind > last_kind:
+        return Q(attempt_date__lt=date)
+    return Q(attempt_date__lt=date) | Q(attempt_date=date, id__lt=last_id)
+
+
+def timeline_rows(kind, user, values=None):
+    """Card columns of ``user``'s attempts of one kind, after the cursor ``values``."""
+    model, _, _, out_of = KINDS[kind]
+    queryset = model.objects.filter(user=user).order_by()
+    if values is not None:
+        queryset = queryset.filter(_after(kind, values))
+    return queryset.annotate(
+        kind=Value(kind, output_field=CharField()),
+        quiz_name=F('quiz__quiz_name'),
+        out_of=F(out_of),
+    ).values(*FIELDS)
+
+
+def timeline_page(user, kinds=tuple(KINDS), cursor=None, per_page=9):
+    """The page of ``user``'s attempts of ``kinds`` that follows ``cursor``."""
+    values = decode_cursor(cursor)
+    if values is not None and (len(values) != 3 or values[1] not in KINDS):
+        values = None
+    branches = [timeline_rows(kind, user, values) for kind in kinds]
+    queryset = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+
+    rows = list(queryset.order_by(*ORDERING)[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([last['attempt_date'], last['kind'], last['id']])
+    for row in rows:
+        _, label, solutions_url, _ = KINDS[row['kind']]
+        row['label'] = label
+        row['solutions_url'] = reverse(solutions_url, args=[row['quiz_id']])
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,80 @@
+# quiz/attempted_sets.py
+"""
+Per-user sets of attempted quiz IDs.
+
+The quiz IDs a user has attempted are loaded once per quiz type as a
+sorted integer array and kept in the cache, so listings can mark
+``has_attempted`` with a binary search instead of joining the attempt
+tables. A new attempt adds its quiz ID to the cached array; deleting
+attempts drops the array so it is reloaded on the next read. Arrays also
+expire after ``ATTEMPTED_SET_TTL`` seconds, so an update lost to a
+concurrent write, or an attempt row changed outside the app, is corrected
+by a reload.
+"""
+from array import array
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import QuizAttempt, AdvanceQuizAttempt, SuperQuizAttempt
+
+ATTEMPTED_KEY = 'attempted:{quiz_type}:{user_id}'
+
+ATTEMPT_MODELS = {
+    'quiz': QuizAttempt,
+    'advance': AdvanceQuizAttempt,
+    'super': SuperQuizAttempt,
+}
+
+
+def _key(quiz_type, user_id):
+    return ATTEMPTED_KEY.format(quiz_type=quiz_type, user_id=user_id)
+
+
+def _ttl():
+    return getattr(settings, 'ATTEMPTED_SET_TTL', 3600)
+
+
+def attempted_ids(quiz_type, user):
+    """Sorted array of the quiz IDs of a type that ``user`` has attempted."""
+    if user is None or not user.is_authenticated:
+        return array('q')
+    key = _key(quiz_type, user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        rows = ATTEMPT_MODELS[quiz_type].objects.filter(user=user).order_by().values_list('quiz_id', flat=True)
+        ids = array('q', sorted(set(rows)))
+        cache.set(key, ids, _ttl())
+    return ids
+
+
+def _contains(ids, quiz_id):
+    i = bisect_left(ids, quiz_id)
+    return i < len(ids) and ids[i] == quiz_id
+
+
+def has_attempted(quiz_type, user, quiz_id):
+    return _contains(attempted_ids(quiz_type, user), quiz_id)
+
+
+def mark_attempted(quizzes, quiz_type, user):
+    """Set ``has_attempted`` on quiz rows without touching the attempt tables."""
+    ids = attempted_ids(quiz_type, user)
+    for quiz in quizzes:
+        quiz.has_attempted = _contains(ids, quiz.pk)
+    return quizzes
+
+
+def record_attempt(quiz_type, user_id, quiz_id):
+    """Add a newly attempted quiz to the user's cached set, if one is loaded."""
+    key = _key(quiz_type, user_id)
+    ids = cache.get(key)
+    if ids is None or _contains(ids, quiz_id):
+        return
+    insort(ids, quiz_id)
+    cache.set(key, ids, _ttl())
+
+
+def invalidate_attempted(quiz_type, user_id):
+    cache.delete(_key(quiz_type, user_id))
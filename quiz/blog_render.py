@@ -0,0 +1,63 @@
+# quiz/blog_render.py
+"""
+Stored Markdown rendering for blog posts.
+
+Each post keeps its rendered HTML and a plain-text excerpt next to the
+Markdown source together with a hash of the source and the extension set.
+Both are regenerated when a post is saved with different content, or when
+the extensions change, so reading or listing posts never runs the Markdown
+pipeline.
+"""
+import hashlib
+
+import markdown
+from django.utils.text import Truncator
+
+from .templatetags.quiz_extras import strip_markdown
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'codehilite', 'toc']
+
+# Longest excerpt any page shows; shorter previews truncate it further.
+EXCERPT_WORDS = 90
+
+
+def render_markdown(text):
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+
+
+def make_excerpt(text):
+    return Truncator(strip_markdown(text or '')).words(EXCERPT_WORDS, truncate=' …')
+
+
+def content_hash(text):
+    """Hash of the Markdown source and the extensions it is rendered with."""
+    digest = hashlib.sha256(','.join(MARKDOWN_EXTENSIONS).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update((text or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def refresh_rendered(post, force=False):
+    """Re-render ``post.content_html`` and ``post.excerpt`` if stale; return True if they were."""
+    digest = content_hash(post.content)
+    if not force and post.content_hash == digest and post.content_html:
+        return False
+    post.content_html = render_markdown(post.content)
+    post.excerpt = make_excerpt(post.content)
+    post.content_hash = digest
+    return True
+
+
+def rendered_fields(post):
+    return {
+        'content_html': post.content_html,
+        'excerpt': post.excerpt,
+        'content_hash': post.content_hash,
+    }
+
+
+def ensure_rendered(post):
+    """Render and store a post whose HTML is missing or out of date."""
+    if refresh_rendered(post):
+        type(post).objects.filter(pk=post.pk).update(**rendered_fields(post))
+    return post
@@ -0,0 +1,57 @@
+# quiz/cache_versions.py
+"""
+Version counters in the shared cache, read at most every few seconds.
+
+The per-worker caches (question sets, the tag and search indexes, the
+book catalogue) and the keys of cached pages carry a version that is
+bumped in the shared cache when the rows behind them change. Reading it
+on every lookup would cost a round trip to the shared cache per request,
+which is what the in-process caches are there to avoid. ``get_version``
+keeps each version for ``CACHE_VERSION_CHECK_INTERVAL`` seconds per
+worker: a bump made by another worker is seen within that interval, one
+made by this worker at once.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Cache key -> (version, monotonic time it was read)
+_versions = {}
+_lock = threading.Lock()
+
+
+def _interval():
+    return getattr(settings, 'CACHE_VERSION_CHECK_INTERVAL', 5)
+
+
+def get_version(key):
+    """This worker's recent reading of the version stored under ``key``."""
+    now = time.monotonic()
+    with _lock:
+        seen = _versions.get(key)
+    if seen is not None and now - seen[1] < _interval():
+        return seen[0]
+    version = cache.get(key, 0)
+    with _lock:
+        _versions[key] = (version, now)
+    return version
+
+
+def bump_version(key):
+    """Increment the version under ``key``; returns the new version."""
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        version = 1
+        cache.set(key, version, None)
+    with _lock:
+        _versions[key] = (version, time.monotonic())
+    return version
+
+
+def forget_versions():
+    """Drop every reading, so the next ``get_version`` calls read the cache."""
+    with _lock:
+        _versions.clear()
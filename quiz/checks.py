@@ -0,0 +1,58 @@
+# quiz/checks.py
+from pathlib import Path
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+@register(Tags.compatibility, deploy=True)
+def attempt_journal_check(app_configs, **kwargs):
+    """Queued attempts are lost if their journal is wiped with the release."""
+    if not getattr(settings, 'ATTEMPT_WRITE_BEHIND', True):
+        return []
+    journal_dir = Path(getattr(settings, 'ATTEMPT_JOURNAL_DIR', Path(settings.BASE_DIR) / 'var' / 'attempt_journal')).resolve()
+    if journal_dir.is_relative_to(Path(settings.BASE_DIR).resolve()):
+        return [Warning(
+            'ATTEMPT_JOURNAL_DIR is inside the project directory, which is replaced on every deploy.',
+            hint='Point it at a mounted volume, or set ATTEMPT_WRITE_BEHIND=false.',
+            id='quiz.W001',
+        )]
+    return []
+
+
+# Backends that are per process, or that cost a database query per lookup
+LOCAL_OR_DATABASE_CACHES = (
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """Version keys, rate limits and drafts need a shared cache that is not the database."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in LOCAL_OR_DATABASE_CACHES:
+        return [Error(
+            f'The default cache uses {backend}, which is per process or costs a database query per lookup.',
+            hint='Set REDIS_URL, or CACHE_BACKEND and CACHE_LOCATION for memcached.',
+            id='quiz.E002',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def answer_draft_cache_check(app_configs, **kwargs):
+    """Drafts in the database cache would make every autosave a database write."""
+    if getattr(settings, 'ANSWER_DRAFT_BACKEND', 'cookie') != 'cache':
+        return []
+    alias = getattr(settings, 'ANSWER_DRAFT_CACHE', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend in LOCAL_OR_DATABASE_CACHES:
+        return [Error(
+            f"ANSWER_DRAFT_CACHE '{alias}' uses {backend}, which is per process or a database table.",
+            hint="Point ANSWER_DRAFT_CACHE at a Redis or memcached alias, or set ANSWER_DRAFT_BACKEND='cookie'.",
+            id='quiz.E003',
+        )]
+    return []
@@ -0,0 +1,117 @@
+# quiz/db_routing.py
+"""
+Read-replica routing for the read-only pages.
+
+When ``DATABASES`` has a ``replica`` alias, views wrapped in
+``replica_reads`` (home, search, quiz pages, solutions and blog) read
+the quiz app's tables from it for GET and HEAD requests. Everything else
+uses the primary: writes, other views, management commands and
+background threads such as the attempt recorder.
+
+A user's own writes are read back from the primary:
+
+* ``quiz.middleware.ReplicaPinMiddleware`` sets a short-lived cookie
+  after any unsafe request (a submit, a like, a login). That browser
+  reads from the primary for ``REPLICA_PIN_SECONDS``, which covers
+  replication lag and the attempt recorder's write-behind delay.
+* A write to the quiz app's tables made while handling a replica-routed
+  request moves the rest of that request to the primary too. The cookie
+  is then set as well. Writes to other tables, such as the
+  ``DatabaseCache`` table behind page caches and rate limits, do not:
+  they are not replicated data the request reads back.
+
+Without a ``replica`` alias the router sends everything to ``default``.
+Under the test runner the replica gets a test database of its own,
+migrated like the primary, so tests can tell which database a read used.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA = 'replica'
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Sessions, users and social accounts are always read from the primary: a
+# session missing on a lagging replica would log its user out.
+REPLICA_APPS = {'quiz'}
+
+_state = ContextVar('quiz_db_routing', default=None)
+
+
+class RoutingState:
+    """Routing decisions for the request being handled."""
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 30)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state is not None and state.use_replica and model._meta.app_label in REPLICA_APPS
+                and replica_configured()):
+            return REPLICA
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label in REPLICA_APPS:
+            # Read this request's own writes back from the primary
+            state.wrote = True
+            state.use_replica = False
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        if {obj1._state.db, obj2._state.db} <= {'default', REPLICA}:
+            return True
+        return None
+
+
+def replica_reads(view_func):
+    """Serve a view's GET/HEAD reads from the replica unless the browser is pinned."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        state = _state.get()
+        if (state is None or request.method not in SAFE_METHODS
+                or PIN_COOKIE in request.COOKIES or not replica_configured()):
+            return view_func(request, *args, **kwargs)
+        state.use_replica = True
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            state.use_replica = False
+    return _wrapped_view
+
+
+@contextmanager
+def request_routing():
+    """Track routing for one request; yields its ``RoutingState``."""
+    state = RoutingState()
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def pin_to_primary(request, response, state):
+    """Set the pin cookie if the request wrote or may have written."""
+    if replica_configured() and (request.method not in SAFE_METHODS or state.wrote):
+        response.set_cookie(
+            PIN_COOKIE, '1', max_age=_pin_seconds(), httponly=True, samesite='Lax',
+            secure=getattr(settings, 'SESSION_COOKIE_SECURE', False),
+        )
+    return response
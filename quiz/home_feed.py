@@ -0,0 +1,95 @@
+# quiz/home_feed.py
+"""
+Randomized home page sections without ``ORDER BY RANDOM()``.
+
+For every section a shuffled pool of candidate primary keys is kept in the
+cache and rebuilt every ``HOME_POOL_TTL`` seconds. A request samples a few
+keys from each pool, loads those rows by primary key and resolves the
+per-user liked flags with one ``IN`` lookup; attempted flags come from the
+user's cached attempted set.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .attempted_sets import mark_attempted
+from .models import Quiz, AdvanceQuiz, SuperQuiz, BlogPost
+
+POOL_KEY = 'home_pool:{section}'
+
+# section name -> (model, number of items shown, quiz type)
+SECTIONS = {
+    'quizzes': (Quiz, 6, 'quiz'),
+    'advance_quizzes': (AdvanceQuiz, 6, 'advance'),
+    'super_quizzes': (SuperQuiz, 3, 'super'),
+    'blog_posts': (BlogPost, 3, None),
+}
+
+
+# Columns loaded for a section's cards, where not every column is needed
+PROJECTIONS = {
+    'blog_posts': ('post_id', 'title', 'excerpt', 'likes_count'),
+}
+
+
+def _pool_ttl():
+    return getattr(settings, 'HOME_POOL_TTL', 300)
+
+
+def get_pool(section):
+    """Return the shuffled candidate primary keys for a home page section."""
+    key = POOL_KEY.format(section=section)
+    pool = cache.get(key)
+    if pool is None:
+        pool = rebuild_pool(section)
+    return pool
+
+
+def rebuild_pool(section):
+    model = SECTIONS[section][0]
+    pool = list(model.objects.order_by().values_list('pk', flat=True))
+    random.shuffle(pool)
+    pool = pool[:getattr(settings, 'HOME_POOL_SIZE', 500)]
+    cache.set(POOL_KEY.format(section=section), pool, _pool_ttl())
+    return pool
+
+
+def invalidate_pool(section):
+    cache.delete(POOL_KEY.format(section=section))
+
+
+def _sample_rows(section):
+    model, count, _ = SECTIONS[section]
+    pool = get_pool(section)
+    ids = random.sample(pool, min(count, len(pool)))
+    queryset = model.objects.all()
+    if section in PROJECTIONS:
+        queryset = queryset.only(*PROJECTIONS[section])
+    rows = queryset.in_bulk(ids)
+    # Rows deleted since the pool was built are simply skipped.
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+def _mark(rows, attr, flagged_ids):
+    for row in rows:
+        setattr(row, attr, row.pk in flagged_ids)
+    return rows
+
+
+def build_home_feed(user):
+    """Return the template context for the home page sections."""
+    feed = {}
+    for section, (_, _, quiz_type) in SECTIONS.items():
+        rows = _sample_rows(section)
+        if quiz_type is None:
+            ids = [row.pk for row in rows]
+            liked = set()
+            if user.is_authenticated and ids:
+                liked = set(BlogPost.likes.through.objects.filter(
+                    user=user, blogpost_id__in=ids,
+                ).order_by().values_list('blogpost_id', flat=True))
+            feed[section] = _mark(rows, 'has_liked', liked)
+        else:
+            feed[section] = mark_attempted(rows, quiz_type, user)
+    return feed
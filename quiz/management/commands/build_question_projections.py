@@ -0,0 +1,68 @@
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+
+from quiz.models import QuestionSet, AdvanceQuestionSet, SuperQuestionSet, QuestionProjection
+from quiz.question_cache import invalidate_question_set
+from quiz.question_store import InvalidQuestionSet, build_projections, digest_checksums, raw_checksum
+
+QUESTION_MODELS = {
+    'quiz': QuestionSet,
+    'advance': AdvanceQuestionSet,
+    'super': SuperQuestionSet,
+}
+
+
+def _raw_sets(quiz_type):
+    """Yield ``(quiz_id, parts, digest)`` for every question set of a type."""
+    model = QUESTION_MODELS[quiz_type]
+    rows = model.objects.annotate(checksum=raw_checksum())
+    if quiz_type == 'super':
+        rows = rows.order_by('quiz_id', 'part_number').values_list('quiz_id', 'part_number', 'questions', 'checksum')
+        for quiz_id, group in groupby(rows.iterator(), key=lambda row: row[0]):
+            group = [row[1:] for row in group]
+            yield (quiz_id, [(part_number, questions) for part_number, questions, _ in group],
+                   digest_checksums((part_number, checksum) for part_number, _, checksum in group))
+    else:
+        rows = rows.order_by('quiz_id').values_list('quiz_id', 'questions', 'checksum')
+        for quiz_id, questions, checksum in rows.iterator():
+            yield quiz_id, [(None, questions)], digest_checksums([(None, checksum)])
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the prompt, answer-key and explanation projections of question sets (e.g. after a bulk import)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz-type', choices=sorted(QUESTION_MODELS), help='Only rebuild this quiz type')
+        parser.add_argument('--force', action='store_true', help='Rewrite projections that are already current')
+
+    def handle(self, *args, **options):
+        quiz_types = [options['quiz_type']] if options['quiz_type'] else list(QUESTION_MODELS)
+        for quiz_type in quiz_types:
+            projections = QuestionProjection.objects.filter(quiz_type=quiz_type)
+            digests = dict(projections.values_list('quiz_id', 'digest'))
+            seen = set()
+            built = invalid = 0
+            for quiz_id, parts, digest in _raw_sets(quiz_type):
+                seen.add(quiz_id)
+                if not options['force'] and digests.get(quiz_id) == digest:
+                    continue
+                try:
+                    fields = build_projections(quiz_type, quiz_id, parts, digest)
+                except InvalidQuestionSet as exc:
+                    self.stderr.write(str(exc))
+                    projections.filter(quiz_id=quiz_id).delete()
+                    invalid += 1
+                    continue
+                QuestionProjection.objects.update_or_create(quiz_type=quiz_type, quiz_id=quiz_id, defaults=fields)
+                invalidate_question_set(quiz_type, quiz_id)
+                built += 1
+
+            stale = [quiz_id for quiz_id in digests if quiz_id not in seen]
+            projections.filter(quiz_id__in=stale).delete()
+            for quiz_id in stale:
+                invalidate_question_set(quiz_type, quiz_id)
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{quiz_type}: rebuilt {built}, removed {len(stale)}, invalid {invalid}'
+            ))
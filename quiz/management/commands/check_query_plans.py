@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from quiz.attempt_timeline import KINDS, ORDERING, timeline_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot attempt-table queries and fail if any of them scans a whole table '
+        'instead of using its index. On PostgreSQL sequential scans are disabled for the '
+        'check, so the result does not depend on how much data the tables hold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, default=1, help='User the sample queries filter on')
+        parser.add_argument('--quiz-id', type=int, default=1, help='Quiz the sample queries filter on')
+
+    def _checks(self, kind, user_id, quiz_id):
+        """``(description, queryset, index expected in the plan or None for any)``."""
+        model = KINDS[kind][0]
+        table = model._meta.db_table
+        constraint = next(c.name for c in model._meta.constraints if c.name.endswith('_user_quiz_uniq'))
+        history_index = model._meta.indexes[0].name
+        return table, [
+            ('upsert conflict lookup', model.objects.filter(user_id=user_id, quiz_id=quiz_id).values('id'), constraint),
+            ('profile history page', timeline_rows(kind, user_id).order_by(*ORDERING)[:10], history_index),
+            ('attempted quiz ids', model.objects.filter(user_id=user_id).order_by().values('quiz_id'), None),
+        ]
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        tables = connection.introspection.table_names()
+        failures = []
+        for kind in KINDS:
+            table, checks = self._checks(kind, options['user_id'], options['quiz_id'])
+            if table not in tables:
+                self.stdout.write(f'{table}: table does not exist, skipped')
+                continue
+            for description, queryset, index in checks:
+                with transaction.atomic():
+                    if connection.vendor == 'postgresql':
+                        with connection.cursor() as cursor:
+                            cursor.execute('SET LOCAL enable_seqscan = off')
+                    plan = queryset.explain()
+                full_scan = f'Seq Scan on {table}' in plan or any(
+                    line.strip().endswith(f'SCAN {table}') for line in plan.splitlines()
+                )
+                if full_scan or (index is not None and index not in plan):
+                    failures.append(f'{table}: {description}')
+                    self.stdout.write(self.style.ERROR(f'{table}: {description} does not use {index or "an index"}'))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'{table}: {description} uses {index or "an index"}'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) without the expected index: ' + ', '.join(failures))
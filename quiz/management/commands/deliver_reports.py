@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from quiz.notifications import deliver_due
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued issue reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new reports')
+
+    def handle(self, *args, **options):
+        while True:
+            sent = deliver_due()
+            if sent:
+                self.stdout.write(f'Delivered {sent} report(s)')
+            if not options['loop']:
+                break
+            connections.close_all()
+            time.sleep(getattr(settings, 'ISSUE_REPORT_COALESCE_SECONDS', 2))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from quiz.attempt_recorder import recorder, replay_orphans
+
+
+class Command(BaseCommand):
+    help = 'Write attempts still queued in journals of stopped processes (e.g. after a crash)'
+
+    def handle(self, *args, **options):
+        written = replay_orphans() + recorder.flush()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} attempt(s)'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from quiz.score_distribution import ATTEMPT_MODELS, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-quiz score histograms from the attempt tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz-type', choices=sorted(ATTEMPT_MODELS), help='Only rebuild this quiz type')
+
+    def handle(self, *args, **options):
+        quiz_types = [options['quiz_type']] if options['quiz_type'] else list(ATTEMPT_MODELS)
+        for quiz_type in quiz_types:
+            count = rebuild(quiz_type)
+            self.stdout.write(self.style.SUCCESS(f'{quiz_type}: rebuilt {count} histogram(s)'))
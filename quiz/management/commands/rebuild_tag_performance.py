@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from quiz.tag_performance import ATTEMPT_MODELS, rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's per-exam-tag results from the attempt tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz-type', choices=sorted(ATTEMPT_MODELS), help='Only rebuild this quiz type')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Attempts fetched per round trip')
+
+    def handle(self, *args, **options):
+        quiz_types = [options['quiz_type']] if options['quiz_type'] else list(ATTEMPT_MODELS)
+        for quiz_type in quiz_types:
+            count = rebuild(quiz_type, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{quiz_type}: rebuilt {count} user/tag row(s)'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from quiz.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = 'Repair BlogPost.likes_count values that drifted from the likes table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.annotate(actual=Count('likes')).only('post_id', 'title', 'likes_count')
+        fixed = 0
+        for post in posts.iterator():
+            if post.likes_count == post.actual:
+                continue
+            fixed += 1
+            self.stdout.write(f'{post.title}: {post.likes_count} -> {post.actual}')
+            if not options['dry_run']:
+                # Skip posts whose counter moved since it was read
+                BlogPost.objects.filter(
+                    post_id=post.post_id, likes_count=post.likes_count,
+                ).update(likes_count=post.actual)
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} drifted like count(s)'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from quiz.blog_render import refresh_rendered, rendered_fields
+from quiz.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = 'Re-render the stored HTML and excerpts of blog posts whose Markdown or extensions changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render every post')
+
+    def handle(self, *args, **options):
+        rendered = 0
+        posts = BlogPost.objects.only('post_id', 'content', 'content_hash', 'content_html')
+        for post in posts.iterator():
+            if refresh_rendered(post, force=options['force']):
+                BlogPost.objects.filter(post_id=post.post_id).update(**rendered_fields(post))
+                rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} blog post(s)'))
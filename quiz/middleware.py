@@ -0,0 +1,28 @@
+# quiz/middleware.py
+from .db_routing import pin_to_primary, request_routing
+
+
+class AnswerDraftMiddleware:
+    """Write the cookies of the answer-draft store (quiz/answer_drafts.py) to the response."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        store = getattr(request, '_answer_drafts', None)
+        if store is not None:
+            store.apply(response)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Route each request's reads and pin browsers that write to the primary (quiz/db_routing.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_routing() as state:
+            response = self.get_response(request)
+        return pin_to_primary(request, response, state)
@@ -12,6 +12,7 @@ class Migration(migrations.Migration):
     operations = [
         migrations.AddField(
             model_name='blogpost',
+            name='fake_like_count',
             field=models.IntegerField(default=20),
         ),
     ]
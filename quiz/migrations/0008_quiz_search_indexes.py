@@ -0,0 +1,55 @@
+# Full-text and trigram indexes for quiz search (see quiz/search.py).
+#
+# The quiz tables are unmanaged, so the indexes are created with raw SQL and
+# only on PostgreSQL; other backends use the in-memory search fallback.
+
+from django.db import DatabaseError, migrations, transaction
+
+SEARCH_TABLES = ('quiz', 'advance_quiz', 'super_quiz')
+
+# Must stay identical to quiz.search.DOCUMENT_SQL so the planner uses it.
+DOCUMENT_SQL = "to_tsvector('simple', coalesce(quiz_name, '') || ' ' || coalesce(exam_tags::text, ''))"
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        has_trigram = True
+    except DatabaseError:
+        # Without pg_trgm, run with QUIZ_SEARCH_TRIGRAM=false.
+        has_trigram = False
+    existing = schema_editor.connection.introspection.table_names()
+    for table in SEARCH_TABLES:
+        if table not in existing:
+            continue
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_document_idx '
+            f'ON {table} USING gin (({DOCUMENT_SQL}))'
+        )
+        if has_trigram:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_name_trgm_idx '
+                f'ON {table} USING gin (quiz_name gin_trgm_ops)'
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_document_idx')
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_blogpost_fake_like_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
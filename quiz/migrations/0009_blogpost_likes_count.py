@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_likes_count(apps, schema_editor):
+    BlogPost = apps.get_model('quiz', 'BlogPost')
+    for post in BlogPost.objects.annotate(n=Count('likes')).only('post_id').iterator():
+        BlogPost.objects.filter(post_id=post.post_id).update(likes_count=post.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0008_quiz_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_likes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+def render_posts(apps, schema_editor):
+    from quiz.blog_render import refresh_rendered
+
+    BlogPost = apps.get_model('quiz', 'BlogPost')
+    for post in BlogPost.objects.only('post_id', 'content').iterator():
+        refresh_rendered(post, force=True)
+        BlogPost.objects.filter(post_id=post.post_id).update(
+            content_html=post.content_html, content_hash=post.content_hash,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0009_blogpost_likes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
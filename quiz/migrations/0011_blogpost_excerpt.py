@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+def fill_excerpts(apps, schema_editor):
+    from quiz.blog_render import make_excerpt
+
+    BlogPost = apps.get_model('quiz', 'BlogPost')
+    for post in BlogPost.objects.only('post_id', 'content').iterator():
+        BlogPost.objects.filter(post_id=post.post_id).update(excerpt=make_excerpt(post.content))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0010_blogpost_content_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='excerpt',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0011_blogpost_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField()),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('duplicates', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'issue_reports',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='issue_report_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0012_issuereport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionProjection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quiz_type', models.CharField(choices=[('quiz', 'Quiz'), ('advance', 'Advance quiz'), ('super', 'Super quiz')], max_length=10)),
+                ('quiz_id', models.IntegerField()),
+                ('outline', models.JSONField()),
+                ('prompts', models.JSONField()),
+                ('answers', models.JSONField()),
+                ('explanations', models.JSONField()),
+                ('digest', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'question_projections',
+                'unique_together': {('quiz_type', 'quiz_id')},
+            },
+        ),
+    ]
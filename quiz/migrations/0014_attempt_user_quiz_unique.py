@@ -0,0 +1,64 @@
+# One attempt per user and quiz (see quiz/attempt_recorder.py).
+#
+# The recorder upserts with ON CONFLICT (user_id, quiz_id), which needs a
+# unique index. The attempt tables are not all in the migration state (and
+# super_quiz_attempts is unmanaged), so the indexes are created with raw SQL.
+#
+# Existing duplicates are removed first, keeping each user's latest attempt
+# of a quiz. The removed rows are copied to <table>_duplicates (e.g.
+# quiz_attempts_duplicates) and their number is logged, so the older
+# attempts can still be looked up or restored.
+
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+ATTEMPT_TABLES = ('quiz_attempts', 'advance_quiz_attempts', 'super_quiz_attempts')
+
+
+def _older_attempts(table):
+    return (
+        f'SELECT id FROM ('
+        f' SELECT id, ROW_NUMBER() OVER ('
+        f'  PARTITION BY user_id, quiz_id ORDER BY attempt_date DESC, id DESC'
+        f' ) AS rank FROM {table}'
+        f') ranked WHERE rank > 1'
+    )
+
+
+def add_unique_indexes(apps, schema_editor):
+    existing = schema_editor.connection.introspection.table_names()
+    for table in ATTEMPT_TABLES:
+        if table not in existing:
+            continue
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM ({_older_attempts(table)}) duplicates')
+            duplicates = cursor.fetchone()[0]
+        if duplicates:
+            backup = f'{table}_duplicates'
+            if backup not in existing:
+                schema_editor.execute(f'CREATE TABLE {backup} AS SELECT * FROM {table} WHERE 1 = 0')
+            schema_editor.execute(f'INSERT INTO {backup} SELECT * FROM {table} WHERE id IN ({_older_attempts(table)})')
+            schema_editor.execute(f'DELETE FROM {table} WHERE id IN ({_older_attempts(table)})')
+            logger.warning('Moved %d duplicate attempt(s) from %s to %s', duplicates, table, backup)
+        schema_editor.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS {table}_user_quiz_uniq ON {table} (user_id, quiz_id)'
+        )
+
+
+def drop_unique_indexes(apps, schema_editor):
+    for table in ATTEMPT_TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_user_quiz_uniq')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0013_questionprojection'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_unique_indexes, drop_unique_indexes),
+    ]
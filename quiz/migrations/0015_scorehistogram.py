@@ -0,0 +1,40 @@
+# Score histograms (see quiz/score_distribution.py).
+#
+# Super quiz scores move in half marks, but super_quiz_attempts.score was an
+# integer column that truncated them; the table is unmanaged, so its column
+# is widened with raw SQL where it exists.
+
+from django.db import migrations, models
+
+
+def widen_super_scores(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if 'super_quiz_attempts' in schema_editor.connection.introspection.table_names():
+        schema_editor.execute('ALTER TABLE super_quiz_attempts ALTER COLUMN score TYPE double precision')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0014_attempt_user_quiz_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quiz_type', models.CharField(choices=[('quiz', 'Quiz'), ('advance', 'Advance quiz'), ('super', 'Super quiz')], max_length=10)),
+                ('quiz_id', models.IntegerField()),
+                ('buckets', models.JSONField(default=dict)),
+                ('total', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'score_histograms',
+                'unique_together': {('quiz_type', 'quiz_id')},
+            },
+        ),
+        migrations.RunPython(widen_super_scores, migrations.RunPython.noop),
+    ]
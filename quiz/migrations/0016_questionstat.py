@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0015_scorehistogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quiz_type', models.CharField(choices=[('quiz', 'Quiz'), ('advance', 'Advance quiz'), ('super', 'Super quiz')], max_length=10)),
+                ('quiz_id', models.IntegerField()),
+                ('question_index', models.IntegerField()),
+                ('correct', models.IntegerField(default=0)),
+                ('wrong', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('options', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'question_stats',
+                'unique_together': {('quiz_type', 'quiz_id', 'question_index')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0016_questionstat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quiz_type', models.CharField(choices=[('quiz', 'Quiz'), ('advance', 'Advance quiz'), ('super', 'Super quiz')], max_length=10)),
+                ('exam_tag', models.CharField(max_length=255)),
+                ('attempts', models.IntegerField(default=0)),
+                ('total_percentage', models.FloatField(default=0)),
+                ('best_percentage', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_performance', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'tag_performance',
+                'unique_together': {('user', 'quiz_type', 'exam_tag')},
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Unique constraints and covering indexes on the attempt tables.
+#
+# 0014 created unique indexes on (user_id, quiz_id) with raw SQL. On
+# PostgreSQL they become real UNIQUE constraints here, matching the
+# models' UniqueConstraints. Each table also gets an index on
+# (user_id, attempt_date DESC, id DESC) for a user's newest-first history.
+# On PostgreSQL that index INCLUDEs the columns the attempt cards show.
+# As in 0014, raw SQL covers the tables missing from the migration state
+# and the unmanaged super_quiz_attempts. Only quiz_attempts has its state
+# updated. `manage.py check_query_plans` confirms the queries use them.
+
+from django.db import migrations, models
+
+ATTEMPT_INDEXES = {
+    'quiz_attempts': ('quiz_attempt_user_date_idx', 'quiz_id, score, percentage, total_questions'),
+    'advance_quiz_attempts': ('adv_attempt_user_date_idx', 'quiz_id, score, percentage, total_score'),
+    'super_quiz_attempts': ('super_attempt_user_date_idx', 'quiz_id, score, percentage, total_questions'),
+}
+
+
+def _has_constraint(schema_editor, name):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_constraint WHERE conname = %s', [name])
+        return cursor.fetchone() is not None
+
+
+def add_attempt_indexes(apps, schema_editor):
+    postgresql = schema_editor.connection.vendor == 'postgresql'
+    existing = schema_editor.connection.introspection.table_names()
+    for table, (index, include) in ATTEMPT_INDEXES.items():
+        if table not in existing:
+            continue
+        unique = f'{table}_user_quiz_uniq'
+        schema_editor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {unique} ON {table} (user_id, quiz_id)')
+        if postgresql and not _has_constraint(schema_editor, unique):
+            schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {unique} UNIQUE USING INDEX {unique}')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index} ON {table} (user_id, attempt_date DESC, id DESC)'
+            + (f' INCLUDE ({include})' if postgresql else '')
+        )
+
+
+def drop_attempt_indexes(apps, schema_editor):
+    postgresql = schema_editor.connection.vendor == 'postgresql'
+    existing = schema_editor.connection.introspection.table_names()
+    for table, (index, _) in ATTEMPT_INDEXES.items():
+        if table not in existing:
+            continue
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+        if postgresql:
+            # Back to the plain unique index of 0014
+            unique = f'{table}_user_quiz_uniq'
+            schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {unique}')
+            schema_editor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {unique} ON {table} (user_id, quiz_id)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0017_tagperformance'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='quizattempt',
+                    constraint=models.UniqueConstraint(fields=('user', 'quiz'), name='quiz_attempts_user_quiz_uniq'),
+                ),
+                migrations.AddIndex(
+                    model_name='quizattempt',
+                    index=models.Index(
+                        fields=['user', '-attempt_date', '-id'], include=('quiz', 'score', 'percentage', 'total_questions'),
+                        name='quiz_attempt_user_date_idx',
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(add_attempt_indexes, drop_attempt_indexes),
+    ]
@@ -0,0 +1,19 @@
+# 0007 added fake_like_count without the model ever having the field.
+# The column is NOT NULL with no database default, so inserting a
+# BlogPost fails wherever 0007 has run. Drop it.
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0018_attempt_constraints_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='blogpost',
+            name='fake_like_count',
+        ),
+    ]
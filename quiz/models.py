@@ -45,7 +45,8 @@ class SuperQuizAttempt(models.Model):
     id = models.BigAutoField(primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='super_quiz_attempts')
     quiz = models.ForeignKey(SuperQuiz, on_delete=models.CASCADE)
-    score = models.IntegerField()
+    # Marks, in steps of half a mark (see quiz/scoring.py SUPER_MARKING)
+    score = models.FloatField()
     total_questions = models.IntegerField()
     percentage = models.FloatField()
     attempt_date = models.DateTimeField(auto_now_add=True)
@@ -56,6 +57,16 @@ class SuperQuizAttempt(models.Model):
         managed = False
         db_table = 'super_quiz_attempts'
         ordering = ['-attempt_date']
+        # Created by migrations 0014 and 0018, as the table is unmanaged
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='super_quiz_attempts_user_quiz_uniq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-attempt_date', '-id'], name='super_attempt_user_date_idx',
+                include=['quiz', 'score', 'percentage', 'total_questions'],
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz.quiz_name} - Part {self.part_number}"
@@ -93,6 +104,15 @@ class AdvanceQuizAttempt(models.Model):
     class Meta:
         db_table = 'advance_quiz_attempts'
         ordering = ['-attempt_date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='advance_quiz_attempts_user_quiz_uniq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-attempt_date', '-id'], name='adv_attempt_user_date_idx',
+                include=['quiz', 'score', 'percentage', 'total_score'],
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz.quiz_name} - {self.attempt_date}"
@@ -102,6 +122,12 @@ class BlogPost(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
     likes = models.ManyToManyField(User, related_name='blog_likes', blank=True)
+    # Kept in step with ``likes`` by like_blog_post; see reconcile_like_counts
+    likes_count = models.IntegerField(default=0)
+    # Derived from ``content`` on save; see quiz/blog_render.py
+    content_html = models.TextField(blank=True, default='')
+    excerpt = models.TextField(blank=True, default='')
+    content_hash = models.CharField(max_length=64, blank=True, default='')
 
     class Meta:
         db_table = 'blog_posts'
@@ -111,7 +137,113 @@ class BlogPost(models.Model):
         return self.title
 
     def like_count(self):
-        return self.likes.count()
+        return self.likes_count
+
+
+class IssueReport(models.Model):
+    """An issue report waiting to be delivered by quiz/notifications.py."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    message = models.TextField()
+    digest = models.CharField(max_length=64, db_index=True)
+    # Identical reports filed while this one was pending
+    duplicates = models.IntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'issue_reports'
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='issue_report_due_idx')]
+
+    def __str__(self):
+        return f"{self.status} report {self.pk}"
+
+
+class QuestionProjection(models.Model):
+    """A question set split by use; maintained by quiz/question_store.py."""
+    QUIZ_TYPE_CHOICES = [('quiz', 'Quiz'), ('advance', 'Advance quiz'), ('super', 'Super quiz')]
+
+    quiz_type = models.CharField(max_length=10, choices=QUIZ_TYPE_CHOICES)
+    quiz_id = models.IntegerField()
+    outline = models.JSONField()
+    prompts = models.JSONField()
+    answers = models.JSONField()
+    explanations = models.JSONField()
+    # Hash of the raw question set the row was built from
+    digest = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'question_projections'
+        unique_together = ('quiz_type', 'quiz_id')
+
+    def __str__(self):
+        return f"{self.quiz_type} quiz {self.quiz_id} projection"
+
+
+class ScoreHistogram(models.Model):
+    """Attempts per score bucket of one quiz; maintained by quiz/score_distribution.py."""
+    quiz_type = models.CharField(max_length=10, choices=QuestionProjection.QUIZ_TYPE_CHOICES)
+    quiz_id = models.IntegerField()
+    # Bucket (score times buckets per mark) -> number of attempts
+    buckets = models.JSONField(default=dict)
+    total = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'score_histograms'
+        unique_together = ('quiz_type', 'quiz_id')
+
+    def __str__(self):
+        return f"{self.quiz_type} quiz {self.quiz_id} scores"
+
+
+class QuestionStat(models.Model):
+    """Answer counts for one question; maintained by quiz/question_stats.py."""
+    quiz_type = models.CharField(max_length=10, choices=QuestionProjection.QUIZ_TYPE_CHOICES)
+    quiz_id = models.IntegerField()
+    question_index = models.IntegerField()
+    correct = models.IntegerField(default=0)
+    wrong = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    # Option key -> number of attempts that chose it
+    options = models.JSONField(default=dict)
+
+    class Meta:
+        db_table = 'question_stats'
+        unique_together = ('quiz_type', 'quiz_id', 'question_index')
+
+    def __str__(self):
+        return f"{self.quiz_type} quiz {self.quiz_id} Q{self.question_index + 1}"
+
+class TagPerformance(models.Model):
+    """One user's results on one exam tag; maintained by quiz/tag_performance.py."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tag_performance')
+    quiz_type = models.CharField(max_length=10, choices=QuestionProjection.QUIZ_TYPE_CHOICES)
+    exam_tag = models.CharField(max_length=255)
+    attempts = models.IntegerField(default=0)
+    # Sum of the attempts' percentages, for the average
+    total_percentage = models.FloatField(default=0)
+    best_percentage = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'tag_performance'
+        unique_together = ('user', 'quiz_type', 'exam_tag')
+
+    def __str__(self):
+        return f"{self.user_id} - {self.quiz_type} - {self.exam_tag}"
+
+    @property
+    def average_percentage(self):
+        return self.total_percentage / self.attempts if self.attempts else 0
 
 class Quiz(models.Model):
     quiz_id = models.IntegerField(primary_key=True)
@@ -156,12 +288,19 @@ class QuizAttempt(models.Model):
     class Meta:
         db_table = 'quiz_attempts'
         ordering = ['-attempt_date']
+        # One attempt per user and quiz, the conflict target of the
+        # attempt recorder's upserts
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='quiz_attempts_user_quiz_uniq'),
+        ]
+        # Profile history and counts: a user's attempts newest first,
+        # answered from the index alone on PostgreSQL
+        indexes = [
+            models.Index(
+                fields=['user', '-attempt_date', '-id'], name='quiz_attempt_user_date_idx',
+                include=['quiz', 'score', 'percentage', 'total_questions'],
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz.quiz_name} - {self.attempt_date}"
-
-class Meta:
-    db_table = 'quiz_attempts'
-    ordering = ['-attempt_date']
-    unique_together = ('user', 'quiz')
-
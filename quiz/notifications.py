@@ -0,0 +1,188 @@
+# quiz/notifications.py
+"""
+Outbound issue-report queue.
+
+``report_issue`` only stores the report (``enqueue``), so a slow or failing
+Telegram API never holds up a web worker. Delivery happens in a background
+thread, started lazily in each web process, or in the ``deliver_reports``
+management command when ``ISSUE_REPORT_WORKER`` is off:
+
+* reports that arrive close together are coalesced into one message,
+* an identical report that is still pending only bumps its duplicate count,
+* failed deliveries are retried with exponential backoff until
+  ``ISSUE_REPORT_MAX_ATTEMPTS`` is reached.
+
+The transport is pluggable through ``ISSUE_REPORT_TRANSPORT``; the default
+posts to the Telegram Bot API at ``TELEGRAM_API_URL`` with a timeout.
+"""
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import IssueReport
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than this.
+MAX_MESSAGE_LENGTH = 4096
+SEPARATOR = '\n-----\n'
+
+
+class DeliveryError(Exception):
+    pass
+
+
+class TelegramTransport:
+    """Send a message with the Telegram Bot API ``sendMessage`` method."""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'ISSUE_REPORT_TIMEOUT', 10)
+
+    def send(self, text):
+        import requests
+
+        url = f"{settings.TELEGRAM_API_URL.rstrip('/')}/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+        try:
+            response = requests.post(url, data={
+                'chat_id': settings.TELEGRAM_CHAT_ID,
+                'text': text,
+            }, timeout=self.timeout)
+        except requests.RequestException as exc:
+            raise DeliveryError(str(exc)) from exc
+        if response.status_code != 200:
+            raise DeliveryError(f'{response.status_code}: {response.text[:200]}')
+
+
+def get_transport():
+    return import_string(getattr(settings, 'ISSUE_REPORT_TRANSPORT', 'quiz.notifications.TelegramTransport'))()
+
+
+def report_digest(message):
+    return hashlib.sha256(message.strip().encode('utf-8')).hexdigest()
+
+
+def enqueue(message):
+    """Store a report for delivery and wake the worker."""
+    digest = report_digest(message)
+    pending = IssueReport.objects.filter(digest=digest, status=IssueReport.PENDING)
+    if not pending.update(duplicates=F('duplicates') + 1):
+        IssueReport.objects.create(message=message, digest=digest)
+    if getattr(settings, 'ISSUE_REPORT_WORKER', True):
+        transaction.on_commit(worker.wake)
+
+
+def _backoff(attempts):
+    base = getattr(settings, 'ISSUE_REPORT_RETRY_BASE', 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), getattr(settings, 'ISSUE_REPORT_RETRY_MAX', 3600)))
+
+
+def _format(report):
+    text = report.message.strip()
+    if report.duplicates:
+        text += f'\n(reported {report.duplicates + 1} times)'
+    return text
+
+
+def _batches(reports):
+    """Group reports into messages that fit Telegram's length limit."""
+    batch, size = [], 0
+    for report in reports:
+        text = _format(report)[:MAX_MESSAGE_LENGTH]
+        added = len(text) + (len(SEPARATOR) if batch else 0)
+        if batch and size + added > MAX_MESSAGE_LENGTH:
+            yield batch
+            batch, size = [], 0
+            added = len(text)
+        batch.append((report, text))
+        size += added
+    if batch:
+        yield batch
+
+
+def _claim(limit):
+    """Lease due reports to this worker for the length of a delivery attempt.
+
+    Pushing ``next_attempt_at`` forward keeps other workers off the rows
+    without holding a lock during the HTTP call; a worker that dies midway
+    simply lets the lease expire.
+    """
+    lease = timedelta(seconds=getattr(settings, 'ISSUE_REPORT_TIMEOUT', 10) * 2 + 60)
+    with transaction.atomic():
+        due = IssueReport.objects.filter(
+            status=IssueReport.PENDING, next_attempt_at__lte=timezone.now(),
+        ).order_by('id')
+        if connections[due.db].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        reports = list(due[:limit])
+        IssueReport.objects.filter(pk__in=[r.pk for r in reports]).update(next_attempt_at=timezone.now() + lease)
+    return reports
+
+
+def deliver_due(transport=None, limit=None):
+    """Deliver the reports that are due now; return the number sent."""
+    transport = transport or get_transport()
+    limit = limit or getattr(settings, 'ISSUE_REPORT_BATCH_SIZE', 50)
+    max_attempts = getattr(settings, 'ISSUE_REPORT_MAX_ATTEMPTS', 8)
+    sent = 0
+    for batch in _batches(_claim(limit)):
+        reports = [report for report, _ in batch]
+        try:
+            transport.send(SEPARATOR.join(text for _, text in batch))
+        except Exception as exc:
+            logger.warning('Issue report delivery failed: %s', exc)
+            for report in reports:
+                report.attempts += 1
+                report.last_error = str(exc)[:1000]
+                if report.attempts >= max_attempts:
+                    report.status = IssueReport.FAILED
+                else:
+                    report.next_attempt_at = timezone.now() + _backoff(report.attempts)
+            IssueReport.objects.bulk_update(reports, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+        else:
+            IssueReport.objects.filter(pk__in=[report.pk for report in reports]).update(
+                status=IssueReport.SENT, sent_at=timezone.now(), attempts=F('attempts') + 1,
+            )
+            sent += len(reports)
+    return sent
+
+
+class DeliveryWorker:
+    """Daemon thread that delivers queued reports for this process."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        self._event.set()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='issue-report-worker', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        poll = getattr(settings, 'ISSUE_REPORT_POLL_INTERVAL', 60)
+        coalesce = getattr(settings, 'ISSUE_REPORT_COALESCE_SECONDS', 2)
+        while True:
+            if self._event.wait(poll):
+                # Give a burst of reports a moment to arrive so they go out together
+                self._event.clear()
+                time.sleep(coalesce)
+            try:
+                deliver_due()
+            except Exception:
+                logger.exception('Issue report worker error')
+            finally:
+                connections.close_all()
+
+
+worker = DeliveryWorker()
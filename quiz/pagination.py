@@ -0,0 +1,126 @@
+# quiz/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Instead of ``COUNT(*)`` plus ``OFFSET``, a page is fetched with a
+``WHERE (key) < (last key seen)`` condition on an indexed ordering, so deep
+pages cost the same as the first one. The cursor is the signed key of the
+last row shown. Totals, where a page wants one, come from a short-lived
+cached count or the PostgreSQL planner estimate.
+"""
+from django.core import signing
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+
+CURSOR_SALT = 'quiz.pagination'
+
+
+class KeysetPage:
+    """One page of rows plus the cursor of the next page, if any."""
+
+    def __init__(self, object_list, next_cursor=None, total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def encode_cursor(values):
+    # Dates go out as ISO strings; model fields parse them back on filtering.
+    return signing.dumps(
+        [v.isoformat() if hasattr(v, 'isoformat') else v for v in values],
+        salt=CURSOR_SALT,
+    )
+
+
+def decode_cursor(cursor):
+    """Return the key values in a cursor, or None if it is missing or forged."""
+    if not cursor:
+        return None
+    try:
+        return signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def _after(ordering, values):
+    """Q selecting rows strictly after ``values`` in ``ordering``."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=15, total=None):
+    """Return the page of ``queryset`` that follows ``cursor``.
+
+    ``ordering`` must be unique over the queryset, e.g. ``('-post_id',)`` or
+    ``('-attempt_date', '-id')``.
+    """
+    ordering = tuple(ordering)
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(ordering):
+        queryset = queryset.filter(_after(ordering, values))
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+    return KeysetPage(rows, next_cursor, total)
+
+
+def cached_count(queryset, key, ttl=300):
+    """``queryset.count()`` cached for ``ttl`` seconds under ``key``."""
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, ttl)
+    return count
+
+
+def approximate_count(model, ttl=300):
+    """Row count of a whole table, from the planner estimate on PostgreSQL."""
+    key = f'approximate_count:{model._meta.db_table}'
+    connection = connections[model.objects.db]
+    if connection.vendor != 'postgresql':
+        return cached_count(model.objects.all(), key, ttl)
+    count = cache.get(key)
+    if count is None:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [model._meta.db_table])
+            row = cursor.fetchone()
+        count = row[0] if row and row[0] >= 0 else model.objects.count()
+        cache.set(key, count, ttl)
+    return count
+
+
+def next_page_url(request, page, param='cursor', **params):
+    """URL of the page after ``page``, keeping the other query parameters."""
+    if not page.has_next:
+        return None
+    query = request.GET.copy()
+    query[param] = page.next_cursor
+    for key, value in params.items():
+        query[key] = value
+    return f'{request.path}?{query.urlencode()}'
@@ -0,0 +1,260 @@
+# quiz/question_cache.py
+"""
+In-process LRU cache of question sets.
+
+Question sets are read on every quiz, submit and solutions request but
+change very rarely, so each worker keeps them in memory and only goes
+back to the database when an entry is missing, expired or its version has
+been bumped by ``invalidate_question_set``. Other workers' bumps are
+seen within ``CACHE_VERSION_CHECK_INTERVAL`` seconds (quiz/cache_versions.py).
+An entry starts out with just the quiz's outline; the prompt, answer-key
+and explanation projections (see quiz/question_store.py) are read the
+first time a path needs them.
+Loading an entry checks the projection against the raw question set, so
+an edit made outside Django is served at most ``QUESTION_CACHE_TTL``
+seconds after it was made.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import Http404
+
+from .cache_versions import bump_version, get_version
+from .models import QuestionProjection
+from .question_store import InvalidQuestionSet, load_projection, load_raw_digest, regenerate
+
+logger = logging.getLogger(__name__)
+
+QUIZ_TYPES = ('quiz', 'advance', 'super')
+
+VERSION_KEY = 'question_set_version:{quiz_type}:{quiz_id}'
+
+
+class QuestionSetEntry:
+    """Questions of one quiz, loaded a projection at a time.
+
+    ``outline`` is a list of ``(part_number, question_count)`` tuples.
+    Normal and advance quizzes have a single part whose number is ``None``.
+    """
+    __slots__ = ('quiz_type', 'quiz_id', 'version', 'outline', 'digest', 'size', 'loaded_at', 'projections', 'answer_key')
+
+    def __init__(self, quiz_type, quiz_id, version, outline, digest, size):
+        self.quiz_type = quiz_type
+        self.quiz_id = quiz_id
+        self.version = version
+        self.outline = outline
+        # Digest of the raw question set the outline was built from
+        self.digest = digest
+        self.size = size
+        self.loaded_at = time.monotonic()
+        self.projections = {}
+        # Compiled lazily by quiz.scoring.get_answer_key.
+        self.answer_key = None
+
+    def projection(self, name):
+        """One projection (a list per part), read from the database on first use."""
+        data = self.projections.get(name)
+        if data is None:
+            try:
+                loaded = load_projection(self.quiz_type, self.quiz_id, name, self.digest)
+            except InvalidQuestionSet as exc:
+                logger.warning('Not serving question set: %s', exc)
+                raise Http404(f'Invalid question set for {self.quiz_type} quiz {self.quiz_id}') from exc
+            if loaded is None:
+                # The question set changed after this entry was loaded
+                invalidate_question_set(self.quiz_type, self.quiz_id)
+                raise Http404(f'Question set of {self.quiz_type} quiz {self.quiz_id} changed')
+            data = self.projections.setdefault(name, loaded)
+            if data is loaded:
+                question_cache.grow(self, len(json.dumps(loaded)))
+        return data
+
+    @property
+    def parts(self):
+        """``(part_number, questions)`` with every field of every question."""
+        prompts = self.projection('prompts')
+        answers = self.projection('answers')
+        explanations = self.projection('explanations')
+        return [
+            (part_number, [
+                {**prompt, 'answer': answer, 'explanation': explanation}
+                for prompt, (_, answer), explanation in zip(prompts[i], answers[i], explanations[i])
+            ])
+            for i, (part_number, _) in enumerate(self.outline)
+        ]
+
+    @property
+    def questions(self):
+        """Questions of a single-part (normal or advance) quiz."""
+        return self.parts[0][1] if self.outline else []
+
+    @property
+    def total_questions(self):
+        return sum(count for _, count in self.outline)
+
+
+def _load_outline(quiz_type, quiz_id, stored=None):
+    """``(outline, digest)`` of a quiz, checked against its raw question set.
+
+    ``stored`` is the ``(outline, digest)`` of its projection row if the
+    caller already read it (both None when there is no row). Only the
+    digest of the raw rows is read, computed by the database. A row that
+    no longer matches it, e.g. after an edit outside Django, is rebuilt
+    and other workers' copies are invalidated.
+    """
+    if stored is None:
+        stored = (QuestionProjection.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id)
+                  .values_list('outline', 'digest').first()) or (None, None)
+    outline, digest = stored
+    try:
+        raw_digest = load_raw_digest(quiz_type, quiz_id)
+        if raw_digest is None:
+            if outline is not None:
+                QuestionProjection.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id).delete()
+            raise Http404(f'No question set for {quiz_type} quiz {quiz_id}')
+        if digest != raw_digest:
+            fields = regenerate(quiz_type, quiz_id)
+            if fields is None:
+                raise Http404(f'No question set for {quiz_type} quiz {quiz_id}')
+            if outline is not None:
+                invalidate_question_set(quiz_type, quiz_id)
+            outline, digest = fields['outline'], fields['digest']
+    except InvalidQuestionSet as exc:
+        logger.warning('Not serving question set: %s', exc)
+        raise Http404(f'Invalid question set for {quiz_type} quiz {quiz_id}') from exc
+    return outline, digest
+
+
+def _current_version(quiz_type, quiz_id):
+    return get_version(VERSION_KEY.format(quiz_type=quiz_type, quiz_id=quiz_id))
+
+
+def build_entry(quiz_type, quiz_id, outline, digest, version=None):
+    """Make a cache entry from a stored ``[part_number, count]`` outline."""
+    if version is None:
+        version = _current_version(quiz_type, quiz_id)
+    outline = [(part_number, count) for part_number, count in outline]
+    return QuestionSetEntry(quiz_type, quiz_id, version, outline, digest, len(json.dumps(outline)))
+
+
+class QuestionSetCache:
+    """Thread-safe LRU bounded by entry count and approximate byte size."""
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def peek(self, quiz_type, quiz_id):
+        """Return the current entry for a quiz, or None without loading it."""
+        if quiz_type not in QUIZ_TYPES:
+            raise ValueError(f'Unknown quiz type: {quiz_type}')
+        key = (quiz_type, quiz_id)
+        version = _current_version(quiz_type, quiz_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version and not self._expired(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return None
+
+    def get(self, quiz_type, quiz_id):
+        """Return the entry for a quiz, loading it on a miss."""
+        # Read the version before loading so a concurrent edit is not masked
+        version = _current_version(quiz_type, quiz_id)
+        entry = self.peek(quiz_type, quiz_id)
+        if entry is None:
+            entry = build_entry(quiz_type, quiz_id, *_load_outline(quiz_type, quiz_id), version)
+            self.put(entry)
+        return entry
+
+    def put(self, entry):
+        """Insert or replace an entry, evicting least recently used ones."""
+        key = (entry.quiz_type, entry.quiz_id)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def grow(self, entry, size):
+        """Account for a projection loaded into ``entry`` after it was cached."""
+        key = (entry.quiz_type, entry.quiz_id)
+        with self._lock:
+            entry.size += size
+            if self._entries.get(key) is not entry:
+                return
+            self._bytes += size
+            while len(self._entries) > 1 and self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def discard(self, quiz_type, quiz_id):
+        with self._lock:
+            entry = self._entries.pop((quiz_type, quiz_id), None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.monotonic() - entry.loaded_at > self.ttl
+
+
+question_cache = QuestionSetCache(
+    max_entries=getattr(settings, 'QUESTION_CACHE_MAX_ENTRIES', 256),
+    max_bytes=getattr(settings, 'QUESTION_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+    ttl=getattr(settings, 'QUESTION_CACHE_TTL', 300),
+)
+
+
+def get_question_set(quiz_type, quiz_id):
+    """Return the cached ``QuestionSetEntry`` for a quiz (404 if missing)."""
+    return question_cache.get(quiz_type, quiz_id)
+
+
+def invalidate_question_set(quiz_type, quiz_id):
+    """Bump the version of a question set so every worker reloads it.
+
+    The version lives in the shared default cache, so other workers see it
+    on their next lookup; this worker's copy is dropped straight away.
+    """
+    bump_version(VERSION_KEY.format(quiz_type=quiz_type, quiz_id=quiz_id))
+    question_cache.discard(quiz_type, quiz_id)
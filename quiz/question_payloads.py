@@ -0,0 +1,60 @@
+# quiz/question_payloads.py
+"""
+Question payloads for the quiz-taking pages.
+
+The quiz pages no longer inline the question set. They fetch questions
+from a JSON endpoint a page (or, for super quizzes, a section) at a time,
+and the payload is the stored prompts projection (question text and
+options); answers and explanations stay on the server until the attempt
+is submitted.
+"""
+from django.http import Http404
+
+PAGE_SIZE = 10
+
+
+def get_prompts(entry):
+    """``(part_number, questions)`` of a question set without answers or explanations."""
+    prompts = entry.projection('prompts')
+    return [(part_number, prompts[i]) for i, (part_number, _) in enumerate(entry.outline)]
+
+
+def _page_number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise Http404('Invalid page')
+
+
+def question_page(entry, page):
+    """One page of a normal or advance quiz."""
+    questions = get_prompts(entry)[0][1] if entry.outline else []
+    page = _page_number(page)
+    offset = page * PAGE_SIZE
+    if page < 0 or (offset >= len(questions) and page != 0):
+        raise Http404('No such page')
+    return {
+        'total': len(questions),
+        'page': page,
+        'page_size': PAGE_SIZE,
+        'offset': offset,
+        'questions': questions[offset:offset + PAGE_SIZE],
+    }
+
+
+def question_section(entry, part):
+    """Every question of one super quiz section."""
+    part = _page_number(part)
+    for part_number, questions in get_prompts(entry):
+        if part_number == part:
+            return {'part': part, 'total': len(questions), 'offset': 0, 'questions': questions}
+    raise Http404('No such section')
+
+
+def section_outline(quiz, entry):
+    """Section tabs for a super quiz page: names and sizes, no questions."""
+    return [{
+        'part_number': part_number,
+        'part_name': quiz.part_names.get(str(part_number), f"Part {part_number}"),
+        'count': count,
+    } for part_number, count in entry.outline]
@@ -0,0 +1,155 @@
+# quiz/question_stats.py
+"""
+Per-question answer statistics.
+
+``QuestionStat`` rows count, for every question of a quiz, how many
+attempts got it right, got it wrong or skipped it, and how often each
+option was chosen. The rows are kept current from the attempts
+themselves. When the attempt recorder upserts an attempt, the replaced
+attempt's answers are subtracted and the new answers added in the same
+transaction. Solutions pages can then show how hard each question is
+without decoding stored answers. ``rebuild_question_stats`` recomputes
+the rows by streaming the attempt tables.
+
+Only normal and advance attempts store their answers; super quiz
+attempts have no per-question data.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.http import Http404
+
+from .models import QuizAttempt, AdvanceQuizAttempt, QuestionStat
+from .question_cache import question_cache
+from .question_store import InvalidQuestionSet
+from .scoring import SKIPPED, get_answer_key
+
+ATTEMPT_MODELS = {
+    'quiz': QuizAttempt,
+    'advance': AdvanceQuizAttempt,
+}
+
+
+class QuestionTally:
+    """Counts for one question, built up in memory before they are written."""
+    __slots__ = ('correct', 'wrong', 'skipped', 'options')
+
+    def __init__(self):
+        self.correct = self.wrong = self.skipped = 0
+        self.options = Counter()
+
+    def add(self, outcome, option, sign=1):
+        setattr(self, outcome, getattr(self, outcome) + sign)
+        if option is not None:
+            self.options[option] += sign
+
+
+def outcomes(part_key, answers):
+    """``(outcome, chosen option)`` for every question of one submission."""
+    if not isinstance(answers, dict):
+        answers = {}
+    for i, response in enumerate(part_key.responses(answers)):
+        if response == SKIPPED:
+            yield 'skipped', None
+        elif response == part_key.correct[i]:
+            yield 'correct', answers[part_key.answer_field(i)]
+        elif response >= 0:
+            yield 'wrong', answers[part_key.answer_field(i)]
+        else:
+            # Not one of the options
+            yield 'wrong', None
+
+
+def tally(quiz_type, quiz_id, changes, tallies=None):
+    """Add ``(old_answers, new_answers)`` changes of one quiz to ``tallies``."""
+    tallies = {} if tallies is None else tallies
+    try:
+        part_key = get_answer_key(question_cache.get(quiz_type, quiz_id)).parts[0]
+    except (Http404, InvalidQuestionSet, IndexError):
+        # The quiz has no usable question set to classify answers against
+        return tallies
+    for old_answers, new_answers in changes:
+        for answers, sign in ((old_answers, -1), (new_answers, 1)):
+            if answers is None:
+                continue
+            for index, (outcome, option) in enumerate(outcomes(part_key, answers)):
+                tallies.setdefault(index, QuestionTally()).add(outcome, option, sign)
+    return tallies
+
+
+def _merge_options(stored, delta):
+    counts = Counter(stored)
+    counts.update(delta)
+    return {key: count for key, count in sorted(counts.items()) if count > 0}
+
+
+def apply_changes(quiz_type, changes):
+    """Apply ``(quiz_id, old_answers, new_answers)`` changes to the stats rows.
+
+    ``old_answers`` is None for a first attempt and ``new_answers`` is None
+    for a deleted one.
+    """
+    by_quiz = {}
+    for quiz_id, old_answers, new_answers in changes:
+        by_quiz.setdefault(quiz_id, []).append((old_answers, new_answers))
+
+    with transaction.atomic():
+        for quiz_id, quiz_changes in sorted(by_quiz.items()):
+            tallies = tally(quiz_type, quiz_id, quiz_changes)
+            if not tallies:
+                continue
+            QuestionStat.objects.bulk_create(
+                [QuestionStat(quiz_type=quiz_type, quiz_id=quiz_id, question_index=index) for index in sorted(tallies)],
+                ignore_conflicts=True,
+            )
+            rows = list(QuestionStat.objects.select_for_update().filter(
+                quiz_type=quiz_type, quiz_id=quiz_id, question_index__in=tallies,
+            ).order_by('question_index'))
+            for row in rows:
+                counts = tallies[row.question_index]
+                row.correct = max(row.correct + counts.correct, 0)
+                row.wrong = max(row.wrong + counts.wrong, 0)
+                row.skipped = max(row.skipped + counts.skipped, 0)
+                row.options = _merge_options(row.options, counts.options)
+            QuestionStat.objects.bulk_update(rows, ['correct', 'wrong', 'skipped', 'options'])
+
+
+def rebuild(quiz_type, batch_size=2000):
+    """Recompute the stats of a quiz type, streaming its attempts quiz by quiz."""
+    model = ATTEMPT_MODELS[quiz_type]
+    quiz_ids = model.objects.order_by('quiz_id').values_list('quiz_id', flat=True).distinct()
+    rebuilt = 0
+    for quiz_id in list(quiz_ids):
+        answers = model.objects.filter(quiz_id=quiz_id).order_by().values_list('answers', flat=True)
+        tallies = tally(quiz_type, quiz_id, ((None, a) for a in answers.iterator(chunk_size=batch_size)))
+        with transaction.atomic():
+            QuestionStat.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id).delete()
+            QuestionStat.objects.bulk_create([
+                QuestionStat(
+                    quiz_type=quiz_type, quiz_id=quiz_id, question_index=index,
+                    correct=counts.correct, wrong=counts.wrong, skipped=counts.skipped,
+                    options=_merge_options({}, counts.options),
+                ) for index, counts in sorted(tallies.items())
+            ], batch_size=batch_size)
+        rebuilt += 1
+    QuestionStat.objects.filter(quiz_type=quiz_type).exclude(quiz_id__in=quiz_ids).delete()
+    return rebuilt
+
+
+def question_stats(quiz_type, quiz_id):
+    """Display stats of every question of a quiz, by question index."""
+    stats = {}
+    rows = QuestionStat.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id).values_list(
+        'question_index', 'correct', 'wrong', 'skipped', 'options',
+    )
+    for index, correct, wrong, skipped, options in rows:
+        attempts = correct + wrong + skipped
+        if not attempts:
+            continue
+        stats[index] = {
+            'attempts': attempts,
+            'correct_percent': round(correct / attempts * 100),
+            'skipped_percent': round(skipped / attempts * 100),
+            'options': options,
+        }
+    return stats
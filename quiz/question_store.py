@@ -0,0 +1,153 @@
+# quiz/question_store.py
+"""
+Per-use projections of question sets.
+
+The raw ``questions`` JSON holds the text, options, answer and explanation
+of every question in one blob. Each quiz also gets a ``QuestionProjection``
+row that splits it into columns read by different paths:
+
+* ``outline``: ``[part_number, question_count]`` pairs (the quiz page),
+* ``prompts``: question text and options (the question endpoint),
+* ``answers``: option keys and the correct answer (scoring),
+* ``explanations``: explanation text (results and solutions pages).
+
+Each projection column holds one list per part, in ``outline`` order. The
+row is regenerated when a question set is saved through Django, lazily
+when it is missing, and for bulk imports by the
+``build_question_projections`` command. The question tables are also
+edited outside Django, where no signal fires, so the question cache checks
+a row's ``digest`` against the raw question set whenever it loads a quiz
+(see ``quiz.question_cache._load_outline``). The digest is built from MD5
+checksums of the raw ``questions`` columns computed by the database, so
+the check never reads the questions themselves.
+"""
+import hashlib
+import json
+import logging
+
+from django.db.models import TextField
+from django.db.models.functions import MD5, Cast
+
+from .models import QuestionSet, AdvanceQuestionSet, SuperQuestionSet, QuestionProjection
+
+logger = logging.getLogger(__name__)
+
+PROJECTIONS = ('prompts', 'answers', 'explanations')
+
+
+class InvalidQuestionSet(ValueError):
+    """Raised when a stored question set does not have the expected shape."""
+
+
+def _validate_questions(questions, quiz_type, quiz_id):
+    if not isinstance(questions, list):
+        raise InvalidQuestionSet(f'{quiz_type} quiz {quiz_id}: questions must be a list')
+    for i, q in enumerate(questions):
+        if not isinstance(q, dict) or 'question' not in q or 'answer' not in q:
+            raise InvalidQuestionSet(f'{quiz_type} quiz {quiz_id}: question {i} is malformed')
+        if not isinstance(q.get('options'), dict):
+            raise InvalidQuestionSet(f'{quiz_type} quiz {quiz_id}: question {i} has no options')
+    return questions
+
+
+def raw_checksum():
+    """MD5 of a question set row's raw ``questions`` text, computed by the database."""
+    return MD5(Cast('questions', TextField()))
+
+
+def _raw_rows(quiz_type, quiz_id, *fields):
+    """``(part_number, *fields)`` rows of a quiz's question set, or None if it has none.
+
+    ``fields`` may include ``checksum`` (see ``raw_checksum``).
+    """
+    if quiz_type == 'super':
+        rows = SuperQuestionSet.objects.filter(quiz_id=quiz_id).order_by('part_number')
+        return list(rows.annotate(checksum=raw_checksum()).values_list('part_number', *fields))
+
+    model = AdvanceQuestionSet if quiz_type == 'advance' else QuestionSet
+    row = model.objects.filter(quiz_id=quiz_id).annotate(checksum=raw_checksum()).values_list(*fields).first()
+    if row is None:
+        return None
+    return [(None, *row)]
+
+
+def digest_checksums(checksums):
+    """Digest of a question set from its ``(part_number, checksum)`` rows, stored as the projection's ``digest``."""
+    return hashlib.sha256(json.dumps([list(row) for row in checksums]).encode('utf-8')).hexdigest()
+
+
+def load_raw_parts(quiz_type, quiz_id):
+    """Raw ``(part_number, questions)`` rows of a quiz and their digest, or None if it has no question set."""
+    rows = _raw_rows(quiz_type, quiz_id, 'questions', 'checksum')
+    if rows is None:
+        return None
+    parts = [(part_number, questions) for part_number, questions, _ in rows]
+    return parts, digest_checksums((part_number, checksum) for part_number, _, checksum in rows)
+
+
+def load_raw_digest(quiz_type, quiz_id):
+    """Digest of a quiz's raw question set, or None if it has none; no questions are read."""
+    rows = _raw_rows(quiz_type, quiz_id, 'checksum')
+    if rows is None:
+        return None
+    return digest_checksums(rows)
+
+
+def build_projections(quiz_type, quiz_id, parts, digest):
+    """Split validated raw parts into the projection columns."""
+    parts = [(part_number, _validate_questions(questions, quiz_type, quiz_id))
+             for part_number, questions in parts]
+    return {
+        'outline': [[part_number, len(questions)] for part_number, questions in parts],
+        'prompts': [[{'question': q['question'], 'options': q['options']} for q in questions]
+                    for _, questions in parts],
+        'answers': [[[list(q['options']), q['answer']] for q in questions] for _, questions in parts],
+        'explanations': [[q.get('explanation', '') for q in questions] for _, questions in parts],
+        'digest': digest,
+    }
+
+
+def regenerate(quiz_type, quiz_id):
+    """Rebuild the projection row of a quiz from its raw question set.
+
+    Returns the stored fields, or None when the quiz has no question set
+    (its row, if any, is removed).
+    """
+    raw = load_raw_parts(quiz_type, quiz_id)
+    if raw is None:
+        QuestionProjection.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id).delete()
+        return None
+    fields = build_projections(quiz_type, quiz_id, *raw)
+    QuestionProjection.objects.update_or_create(quiz_type=quiz_type, quiz_id=quiz_id, defaults=fields)
+    return fields
+
+
+def refresh(quiz_type, quiz_id):
+    """Regenerate after an edit; a malformed set drops its row instead of failing the save."""
+    try:
+        regenerate(quiz_type, quiz_id)
+    except InvalidQuestionSet as exc:
+        logger.warning('Not projecting question set: %s', exc)
+        QuestionProjection.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id).delete()
+
+
+def load_projection(quiz_type, quiz_id, name, digest=None):
+    """Read one projection column of a quiz, regenerating the row if it is missing.
+
+    With ``digest``, only a row built from that version of the question
+    set is used; None is returned if the set has changed since.
+    """
+    if name not in PROJECTIONS:
+        raise ValueError(f'Unknown projection: {name}')
+    rows = QuestionProjection.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id)
+    if digest is not None:
+        rows = rows.filter(digest=digest)
+    value = rows.values_list(name, flat=True).first()
+    if value is None:
+        fields = regenerate(quiz_type, quiz_id)
+        if fields is None:
+            return []
+        if digest is not None and fields['digest'] != digest:
+            return None
+        value = fields[name]
+    return value
@@ -0,0 +1,57 @@
+# quiz/quiz_loader.py
+"""
+Request-scoped quiz loading.
+
+The signup decorators and the quiz views both need the quiz row, and the
+views also need its question set. ``load_quiz`` fetches the two together
+once per request and memoizes them on the request, so the decorator and
+the view share one lookup. When the question set is already in the
+per-worker question cache only the quiz row is read; otherwise the quiz
+row comes back with its question outline in a single query, and the
+outline is checked against the raw question set.
+"""
+from django.db.models import JSONField, OuterRef, Subquery
+from django.shortcuts import get_object_or_404
+
+from .models import Quiz, AdvanceQuiz, SuperQuiz, QuestionProjection
+from .question_cache import _current_version, _load_outline, build_entry, question_cache
+
+QUIZ_MODELS = {
+    'quiz': Quiz,
+    'advance': AdvanceQuiz,
+    'super': SuperQuiz,
+}
+
+
+def _fetch(quiz_type, quiz_id):
+    quiz_model = QUIZ_MODELS[quiz_type]
+    entry = question_cache.peek(quiz_type, quiz_id)
+    if entry is not None:
+        return get_object_or_404(quiz_model, quiz_id=quiz_id), entry
+
+    version = _current_version(quiz_type, quiz_id)
+    projection = QuestionProjection.objects.filter(quiz_type=quiz_type, quiz_id=OuterRef('quiz_id'))
+    quiz = get_object_or_404(
+        quiz_model.objects.annotate(
+            question_outline=Subquery(projection.values('outline')[:1], output_field=JSONField()),
+            question_digest=Subquery(projection.values('digest')[:1]),
+        ),
+        quiz_id=quiz_id,
+    )
+    # Checked against the raw question set; projected here if it never was
+    outline, digest = _load_outline(quiz_type, quiz_id, (quiz.question_outline, quiz.question_digest))
+
+    entry = build_entry(quiz_type, quiz_id, outline, digest, version)
+    question_cache.put(entry)
+    return quiz, entry
+
+
+def load_quiz(request, quiz_type, quiz_id):
+    """Return ``(quiz, question_set)`` for this request, loading them once."""
+    memo = getattr(request, '_loaded_quizzes', None)
+    if memo is None:
+        memo = request._loaded_quizzes = {}
+    key = (quiz_type, quiz_id)
+    if key not in memo:
+        memo[key] = _fetch(quiz_type, quiz_id)
+    return memo[key]
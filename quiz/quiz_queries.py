@@ -0,0 +1,126 @@
+# quiz/quiz_queries.py
+"""
+Shared query builder for the quiz search page and its HTMX partial.
+
+A page of quizzes for ``(quiz_type, q, tag, page)`` is the same for every
+visitor, so it is cached for a short time without any per-user data. The
+``has_attempted`` flags are overlaid afterwards from the user's cached
+attempted set.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+
+from .models import (
+    Quiz, QuizAttempt, AdvanceQuiz, AdvanceQuizAttempt, SuperQuiz, SuperQuizAttempt,
+)
+from .attempted_sets import mark_attempted
+from .cache_versions import bump_version, get_version
+from .pagination import cached_count, keyset_paginate
+from .search import apply_search
+from .tag_index import tag_quiz_ids
+
+PAGE_SIZE = 15
+
+QUIZ_MODELS = {
+    'quiz': Quiz,
+    'advance': AdvanceQuiz,
+    'super': SuperQuiz,
+}
+
+ATTEMPT_MODELS = {
+    'quiz': QuizAttempt,
+    'advance': AdvanceQuizAttempt,
+    'super': SuperQuizAttempt,
+}
+
+PAGE_KEY = 'quiz_page:{digest}'
+KEYSET_PAGE_KEY = 'quiz_keyset_page:{digest}'
+CATALOGUE_VERSION_KEY = 'quiz_catalogue_version:{quiz_type}'
+ATTEMPT_COUNT_KEY = 'attempt_count:{quiz_type}:{user_id}'
+
+
+def normalize_quiz_type(quiz_type):
+    """Map the ``quiz_type`` request parameter to a quiz type ('' means 'quiz')."""
+    return quiz_type if quiz_type in ('super', 'advance') else 'quiz'
+
+
+def build_queryset(quiz_type, query='', tag=''):
+    """Quizzes of a type filtered by search query and tag, in display order."""
+    quiz_type = normalize_quiz_type(quiz_type)
+    quizzes = QUIZ_MODELS[quiz_type].objects.all()
+    if tag and tag.strip():
+        quizzes = quizzes.filter(quiz_id__in=tag_quiz_ids(quiz_type, tag))
+    if query:
+        # Ranked searches keep their relevance ordering
+        return apply_search(quizzes, query, quiz_type)
+    return quizzes.order_by('-quiz_id')
+
+
+def _page_number(page):
+    try:
+        return max(int(page), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _page_key(quiz_type, query, tag, number, template=PAGE_KEY):
+    version = get_version(CATALOGUE_VERSION_KEY.format(quiz_type=quiz_type))
+    raw = f'{quiz_type}|{query}|{tag}|{number}|{version}'
+    return template.format(digest=hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def get_quiz_page(quiz_type, query='', tag='', page=1, user=None):
+    """Return a ``Page`` of quizzes with ``has_attempted`` set for ``user``."""
+    quiz_type = normalize_quiz_type(quiz_type)
+    number = _page_number(page)
+    key = _page_key(quiz_type, query, tag, number)
+    cached = cache.get(key)
+    if cached is None:
+        page_obj = Paginator(build_queryset(quiz_type, query, tag), PAGE_SIZE).get_page(number)
+        cached = {
+            'rows': list(page_obj.object_list),
+            'count': page_obj.paginator.count,
+            'number': page_obj.number,
+        }
+        cache.set(key, cached, getattr(settings, 'QUIZ_PAGE_CACHE_TTL', 60))
+
+    # A range stands in for the result set so the paginator knows the
+    # count without querying; the cached rows become the page contents.
+    paginator = Paginator(range(cached['count']), PAGE_SIZE)
+    page_obj = Page(cached['rows'], cached['number'], paginator)
+    mark_attempted(page_obj.object_list, quiz_type, user)
+    return page_obj
+
+
+def get_quiz_keyset_page(quiz_type, tag='', cursor=None, user=None):
+    """Browse quizzes newest first with a ``quiz_id`` cursor instead of OFFSET."""
+    quiz_type = normalize_quiz_type(quiz_type)
+    key = _page_key(quiz_type, '', tag, cursor or '', template=KEYSET_PAGE_KEY)
+    page = cache.get(key)
+    if page is None:
+        page = keyset_paginate(build_queryset(quiz_type, '', tag), ('-quiz_id',), cursor, PAGE_SIZE)
+        cache.set(key, page, getattr(settings, 'QUIZ_PAGE_CACHE_TTL', 60))
+    mark_attempted(page.object_list, quiz_type, user)
+    return page
+
+
+def attempt_count(quiz_type, user):
+    """Number of attempts of a quiz type by ``user``, cached until the next submit or expiry."""
+    quiz_type = normalize_quiz_type(quiz_type)
+    return cached_count(
+        ATTEMPT_MODELS[quiz_type].objects.filter(user=user),
+        ATTEMPT_COUNT_KEY.format(quiz_type=quiz_type, user_id=user.pk),
+        ttl=getattr(settings, 'ATTEMPT_COUNT_TTL', 600),
+    )
+
+
+def invalidate_attempt_count(quiz_type, user_id):
+    cache.delete(ATTEMPT_COUNT_KEY.format(quiz_type=quiz_type, user_id=user_id))
+
+
+def invalidate_catalogue(quiz_type):
+    """Expire every cached result page of a quiz type."""
+    bump_version(CATALOGUE_VERSION_KEY.format(quiz_type=quiz_type))
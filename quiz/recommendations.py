@@ -0,0 +1,122 @@
+# quiz/recommendations.py
+"""
+Recommended-book sampling without ``ORDER BY RANDOM()``.
+
+Each worker keeps the (small) book catalogue in memory, reloading it when
+the TTL runs out or when ``invalidate_books`` bumps the shared version
+(read at most every ``CACHE_VERSION_CHECK_INTERVAL`` seconds), and draws
+k distinct books by index rejection, which is O(k) for uniform draws and
+O(k log n) for weighted ones.
+"""
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+
+from django.conf import settings
+
+from .cache_versions import bump_version, get_version
+from .models import RecommendedBook
+
+VERSION_KEY = 'recommended_books_version'
+# Cumulative weight tables kept per catalogue load
+MAX_WEIGHT_TABLES = 8
+
+
+class BookSampler:
+    def __init__(self, ttl=900):
+        self.ttl = ttl
+        self._books = []
+        self._cumulative = OrderedDict()
+        self._version = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _catalogue(self):
+        version = get_version(VERSION_KEY)
+        with self._lock:
+            fresh = time.monotonic() - self._loaded_at <= self.ttl
+            if self._version == version and fresh:
+                return self._books
+        books = list(RecommendedBook.objects.only('id', 'title', 'link').order_by('id'))
+        with self._lock:
+            self._books = books
+            self._cumulative = OrderedDict()
+            self._version = version
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        return books
+
+    def _cumulative_weights(self, books, weight, weight_key):
+        if weight_key is None:
+            return list(accumulate(max(float(weight(book)), 0.0) for book in books))
+        with self._lock:
+            table = self._cumulative.get(weight_key)
+            if table is not None:
+                self._cumulative.move_to_end(weight_key)
+                return table
+        table = list(accumulate(max(float(weight(book)), 0.0) for book in books))
+        with self._lock:
+            if self._books is books:
+                self._cumulative[weight_key] = table
+                while len(self._cumulative) > MAX_WEIGHT_TABLES:
+                    self._cumulative.popitem(last=False)
+        return table
+
+    def sample(self, k, weight=None, weight_key=None):
+        """Return up to ``k`` distinct books, optionally weighted.
+
+        ``weight`` is a callable returning a non-negative weight for a book.
+        Its table of cumulative weights is kept for the catalogue load under
+        ``weight_key``, a stable name for the weighting; without one it is
+        rebuilt on every call.
+        """
+        books = self._catalogue()
+        n = len(books)
+        if k >= n:
+            chosen = list(books)
+            random.shuffle(chosen)
+            return chosen
+
+        if weight is None:
+            draw = lambda: random.randrange(n)  # noqa: E731
+        else:
+            cumulative = self._cumulative_weights(books, weight, weight_key)
+            total = cumulative[-1] if cumulative else 0
+            if total <= 0:
+                draw = lambda: random.randrange(n)  # noqa: E731
+            else:
+                draw = lambda: min(bisect_right(cumulative, random.random() * total), n - 1)  # noqa: E731
+
+        picked = {}
+        attempts = 0
+        # Rejection stays cheap while k is small next to n; heavily skewed
+        # weights could stall it, so cap the attempts and top up in order.
+        while len(picked) < k and attempts < 8 * k:
+            picked.setdefault(draw(), None)
+            attempts += 1
+        if len(picked) < k:
+            for i in range(n):
+                picked.setdefault(i, None)
+                if len(picked) == k:
+                    break
+        return [books[i] for i in picked]
+
+    def stats(self):
+        return {'books': len(self._books), 'loads': self.loads, 'version': self._version}
+
+
+book_sampler = BookSampler(ttl=getattr(settings, 'RECOMMENDED_BOOKS_TTL', 900))
+
+
+def recommend_books(k, weight=None, weight_key=None):
+    """Pick ``k`` distinct recommended books without touching the database."""
+    return book_sampler.sample(k, weight=weight, weight_key=weight_key)
+
+
+def invalidate_books():
+    """Make every worker reload the catalogue on its next draw."""
+    bump_version(VERSION_KEY)
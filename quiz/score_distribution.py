@@ -0,0 +1,132 @@
+# quiz/score_distribution.py
+"""
+Per-quiz score histograms for percentile and rank lookups.
+
+Each quiz has a ``ScoreHistogram`` row that counts attempts per score
+bucket. Normal and advance quizzes score whole marks, one bucket per
+mark. Super quizzes use half-mark buckets, since a wrong answer costs
+half a mark. The attempt recorder adjusts the histogram in the same
+transaction as each batch of upserts: the replaced attempt's score is
+removed and the new score is added. A result page's standing is then a
+sum over the buckets, with no scan of the attempt tables.
+``rebuild_score_histograms`` recomputes the rows from the attempt tables.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import QuizAttempt, AdvanceQuizAttempt, SuperQuizAttempt, ScoreHistogram
+
+ATTEMPT_MODELS = {
+    'quiz': QuizAttempt,
+    'advance': AdvanceQuizAttempt,
+    'super': SuperQuizAttempt,
+}
+
+BUCKETS_PER_MARK = {
+    'quiz': 1,
+    'advance': 1,
+    'super': 2,
+}
+
+
+def bucket(quiz_type, score):
+    return round(score * BUCKETS_PER_MARK[quiz_type])
+
+
+def _merge(buckets, delta):
+    counts = Counter({int(key): count for key, count in buckets.items()})
+    counts.update(delta)
+    return {str(key): count for key, count in sorted(counts.items()) if count > 0}
+
+
+def lock_histograms(quiz_type, quiz_ids):
+    """Lock the histograms of ``quiz_ids`` until the end of the transaction, creating missing ones.
+
+    The attempt recorder takes these locks before reading the attempts a
+    batch replaces, so two flushes of the same quiz cannot both count the
+    same change.
+    """
+    ScoreHistogram.objects.bulk_create(
+        [ScoreHistogram(quiz_type=quiz_type, quiz_id=quiz_id) for quiz_id in sorted(quiz_ids)],
+        ignore_conflicts=True,
+    )
+    return list(
+        ScoreHistogram.objects.select_for_update()
+        .filter(quiz_type=quiz_type, quiz_id__in=quiz_ids).order_by('quiz_id')
+    )
+
+
+def apply_changes(quiz_type, changes):
+    """Apply ``(quiz_id, old_score, new_score)`` changes to the histograms.
+
+    ``old_score`` is None for a first attempt and ``new_score`` is None
+    for a deleted one.
+    """
+    deltas = {}
+    for quiz_id, old_score, new_score in changes:
+        delta = deltas.setdefault(quiz_id, Counter())
+        if old_score is not None:
+            delta[bucket(quiz_type, old_score)] -= 1
+        if new_score is not None:
+            delta[bucket(quiz_type, new_score)] += 1
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        histograms = lock_histograms(quiz_type, deltas)
+        for histogram in histograms:
+            histogram.buckets = _merge(histogram.buckets, deltas[histogram.quiz_id])
+            histogram.total = sum(histogram.buckets.values())
+            histogram.updated_at = timezone.now()
+        ScoreHistogram.objects.bulk_update(histograms, ['buckets', 'total', 'updated_at'])
+
+
+def standing(quiz_type, quiz_id, score, user=None):
+    """Rank and share of candidates beaten for ``score``.
+
+    ``score`` counts as one candidate. A signed-in ``user``'s stored
+    attempt, which ``score`` replaces, is left out of the histogram. Call
+    it before the new attempt is recorded, so the histogram cannot hold it
+    yet.
+    """
+    histogram = ScoreHistogram.objects.filter(quiz_type=quiz_type, quiz_id=quiz_id).only('buckets').first()
+    buckets = Counter({int(key): count for key, count in histogram.buckets.items()}) if histogram else Counter()
+    if user is not None and user.is_authenticated:
+        previous = (ATTEMPT_MODELS[quiz_type].objects.filter(user=user, quiz_id=quiz_id)
+                    .values_list('score', flat=True).first())
+        if previous is not None and buckets[bucket(quiz_type, previous)] > 0:
+            buckets[bucket(quiz_type, previous)] -= 1
+    target = bucket(quiz_type, score)
+    below = above = 0
+    for key, count in buckets.items():
+        if key < target:
+            below += count
+        elif key > target:
+            above += count
+    total = sum(buckets.values()) + 1
+    return {
+        'rank': above + 1,
+        'total': total,
+        'beaten_percent': round(below / total * 100),
+    }
+
+
+def rebuild(quiz_type):
+    """Recompute every histogram of a quiz type from its attempt table."""
+    rows = (ATTEMPT_MODELS[quiz_type].objects.order_by()
+            .values_list('quiz_id', 'score').annotate(attempts=Count('id')))
+    histograms = {}
+    for quiz_id, score, attempts in rows.iterator():
+        histograms.setdefault(quiz_id, Counter())[bucket(quiz_type, score)] += attempts
+
+    with transaction.atomic():
+        ScoreHistogram.objects.filter(quiz_type=quiz_type).exclude(quiz_id__in=histograms).delete()
+        ScoreHistogram.objects.bulk_create(
+            [ScoreHistogram(quiz_type=quiz_type, quiz_id=quiz_id, buckets=_merge({}, counts), total=sum(counts.values()))
+             for quiz_id, counts in histograms.items()],
+            update_conflicts=True, unique_fields=['quiz_type', 'quiz_id'], update_fields=['buckets', 'total', 'updated_at'],
+        )
+    return len(histograms)
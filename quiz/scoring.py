@@ -0,0 +1,199 @@
+# quiz/scoring.py
+"""
+Answer-key compilation and scoring shared by the submit views.
+
+A question set's answer-key projection is compiled once into an
+``AnswerKey``: per part, an array with the index of the correct option of
+every question plus a lookup from option key to index. A submission is
+then mapped to option indices and scored in one pass per part. The
+per-question review rows, which also need the prompts and explanations,
+are only built when the result template iterates over them.
+"""
+from array import array
+
+SKIPPED = -1
+INVALID = -2
+NO_CORRECT_OPTION = -3
+
+
+class MarkingScheme:
+    def __init__(self, correct, wrong=0, skipped=0):
+        self.correct = correct
+        self.wrong = wrong
+        self.skipped = skipped
+
+    def marks(self, correct_count, wrong_count):
+        score = correct_count * self.correct
+        if wrong_count and self.wrong:
+            score += wrong_count * self.wrong
+        return score
+
+    @property
+    def max_per_question(self):
+        return self.correct
+
+
+STANDARD_MARKING = MarkingScheme(correct=1)
+SUPER_MARKING = MarkingScheme(correct=2, wrong=-0.5)
+
+MARKING_SCHEMES = {
+    'quiz': STANDARD_MARKING,
+    'advance': STANDARD_MARKING,
+    'super': SUPER_MARKING,
+}
+
+
+class PartKey:
+    """Compiled answer key for one part of a question set."""
+    __slots__ = ('entry', 'index', 'part_number', 'correct', 'option_index')
+
+    def __init__(self, entry, index, part_number, answers):
+        self.entry = entry
+        self.index = index
+        self.part_number = part_number
+        self.option_index = []
+        self.correct = array('b' if all(len(keys) < 127 for keys, _ in answers) else 'i')
+        for keys, answer in answers:
+            option_index = {key: i for i, key in enumerate(keys)}
+            self.option_index.append(option_index)
+            self.correct.append(option_index.get(answer, NO_CORRECT_OPTION))
+
+    def __len__(self):
+        return len(self.correct)
+
+    def answer_field(self, i):
+        """Name of the submitted answer field for question ``i``."""
+        if self.part_number is None:
+            return str(i)
+        return f"{self.part_number}_{i}"
+
+    def responses(self, answers):
+        """Map submitted answers to option indices (or SKIPPED/INVALID)."""
+        responses = array('i')
+        for i, index in enumerate(self.option_index):
+            ans = answers.get(self.answer_field(i), '')
+            if not ans:
+                responses.append(SKIPPED)
+            else:
+                responses.append(index.get(ans, INVALID) if isinstance(ans, str) else INVALID)
+        return responses
+
+
+class AnswerKey:
+    def __init__(self, entry):
+        self.quiz_type = entry.quiz_type
+        self.quiz_id = entry.quiz_id
+        self.marking = MARKING_SCHEMES[entry.quiz_type]
+        answers = entry.projection('answers')
+        self.parts = [PartKey(entry, i, part_number, answers[i])
+                      for i, (part_number, _) in enumerate(entry.outline)]
+
+    def score(self, answers):
+        return Scorecard(self, answers)
+
+
+def get_answer_key(entry):
+    """Return the compiled answer key of a cached question set entry."""
+    if entry.answer_key is None:
+        entry.answer_key = AnswerKey(entry)
+    return entry.answer_key
+
+
+def score_submission(entry, answers):
+    """Score an ``answers`` dict against a ``QuestionSetEntry``."""
+    if not isinstance(answers, dict):
+        answers = {}
+    return get_answer_key(entry).score(answers)
+
+
+class PartScore:
+    __slots__ = ('key', 'answers', 'responses', 'correct_count', 'wrong_count',
+                 'skipped_count', 'score', 'max_marks')
+
+    def __init__(self, key, answers, marking):
+        self.key = key
+        self.answers = answers
+        self.responses = key.responses(answers)
+        self.correct_count = sum(1 for r, c in zip(self.responses, key.correct) if r == c)
+        self.skipped_count = self.responses.count(SKIPPED)
+        self.wrong_count = len(self.responses) - self.correct_count - self.skipped_count
+        self.score = marking.marks(self.correct_count, self.wrong_count)
+        self.max_marks = len(key) * marking.max_per_question
+
+    @property
+    def part_number(self):
+        return self.key.part_number
+
+    @property
+    def total(self):
+        return len(self.key)
+
+    @property
+    def percentage(self):
+        return (self.score / self.max_marks * 100) if self.max_marks > 0 else 0
+
+    @property
+    def results(self):
+        return LazyResults(self)
+
+
+class Scorecard:
+    """Outcome of one submission, aggregated over all parts."""
+
+    def __init__(self, answer_key, answers):
+        self.answer_key = answer_key
+        self.parts = [PartScore(part, answers, answer_key.marking) for part in answer_key.parts]
+
+    @property
+    def score(self):
+        return sum(part.score for part in self.parts)
+
+    @property
+    def correct_count(self):
+        return sum(part.correct_count for part in self.parts)
+
+    @property
+    def total(self):
+        return sum(part.total for part in self.parts)
+
+    @property
+    def max_marks(self):
+        return sum(part.max_marks for part in self.parts)
+
+    @property
+    def percentage(self):
+        return (self.score / self.max_marks * 100) if self.max_marks > 0 else 0
+
+    @property
+    def results(self):
+        """Review rows of a single-part quiz."""
+        return self.parts[0].results if self.parts else []
+
+
+class LazyResults:
+    """Review rows for one part, built only when iterated by a template."""
+
+    def __init__(self, part_score):
+        self.part_score = part_score
+
+    def __len__(self):
+        return self.part_score.total
+
+    def __bool__(self):
+        return self.part_score.total > 0
+
+    def __iter__(self):
+        part = self.part_score
+        key = part.key
+        prompts = key.entry.projection('prompts')[key.index]
+        answers = key.entry.projection('answers')[key.index]
+        explanations = key.entry.projection('explanations')[key.index]
+        for i, (q, (_, correct_answer), explanation) in enumerate(zip(prompts, answers, explanations)):
+            yield {
+                'question': q['question'],
+                'options': q['options'],
+                'your_answer': part.answers.get(key.answer_field(i), ''),
+                'correct_answer': correct_answer,
+                'is_correct': part.responses[i] == key.correct[i],
+                'explanation': explanation,
+            }
@@ -0,0 +1,145 @@
+# quiz/search.py
+"""
+Ranked quiz search.
+
+On PostgreSQL quizzes are matched with a prefix full-text query over the
+quiz name and exam tags plus trigram similarity on the name, both backed
+by the GIN indexes created in migration 0008. Other databases (SQLite in
+development and tests) use a small in-memory inverted index per quiz type
+that supports the same prefix matching and ranking.
+"""
+import re
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramSimilarity
+from django.db import connections
+from django.db.models import BooleanField, Case, F, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+
+from .cache_versions import bump_version, get_version
+from .models import Quiz, AdvanceQuiz, SuperQuiz
+
+# Must stay identical to the expression indexed in migration 0008.
+DOCUMENT_SQL = "to_tsvector('simple', coalesce(quiz_name, '') || ' ' || coalesce(exam_tags::text, ''))"
+
+TRIGRAM_MATCH_SQL = "quiz_name %% %s"
+
+QUIZ_MODELS = {
+    'quiz': Quiz,
+    'advance': AdvanceQuiz,
+    'super': SuperQuiz,
+}
+
+VERSION_KEY = 'search_index_version:{quiz_type}'
+
+# Name matches count for more than tag matches when ranking.
+NAME_WEIGHT = 2
+TAG_WEIGHT = 1
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def apply_search(queryset, query, quiz_type):
+    """Filter ``queryset`` to quizzes matching ``query``, best matches first."""
+    terms = tokenize(query)
+    if not terms:
+        # Nothing searchable (e.g. only punctuation): list as if there were no query
+        return queryset.order_by('-quiz_id')
+    if connections[queryset.db].vendor == 'postgresql':
+        return _postgres_search(queryset, query, terms)
+    return _memory_search(queryset, terms, quiz_type)
+
+
+def _postgres_search(queryset, query, terms):
+    ts_query = SearchQuery(' & '.join(f"{term}:*" for term in terms), config='simple', search_type='raw')
+    queryset = queryset.annotate(document=RawSQL(DOCUMENT_SQL, [], output_field=SearchVectorField()))
+    rank = SearchRank(F('document'), ts_query)
+    match = Q(document=ts_query)
+    if getattr(settings, 'QUIZ_SEARCH_TRIGRAM', True):
+        # Trigram matching catches typos; it needs the pg_trgm extension.
+        match |= Q(RawSQL(TRIGRAM_MATCH_SQL, [query], output_field=BooleanField()))
+        rank = rank + TrigramSimilarity('quiz_name', query)
+    return queryset.filter(match).annotate(rank=rank).order_by('-rank', '-quiz_id')
+
+
+def _memory_search(queryset, terms, quiz_type):
+    ranked_ids = memory_index(quiz_type).search(terms)
+    if not ranked_ids:
+        return queryset.none()
+    ordering = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ranked_ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ranked_ids).order_by(ordering)
+
+
+class InvertedIndex:
+    """Token -> {quiz_id: weight} postings with prefix lookup."""
+
+    def __init__(self, rows):
+        self.postings = {}
+        for quiz_id, quiz_name, exam_tags in rows:
+            for token in tokenize(quiz_name):
+                self._add(token, quiz_id, NAME_WEIGHT)
+            for tag in exam_tags or ():
+                for token in tokenize(tag):
+                    self._add(token, quiz_id, TAG_WEIGHT)
+        self.vocabulary = sorted(self.postings)
+
+    def _add(self, token, quiz_id, weight):
+        docs = self.postings.setdefault(token, {})
+        docs[quiz_id] = docs.get(quiz_id, 0) + weight
+
+    def _prefix_matches(self, term):
+        scores = {}
+        i = bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            token = self.vocabulary[i]
+            # Exact token matches outrank matches on a longer word.
+            boost = 2 if token == term else 1
+            for quiz_id, weight in self.postings[token].items():
+                scores[quiz_id] = scores.get(quiz_id, 0) + weight * boost
+            i += 1
+        return scores
+
+    def search(self, terms):
+        """Quiz IDs matching every term as a prefix, best first."""
+        totals = None
+        for term in terms:
+            scores = self._prefix_matches(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {quiz_id: totals[quiz_id] + score
+                          for quiz_id, score in scores.items() if quiz_id in totals}
+            if not totals:
+                return []
+        return sorted(totals, key=lambda quiz_id: (-totals[quiz_id], -quiz_id))
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def memory_index(quiz_type):
+    """Return this worker's inverted index for a quiz type, rebuilding if stale."""
+    version = get_version(VERSION_KEY.format(quiz_type=quiz_type))
+    with _lock:
+        cached = _indexes.get(quiz_type)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    rows = QUIZ_MODELS[quiz_type].objects.order_by().values_list('quiz_id', 'quiz_name', 'exam_tags')
+    index = InvertedIndex(rows.iterator(chunk_size=2000))
+    with _lock:
+        _indexes[quiz_type] = (version, index)
+    return index
+
+
+def invalidate_memory_index(quiz_type):
+    bump_version(VERSION_KEY.format(quiz_type=quiz_type))
@@ -0,0 +1,136 @@
+# quiz/signals.py
+from django.db.models import Count
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import QuestionSet, AdvanceQuestionSet, SuperQuestionSet, RecommendedBook
+from .models import Quiz, AdvanceQuiz, SuperQuiz, BlogPost
+from .models import QuizAttempt, AdvanceQuizAttempt, SuperQuizAttempt
+from .home_feed import invalidate_pool
+from . import question_stats, question_store, score_distribution, tag_index, tag_performance
+from .search import invalidate_memory_index
+from .quiz_queries import invalidate_attempt_count, invalidate_catalogue
+from .attempted_sets import invalidate_attempted, record_attempt
+from .question_cache import invalidate_question_set
+from .recommendations import invalidate_books
+from .blog_render import refresh_rendered
+from .solutions import invalidate_solutions
+
+HOME_SECTIONS = {
+    Quiz: 'quizzes',
+    AdvanceQuiz: 'advance_quizzes',
+    SuperQuiz: 'super_quizzes',
+    BlogPost: 'blog_posts',
+}
+
+QUIZ_TYPES = {
+    Quiz: 'quiz',
+    AdvanceQuiz: 'advance',
+    SuperQuiz: 'super',
+}
+
+ATTEMPT_TYPES = {
+    QuizAttempt: 'quiz',
+    AdvanceQuizAttempt: 'advance',
+    SuperQuizAttempt: 'super',
+}
+
+QUESTION_SET_TYPES = {
+    QuestionSet: 'quiz',
+    AdvanceQuestionSet: 'advance',
+    SuperQuestionSet: 'super',
+}
+
+
+@receiver([post_save, post_delete], sender=QuestionSet)
+@receiver([post_save, post_delete], sender=AdvanceQuestionSet)
+@receiver([post_save, post_delete], sender=SuperQuestionSet)
+def question_set_changed(sender, instance, **kwargs):
+    """Re-project a question set and drop cached copies of it when it is edited."""
+    quiz_type = QUESTION_SET_TYPES[sender]
+    question_store.refresh(quiz_type, instance.quiz_id)
+    invalidate_question_set(quiz_type, instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=RecommendedBook)
+def recommended_book_changed(sender, instance, **kwargs):
+    invalidate_books()
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+@receiver([post_save, post_delete], sender=AdvanceQuiz)
+@receiver([post_save, post_delete], sender=SuperQuiz)
+@receiver([post_save, post_delete], sender=BlogPost)
+def home_section_changed(sender, instance, created=False, **kwargs):
+    """Rebuild the home page pool when rows are added or removed."""
+    if created or kwargs['signal'] is post_delete:
+        invalidate_pool(HOME_SECTIONS[sender])
+
+
+@receiver(pre_save, sender=BlogPost)
+def blog_post_rendering(sender, instance, **kwargs):
+    """Store the post's HTML whenever its Markdown changes."""
+    refresh_rendered(instance)
+
+
+@receiver(m2m_changed, sender=BlogPost.likes.through)
+def blog_likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recount likes changed through the relation (e.g. in the admin).
+
+    like_blog_post writes the through table directly and maintains the
+    counter itself, so it does not pass through here.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        post_ids = [instance.pk]
+    elif pk_set:
+        post_ids = pk_set
+    else:
+        # A user's likes were cleared; recount every affected post
+        post_ids = BlogPost.objects.filter(likes_count__gt=0).values_list('pk', flat=True)
+    for post in BlogPost.objects.filter(pk__in=list(post_ids)).annotate(actual=Count('likes')).only('pk'):
+        BlogPost.objects.filter(pk=post.pk).update(likes_count=post.actual)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+@receiver([post_save, post_delete], sender=AdvanceQuiz)
+@receiver([post_save, post_delete], sender=SuperQuiz)
+def quiz_changed(sender, instance, **kwargs):
+    """Refresh the derived quiz indexes and cached pages after a quiz row changes."""
+    retagged = tag_index.update_quiz(
+        QUIZ_TYPES[sender], instance.quiz_id, instance.exam_tags,
+        deleted=kwargs['signal'] is post_delete,
+    )
+    if retagged is None or retagged:
+        # Without the old tags to compare, recompute all of the users' tags
+        tag_performance.quiz_retagged(QUIZ_TYPES[sender], instance.quiz_id, retagged)
+    invalidate_memory_index(QUIZ_TYPES[sender])
+    invalidate_catalogue(QUIZ_TYPES[sender])
+    invalidate_solutions(QUIZ_TYPES[sender], instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=QuizAttempt)
+@receiver([post_save, post_delete], sender=AdvanceQuizAttempt)
+@receiver([post_save, post_delete], sender=SuperQuizAttempt)
+def attempt_changed(sender, instance, created=False, **kwargs):
+    """Keep the attempted sets, profile totals and score/question/tag rollups current.
+
+    Attempts from the submit views are bulk-written by quiz.attempt_recorder,
+    which does this itself; this covers saves elsewhere (e.g. the admin).
+    """
+    quiz_type = ATTEMPT_TYPES[sender]
+    if created:
+        record_attempt(quiz_type, instance.user_id, instance.quiz_id)
+        invalidate_attempt_count(quiz_type, instance.user_id)
+        score_distribution.apply_changes(quiz_type, [(instance.quiz_id, None, instance.score)])
+        tag_performance.apply_changes(quiz_type, [(instance.user_id, instance.quiz_id, None, instance.percentage)])
+        if quiz_type in question_stats.ATTEMPT_MODELS:
+            question_stats.apply_changes(quiz_type, [(instance.quiz_id, None, instance.answers)])
+    elif kwargs['signal'] is post_delete:
+        invalidate_attempted(quiz_type, instance.user_id)
+        invalidate_attempt_count(quiz_type, instance.user_id)
+        score_distribution.apply_changes(quiz_type, [(instance.quiz_id, instance.score, None)])
+        tag_performance.apply_changes(quiz_type, [(instance.user_id, instance.quiz_id, instance.percentage, None)])
+        if quiz_type in question_stats.ATTEMPT_MODELS:
+            question_stats.apply_changes(quiz_type, [(instance.quiz_id, instance.answers, None)])
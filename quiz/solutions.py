@@ -0,0 +1,84 @@
+# quiz/solutions.py
+"""
+Cached solutions pages.
+
+The body of a solutions page is identical for every visitor, so it is
+rendered once per quiz version and kept in the template fragment cache.
+The version combines the question set version (bumped when questions are
+edited), a per-quiz version bumped when the quiz row is saved, and the
+``SOLUTIONS_CACHE_REVISION`` setting for template changes, plus a period
+counter so the per-question answer statistics are refreshed every
+``SOLUTIONS_STATS_REFRESH`` seconds. The same
+version forms the page's ETag, so a browser or crawler that already has
+the page gets a 304 without any database work. Book recommendations,
+the only part that differs between visits, are fetched by the page as a
+separate fragment.
+"""
+import time
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .cache_versions import bump_version, get_version
+from .question_cache import _current_version
+
+QUIZ_VERSION_KEY = 'solutions_version:{quiz_type}:{quiz_id}'
+
+
+def solutions_version(quiz_type, quiz_id):
+    quiz_version = get_version(QUIZ_VERSION_KEY.format(quiz_type=quiz_type, quiz_id=quiz_id))
+    revision = getattr(settings, 'SOLUTIONS_CACHE_REVISION', 1)
+    # Answer statistics on the page are refreshed once per period
+    stats_period = int(time.time() // getattr(settings, 'SOLUTIONS_STATS_REFRESH', 3600))
+    return f'{_current_version(quiz_type, quiz_id)}.{quiz_version}.{revision}.{stats_period}'
+
+
+def invalidate_solutions(quiz_type, quiz_id):
+    bump_version(QUIZ_VERSION_KEY.format(quiz_type=quiz_type, quiz_id=quiz_id))
+
+
+def solutions_etag(quiz_type):
+    """ETag function for ``condition()``; the navbar makes pages per user."""
+    def etag(request, quiz_id):
+        user = request.user.pk if request.user.is_authenticated else 'anon'
+        return f'{quiz_type}-{quiz_id}-{solutions_version(quiz_type, quiz_id)}-{user}'
+    return etag
+
+
+def solutions_context(quiz_type, quiz, **rows):
+    """Template context for a solutions page.
+
+    ``rows`` map context names to functions building them; they only run
+    if the template has to re-render the cached body.
+    """
+    context = {
+        'quiz': quiz,
+        'solutions_key': f'{quiz_type}:{quiz.quiz_id}:{solutions_version(quiz_type, quiz.quiz_id)}',
+        'solutions_cache_ttl': getattr(settings, 'SOLUTIONS_CACHE_TTL', 86400),
+    }
+    for name, build in rows.items():
+        context[name] = SimpleLazyObject(build)
+    return context
+
+
+def _row_stats(stats, answer):
+    """Add the most picked wrong option to a question's display stats."""
+    if stats is None:
+        return None
+    wrong = [(count, key) for key, count in stats['options'].items() if key != answer]
+    if wrong:
+        count, key = max(wrong)
+        stats = {**stats, 'top_wrong': key, 'top_wrong_percent': round(count / stats['attempts'] * 100)}
+    return stats
+
+
+def solution_rows(questions, stats=None):
+    """Rows for a solutions template; ``stats`` are from quiz.question_stats."""
+    stats = stats or {}
+    return [{
+        'question': q['question'],
+        'options': q['options'],
+        'correct_answer': q['answer'],
+        'explanation': q.get('explanation', ''),
+        'stats': _row_stats(stats.get(i), q['answer']),
+    } for i, q in enumerate(questions)]
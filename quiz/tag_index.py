@@ -0,0 +1,151 @@
+# quiz/tag_index.py
+"""
+Materialized exam-tag index.
+
+For every quiz type each worker keeps which quiz IDs carry each tag, the
+tags of every quiz (so a changed quiz can be re-indexed on its own) and a
+precomputed, sorted list of ``(tag, count)`` facets for the search page.
+The index is built from ``exam_tags`` and patched by the quiz save/delete
+signals. A change bumps a shared version so other workers rebuild within
+``CACHE_VERSION_CHECK_INTERVAL`` seconds, and every copy is rebuilt after
+``TAG_INDEX_TTL`` seconds in case quizzes were edited outside the app.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .cache_versions import bump_version, get_version
+from .models import Quiz, AdvanceQuiz, SuperQuiz
+
+VERSION_KEY = 'tag_index_version:{quiz_type}'
+
+QUIZ_MODELS = {
+    'quiz': Quiz,
+    'advance': AdvanceQuiz,
+    'super': SuperQuiz,
+}
+
+
+class LoadedIndex:
+    """One worker's copy of the index of a quiz type."""
+    __slots__ = ('version', 'loaded_at', 'index', 'facets')
+
+    def __init__(self, version, loaded_at, index):
+        self.version = version
+        self.loaded_at = loaded_at
+        self.index = index
+        self.facets = _facets(index['tags'])
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, 'TAG_INDEX_TTL', 3600)
+
+
+def _version(quiz_type):
+    return get_version(VERSION_KEY.format(quiz_type=quiz_type))
+
+
+def _clean_tags(tags):
+    if not tags:
+        return ()
+    return tuple(sorted({str(tag).strip() for tag in tags if str(tag).strip()}))
+
+
+def _facets(tag_ids):
+    return [(tag, len(ids)) for tag, ids in sorted(tag_ids.items())]
+
+
+def build_index(quiz_type):
+    """Build the index for one quiz type from the quiz table."""
+    by_quiz = {}
+    tag_ids = {}
+    rows = QUIZ_MODELS[quiz_type].objects.order_by().values_list('quiz_id', 'exam_tags')
+    for quiz_id, tags in rows.iterator(chunk_size=2000):
+        tags = _clean_tags(tags)
+        by_quiz[quiz_id] = tags
+        for tag in tags:
+            tag_ids.setdefault(tag, set()).add(quiz_id)
+    return {'by_quiz': by_quiz, 'tags': tag_ids}
+
+
+def _current(quiz_type, version):
+    """This worker's copy if it is at ``version`` and within the TTL."""
+    loaded = _indexes.get(quiz_type)
+    if loaded is not None and loaded.version == version and time.monotonic() - loaded.loaded_at <= _ttl():
+        return loaded
+    return None
+
+
+def _loaded(quiz_type):
+    version = _version(quiz_type)
+    with _lock:
+        loaded = _current(quiz_type, version)
+        if loaded is not None:
+            return loaded
+    loaded = LoadedIndex(version, time.monotonic(), build_index(quiz_type))
+    with _lock:
+        _indexes[quiz_type] = loaded
+    return loaded
+
+
+def get_index(quiz_type):
+    return _loaded(quiz_type).index
+
+
+def tag_facets(quiz_type):
+    """Sorted ``(tag, quiz count)`` pairs for a quiz type."""
+    return _loaded(quiz_type).facets
+
+
+def tag_counts(tag):
+    """Number of quizzes of every type carrying ``tag``."""
+    return {quiz_type: len(get_index(quiz_type)['tags'].get(tag, ()))
+            for quiz_type in QUIZ_MODELS}
+
+
+def tag_quiz_ids(quiz_type, tag):
+    """IDs of the quizzes of a type carrying ``tag``."""
+    return get_index(quiz_type)['tags'].get(tag.strip(), set())
+
+
+def _bump(quiz_type):
+    return bump_version(VERSION_KEY.format(quiz_type=quiz_type))
+
+
+def update_quiz(quiz_type, quiz_id, tags=None, deleted=False):
+    """Re-index a single quiz after it was saved or deleted.
+
+    Returns the tags added to or removed from the quiz, or None when this
+    worker had no current index to compare against.
+    """
+    version = _version(quiz_type)
+    with _lock:
+        loaded = _current(quiz_type, version)
+        _indexes.pop(quiz_type, None)
+        new_version = _bump(quiz_type)
+        if loaded is None:
+            return None
+
+        # Patch a copy: readers may be iterating the old sets
+        index = {'by_quiz': dict(loaded.index['by_quiz']), 'tags': dict(loaded.index['tags'])}
+        old_tags = index['by_quiz'].pop(quiz_id, ())
+        new_tags = () if deleted else _clean_tags(tags)
+        for tag in old_tags:
+            ids = index['tags'].get(tag)
+            if ids is not None:
+                ids = index['tags'][tag] = ids - {quiz_id}
+                if not ids:
+                    del index['tags'][tag]
+        if not deleted:
+            index['by_quiz'][quiz_id] = new_tags
+            for tag in new_tags:
+                index['tags'][tag] = index['tags'].get(tag, set()) | {quiz_id}
+        if new_version == version + 1:
+            # No other change came in between, so the patched copy is current
+            _indexes[quiz_type] = LoadedIndex(new_version, loaded.loaded_at, index)
+        return set(old_tags) ^ set(new_tags)
@@ -0,0 +1,172 @@
+# quiz/tag_performance.py
+"""
+Per-user results by exam tag.
+
+A ``TagPerformance`` row holds one user's attempts, summed percentage
+and best percentage for each exam tag and quiz type. The profile page
+reads these rows for its "how am I doing on UPSC vs SSC" breakdown, with
+no join of attempts to quizzes and no decoding of ``exam_tags``. A quiz's
+tags come from the cached tag index (quiz/tag_index.py).
+
+The attempt recorder adjusts the rows in the same transaction as each
+batch of upserts. A replaced attempt is taken out and the new one added.
+Sums can be adjusted in place. A best percentage that is removed is
+re-read from the user's attempts on that tag. When a quiz is retagged, the
+rows of the users who attempted it are recomputed.
+``rebuild_tag_performance`` recomputes every row from the attempt tables.
+"""
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import tag_index
+from .models import QuizAttempt, AdvanceQuizAttempt, SuperQuizAttempt, TagPerformance
+
+ATTEMPT_MODELS = {
+    'quiz': QuizAttempt,
+    'advance': AdvanceQuizAttempt,
+    'super': SuperQuizAttempt,
+}
+
+QUIZ_TYPE_LABELS = {
+    'quiz': 'Quizzes',
+    'advance': 'Sectional Tests',
+    'super': 'Mock Tests',
+}
+
+
+class TagDelta:
+    """Change to one user's row for one tag, built up before it is written."""
+    __slots__ = ('attempts', 'total', 'best', 'removed_best')
+
+    def __init__(self):
+        self.attempts = 0
+        self.total = 0.0
+        # Mock test percentages go below zero with negative marking
+        self.best = None
+        # Highest percentage taken out, which may have been the row's best
+        self.removed_best = None
+
+    def add(self, percentage):
+        self.attempts += 1
+        self.total += percentage
+        self.best = percentage if self.best is None else max(self.best, percentage)
+
+    def remove(self, percentage):
+        self.attempts -= 1
+        self.total -= percentage
+        self.removed_best = percentage if self.removed_best is None else max(self.removed_best, percentage)
+
+
+def _best_on_tag(quiz_type, user_id, tag):
+    quiz_ids = tag_index.tag_quiz_ids(quiz_type, tag)
+    best = ATTEMPT_MODELS[quiz_type].objects.filter(user_id=user_id, quiz_id__in=quiz_ids).aggregate(best=Max('percentage'))
+    return best['best'] if best['best'] is not None else 0
+
+
+def apply_changes(quiz_type, changes):
+    """Apply ``(user_id, quiz_id, old_percentage, new_percentage)`` changes.
+
+    ``old_percentage`` is None for a first attempt and ``new_percentage``
+    is None for a deleted one. The attempt table must already hold the new
+    state, since a removed best percentage is re-read from it.
+    """
+    tags_of = tag_index.get_index(quiz_type)['by_quiz']
+    deltas = {}
+    for user_id, quiz_id, old_percentage, new_percentage in changes:
+        for tag in tags_of.get(quiz_id, ()):
+            delta = deltas.setdefault((user_id, tag), TagDelta())
+            if old_percentage is not None:
+                delta.remove(old_percentage)
+            if new_percentage is not None:
+                delta.add(new_percentage)
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        TagPerformance.objects.bulk_create(
+            [TagPerformance(user_id=user_id, quiz_type=quiz_type, exam_tag=tag) for user_id, tag in sorted(deltas)],
+            ignore_conflicts=True,
+        )
+        rows = list(TagPerformance.objects.select_for_update().filter(
+            quiz_type=quiz_type,
+            user_id__in={user_id for user_id, _ in deltas},
+            exam_tag__in={tag for _, tag in deltas},
+        ).order_by('user_id', 'exam_tag'))
+        changed, emptied = [], []
+        for row in rows:
+            delta = deltas.get((row.user_id, row.exam_tag))
+            if delta is None:
+                continue
+            had_attempts = row.attempts > 0
+            row.attempts += delta.attempts
+            row.total_percentage += delta.total
+            if row.attempts <= 0:
+                emptied.append(row.pk)
+                continue
+            if delta.removed_best is not None and delta.removed_best >= row.best_percentage:
+                row.best_percentage = _best_on_tag(quiz_type, row.user_id, row.exam_tag)
+            elif not had_attempts:
+                row.best_percentage = delta.best
+            elif delta.best is not None:
+                row.best_percentage = max(row.best_percentage, delta.best)
+            row.updated_at = timezone.now()
+            changed.append(row)
+        TagPerformance.objects.bulk_update(changed, ['attempts', 'total_percentage', 'best_percentage', 'updated_at'])
+        TagPerformance.objects.filter(pk__in=emptied).delete()
+
+
+def rebuild(quiz_type, tags=None, user_ids=None, batch_size=2000):
+    """Recompute the rows of a quiz type, optionally only some tags and users.
+
+    Returns the number of rows written.
+    """
+    index = tag_index.get_index(quiz_type)
+    attempts = ATTEMPT_MODELS[quiz_type].objects.order_by()
+    rows = TagPerformance.objects.filter(quiz_type=quiz_type)
+    if tags is not None:
+        tags = set(tags)
+        attempts = attempts.filter(quiz_id__in=set().union(*(index['tags'].get(tag, ()) for tag in tags)))
+        rows = rows.filter(exam_tag__in=tags)
+    if user_ids is not None:
+        attempts = attempts.filter(user_id__in=user_ids)
+        rows = rows.filter(user_id__in=user_ids)
+
+    totals = {}
+    for user_id, quiz_id, percentage in attempts.values_list('user_id', 'quiz_id', 'percentage').iterator(chunk_size=batch_size):
+        for tag in index['by_quiz'].get(quiz_id, ()):
+            if tags is None or tag in tags:
+                totals.setdefault((user_id, tag), TagDelta()).add(percentage)
+
+    with transaction.atomic():
+        rows.delete()
+        TagPerformance.objects.bulk_create([
+            TagPerformance(
+                user_id=user_id, quiz_type=quiz_type, exam_tag=tag,
+                attempts=delta.attempts, total_percentage=delta.total, best_percentage=delta.best,
+            ) for (user_id, tag), delta in sorted(totals.items())
+        ], batch_size=batch_size)
+    return len(totals)
+
+
+def quiz_retagged(quiz_type, quiz_id, tags):
+    """Recompute ``tags`` (all when None) for the users who attempted a retagged quiz."""
+    user_ids = list(ATTEMPT_MODELS[quiz_type].objects.filter(quiz_id=quiz_id).values_list('user_id', flat=True))
+    if user_ids:
+        rebuild(quiz_type, tags=tags, user_ids=user_ids)
+
+
+def tag_summary(user):
+    """The user's rows for the profile page, grouped by exam tag."""
+    order = list(QUIZ_TYPE_LABELS)
+    rows = sorted(
+        TagPerformance.objects.filter(user=user),
+        key=lambda row: (row.exam_tag.lower(), order.index(row.quiz_type)),
+    )
+    return [{
+        'exam_tag': row.exam_tag,
+        'quiz_type': QUIZ_TYPE_LABELS[row.quiz_type],
+        'attempts': row.attempts,
+        'average_percentage': row.average_percentage,
+        'best_percentage': row.best_percentage,
+    } for row in rows]
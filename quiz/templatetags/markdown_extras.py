@@ -1,8 +1,9 @@
-import markdown
 from django import template
 
+from quiz.blog_render import render_markdown
+
 register = template.Library()
 
 @register.filter
 def markdownify(text):
-    return markdown.markdown(text, extensions=['fenced_code', 'codehilite', 'toc'])
+    return render_markdown(text)
@@ -1,3 +1,1137 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+from pathlib import Path
+from urllib.parse import parse_qs
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import (
+    attempt_recorder, db_routing, question_stats, recommendations, score_distribution, search, tag_index,
+    tag_performance, views,
+)
+from .attempt_timeline import timeline_page
+from .cache_versions import bump_version, forget_versions, get_version
+from .checks import answer_draft_cache_check, shared_cache_check
+from .db_routing import PIN_COOKIE, REPLICA, ReplicaRouter, replica_reads, request_routing
+from .middleware import ReplicaPinMiddleware
+from .notifications import MAX_MESSAGE_LENGTH, DeliveryError, TelegramTransport, deliver_due, enqueue
+from .pagination import decode_cursor, encode_cursor, keyset_paginate, next_page_url
+from .models import (
+    AdvanceQuiz, AdvanceQuizAttempt, BlogPost, IssueReport, Quiz, QuestionProjection, QuestionSet, QuestionStat, QuizAttempt, RecommendedBook, ScoreHistogram,
+    SuperQuiz, SuperQuestionSet, SuperQuizAttempt, TagPerformance,
+)
+from .question_cache import _load_outline, get_question_set, question_cache
+from .recommendations import MAX_WEIGHT_TABLES, BookSampler
+from .scoring import score_submission
+from .search import InvertedIndex, memory_index
+from .solutions import solution_rows, solutions_context
+
+
+def make_quiz(quiz_id, name='Quiz', tags=('UPSC',), requires_signup=False):
+    return Quiz.objects.create(
+        quiz_id=quiz_id, quiz_name=name, exam_tags=list(tags), requires_signup=requires_signup, question_count=3,
+    )
+
+
+def make_questions(answers):
+    """One question per entry of ``answers``, each with options A-D."""
+    return [
+        {'question': f'Q{i + 1}', 'options': {key: f'Option {key}' for key in 'ABCD'},
+         'answer': answer, 'explanation': f'Because {answer}'}
+        for i, answer in enumerate(answers)
+    ]
+
+
+class QuizTestCase(TestCase):
+    """Drops the per-worker caches, whose shared versions roll back with each test.
+
+    Reads go to the primary, since rows created by a test never reach the
+    replica's test database.
+    """
+
+    def setUp(self):
+        self.reset_worker_caches()
+        self.addCleanup(self.reset_worker_caches)
+        patcher = mock.patch.object(db_routing, 'replica_configured', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def reset_worker_caches(self):
+        question_cache.clear()
+        tag_index._indexes.clear()
+        search._indexes.clear()
+        forget_versions()
+
+
+class ScoringTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+
+    def test_counts_correct_wrong_and_skipped(self):
+        card = score_submission(get_question_set('quiz', 1), {'0': 'A', '1': 'C'})
+        part = card.parts[0]
+        self.assertEqual((part.correct_count, part.wrong_count, part.skipped_count), (1, 1, 1))
+        self.assertEqual(card.score, 1)
+        self.assertEqual(card.max_marks, 3)
+        self.assertAlmostEqual(card.percentage, 100 / 3)
+
+    def test_unknown_option_is_wrong(self):
+        card = score_submission(get_question_set('quiz', 1), {'0': 'Z', '1': ['B'], '2': 'C'})
+        self.assertEqual((card.parts[0].correct_count, card.parts[0].wrong_count), (1, 2))
+
+    def test_malformed_submission_is_all_skipped(self):
+        card = score_submission(get_question_set('quiz', 1), ['A', 'B', 'C'])
+        self.assertEqual(card.parts[0].skipped_count, 3)
+        self.assertEqual(card.score, 0)
+
+    def test_review_rows(self):
+        rows = list(score_submission(get_question_set('quiz', 1), {'0': 'A', '1': 'C'}).results)
+        self.assertEqual([row['is_correct'] for row in rows], [True, False, False])
+        self.assertEqual(rows[1]['your_answer'], 'C')
+        self.assertEqual(rows[1]['correct_answer'], 'B')
+        self.assertEqual(rows[1]['explanation'], 'Because B')
+
+    def test_edited_question_set_is_rescored(self):
+        score_submission(get_question_set('quiz', 1), {})
+        question_set = QuestionSet.objects.get(quiz_id=1)
+        question_set.questions = make_questions('DDD')
+        question_set.save()
+        self.assertEqual(score_submission(get_question_set('quiz', 1), {'0': 'D'}).score, 1)
+
+    def test_super_quiz_parts_and_negative_marking(self):
+        SuperQuiz.objects.create(quiz_id=1, quiz_name='Super', exam_tags=['UPSC'], requires_signup=False)
+        SuperQuestionSet.objects.create(quiz_id=1, part_number=1, questions=make_questions('AB'))
+        SuperQuestionSet.objects.create(quiz_id=1, part_number=2, questions=make_questions('CD'))
+        card = score_submission(get_question_set('super', 1), {'1_0': 'A', '1_1': 'A', '2_1': 'D'})
+        self.assertEqual([part.part_number for part in card.parts], [1, 2])
+        # Two right at 2 marks, one wrong at -0.5, one skipped
+        self.assertEqual(card.score, 3.5)
+        self.assertEqual(card.max_marks, 8)
+        self.assertEqual(card.parts[0].score, 1.5)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        patcher = mock.patch.object(db_routing, 'replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_db(self, request, model=Quiz):
+        """The database a read of ``model`` uses inside a ``replica_reads`` view."""
+        @replica_reads
+        def view(request):
+            return HttpResponse(self.router.db_for_read(model))
+        with request_routing():
+            return view(request).content.decode()
+
+    def test_get_reads_quiz_tables_from_replica(self):
+        self.assertEqual(self.read_db(self.factory.get('/')), REPLICA)
+
+    def test_other_apps_read_from_primary(self):
+        self.assertEqual(self.read_db(self.factory.get('/'), User), 'default')
+
+    def test_post_reads_from_primary(self):
+        self.assertEqual(self.read_db(self.factory.post('/')), 'default')
+
+    def test_pinned_browser_reads_from_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_db(request), 'default')
+
+    def test_writes_outside_the_quiz_app_keep_the_replica(self):
+        @replica_reads
+        def view(request):
+            self.assertEqual(self.router.db_for_write(User), 'default')
+            return HttpResponse(self.router.db_for_read(Quiz))
+
+        with request_routing() as state:
+            response = view(self.factory.get('/'))
+        self.assertEqual(response.content.decode(), REPLICA)
+        self.assertFalse(state.wrote)
+
+    def test_reads_outside_a_request_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Quiz), 'default')
+
+    def test_write_moves_the_rest_of_the_request_to_primary(self):
+        @replica_reads
+        def view(request):
+            before = self.router.db_for_read(Quiz)
+            self.assertEqual(self.router.db_for_write(Quiz), 'default')
+            return HttpResponse(f'{before} {self.router.db_for_read(Quiz)}')
+
+        with request_routing() as state:
+            response = view(self.factory.get('/'))
+        self.assertEqual(response.content.decode(), f'{REPLICA} default')
+        self.assertTrue(state.wrote)
+
+    def test_everything_uses_primary_without_a_replica(self):
+        with mock.patch.object(db_routing, 'replica_configured', return_value=False):
+            self.assertEqual(self.read_db(self.factory.get('/')), 'default')
+
+
+class ReplicaPinMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        patcher = mock.patch.object(db_routing, 'replica_configured', return_value=True)
+        self.configured = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond(self, request, view=lambda request: HttpResponse()):
+        return ReplicaPinMiddleware(view)(request)
+
+    def test_unsafe_request_pins_the_browser(self):
+        response = self.respond(self.factory.post('/'))
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertTrue(response.cookies[PIN_COOKIE]['httponly'])
+
+    def test_read_only_get_is_not_pinned(self):
+        self.assertNotIn(PIN_COOKIE, self.respond(self.factory.get('/')).cookies)
+
+    def test_get_that_writes_pins_the_browser(self):
+        def view(request):
+            ReplicaRouter().db_for_write(Quiz)
+            return HttpResponse()
+        self.assertIn(PIN_COOKIE, self.respond(self.factory.get('/'), view).cookies)
+
+    def test_no_pin_without_a_replica(self):
+        self.configured.return_value = False
+        self.assertNotIn(PIN_COOKIE, self.respond(self.factory.post('/')).cookies)
+
+
+class CacheWritePinTests(TestCase):
+    def test_cache_write_in_a_read_only_get_does_not_pin(self):
+        @replica_reads
+        def view(request):
+            cache.set('pin-probe', 1)
+            return HttpResponse(ReplicaRouter().db_for_read(Quiz))
+
+        with mock.patch.object(db_routing, 'replica_configured', return_value=True):
+            response = ReplicaPinMiddleware(view)(RequestFactory().get('/'))
+        # The rest of the request still reads the replica, and no cookie is set
+        self.assertEqual(response.content.decode(), REPLICA)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@skipUnless(REPLICA in settings.DATABASES, 'needs a replica database')
+class ReplicaReadTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        # Only on the primary, as if not yet replicated
+        make_quiz(1, 'Primary only')
+
+    def quiz_visible(self, request):
+        @replica_reads
+        def view(request):
+            return HttpResponse(str(Quiz.objects.filter(quiz_id=1).exists()))
+        with request_routing():
+            return view(request).content == b'True'
+
+    def test_get_reads_the_replica(self):
+        self.assertFalse(self.quiz_visible(self.factory.get('/')))
+
+    def test_pinned_get_reads_the_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertTrue(self.quiz_visible(request))
+
+    def test_post_reads_the_primary(self):
+        self.assertTrue(self.quiz_visible(self.factory.post('/')))
+
+
+class CacheVersionTests(QuizTestCase):
+    def test_version_is_reread_after_the_interval(self):
+        self.assertEqual(get_version('probe'), 0)
+        cache.set('probe', 4, None)  # bumped by another worker
+        with self.assertNumQueries(0):
+            self.assertEqual(get_version('probe'), 0)
+        with self.settings(CACHE_VERSION_CHECK_INTERVAL=0):
+            self.assertEqual(get_version('probe'), 4)
+
+    def test_own_bump_is_seen_at_once(self):
+        self.assertEqual(get_version('probe'), 0)
+        self.assertEqual(bump_version('probe'), 1)
+        self.assertEqual(bump_version('probe'), 2)
+        self.assertEqual(get_version('probe'), 2)
+        self.assertEqual(cache.get('probe'), 2)
+
+    def test_deploy_check_rejects_the_database_cache(self):
+        database = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with self.settings(CACHES=database):
+            self.assertEqual([error.id for error in shared_cache_check(None)], ['quiz.E002'])
+        with self.settings(CACHES=redis):
+            self.assertEqual(shared_cache_check(None), [])
+
+
+class BookSamplerTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(10):
+            RecommendedBook.objects.create(title=f'Book {i}', link=f'https://example.com/{i}')
+        self.sampler = BookSampler()
+
+    def test_samples_from_memory_after_the_first_load(self):
+        self.sampler.sample(3)
+        with self.assertNumQueries(0):
+            books = self.sampler.sample(3)
+        self.assertEqual(len({book.pk for book in books}), 3)
+        self.assertEqual(self.sampler.loads, 1)
+
+    def test_edit_reloads_the_catalogue(self):
+        self.sampler.sample(3)
+        RecommendedBook.objects.create(title='New', link='https://example.com/new')
+        self.assertEqual(len(self.sampler.sample(20)), 11)
+        self.assertEqual(self.sampler.loads, 2)
+
+    def test_weighted_draws_only_pick_weighted_books(self):
+        heavy = {book.pk for book in RecommendedBook.objects.order_by('id')[:2]}
+        books = self.sampler.sample(2, weight=lambda book: book.pk in heavy, weight_key='first-two')
+        self.assertEqual({book.pk for book in books}, heavy)
+
+    def test_weight_tables_are_kept_by_name_and_bounded(self):
+        self.sampler.sample(2, weight=lambda book: 1)
+        self.assertEqual(len(self.sampler._cumulative), 0)
+        for i in range(MAX_WEIGHT_TABLES + 3):
+            self.sampler.sample(2, weight=lambda book: 1, weight_key=f'weighting-{i}')
+        self.assertEqual(len(self.sampler._cumulative), MAX_WEIGHT_TABLES)
+        self.assertNotIn('weighting-0', self.sampler._cumulative)
+
+
+class AnswerDraftTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+
+    def test_autosaved_draft_is_a_cookie_by_default(self):
+        response = self.client.post('/quiz/1/draft/', {'answers': '{"0": "A"}'}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('draft_quiz_1', response.cookies)
+        page = self.client.get('/quiz/1/start/', secure=True)
+        self.assertEqual(page.context['draft_answers'], {'0': 'A'})
+
+    def test_oversized_draft_is_refused(self):
+        answers = json.dumps({str(i): 'A' * 30 for i in range(200)})
+        self.assertEqual(self.client.post('/quiz/1/draft/', {'answers': answers}, secure=True).status_code, 400)
+
+    def test_check_rejects_the_database_cache_for_drafts(self):
+        with self.settings(ANSWER_DRAFT_BACKEND='cache', ANSWER_DRAFT_CACHE='default'):
+            self.assertEqual([error.id for error in answer_draft_cache_check(None)], ['quiz.E003'])
+        with self.settings(ANSWER_DRAFT_BACKEND='cookie'):
+            self.assertEqual(answer_draft_cache_check(None), [])
+
+
+def attempt_record(user, quiz_id, score, answers=None, quiz_type='quiz'):
+    return {'quiz_type': quiz_type, 'user_id': user.pk, 'quiz_id': quiz_id, 'fields': {
+        'score': score, 'total_questions': 3, 'percentage': score / 3 * 100,
+        'answers': answers or {}, 'total_score': 3,
+    }}
+
+
+def histogram_buckets(quiz_id, quiz_type='quiz'):
+    return ScoreHistogram.objects.get(quiz_type=quiz_type, quiz_id=quiz_id).buckets
+
+
+class JournalMixin:
+    """A temporary journal directory and owner, and a recorder flushed by the test."""
+
+    def use_temporary_journal(self):
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        self.journal_dir = Path(journal_dir.name)
+        override = self.settings(ATTEMPT_JOURNAL_DIR=self.journal_dir, ATTEMPT_WRITE_BEHIND=True)
+        override.enable()
+        self.addCleanup(override.disable)
+        # A fresh journal owner per test, in the test's directory
+        patcher = mock.patch.object(attempt_recorder, '_owner', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.close_owner)
+
+        self.recorder = attempt_recorder.AttemptRecorder()
+        # Flushed by the tests instead of the background thread
+        self.recorder.wake = lambda: None
+
+    def close_owner(self):
+        if attempt_recorder._owner is not None:
+            attempt_recorder._owner[2].close()
+
+    def write_journal(self, name, records, torn_line=False):
+        lines = [json.dumps(record) for record in records] + (['{"quiz_type": "qu'] if torn_line else [])
+        (self.journal_dir / name).write_text(''.join(line + '\n' for line in lines), encoding='utf-8')
+
+    def dead_letters(self):
+        path = self.journal_dir / 'dead-letter.jsonl'
+        if not path.exists():
+            return []
+        return [json.loads(line)['record'] for line in path.read_text(encoding='utf-8').splitlines()]
+
+    def scores(self):
+        return dict(QuizAttempt.objects.values_list('user__username', 'score'))
+
+
+class AttemptRecorderTests(JournalMixin, QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        self.use_temporary_journal()
+
+    def test_record_is_journaled_until_flushed(self):
+        self.recorder.record('quiz', self.alice, 1, **attempt_record(self.alice, 1, 2)['fields'])
+        journals = list(self.journal_dir.glob('attempts-*.jsonl'))
+        self.assertEqual(len(journals), 1)
+        self.assertEqual(self.scores(), {})
+
+        self.assertEqual(self.recorder.flush(), 1)
+        self.assertEqual(self.scores(), {'alice': 2})
+        self.assertEqual(list(self.journal_dir.glob('attempts-*')), [])
+
+    def test_record_writes_at_once_without_write_behind(self):
+        with self.settings(ATTEMPT_WRITE_BEHIND=False):
+            self.recorder.record('quiz', self.alice, 1, **attempt_record(self.alice, 1, 2)['fields'])
+        self.assertEqual(self.scores(), {'alice': 2})
+        self.assertEqual(list(self.journal_dir.glob('attempts-*')), [])
+
+    def test_latest_attempt_replaces_earlier_ones(self):
+        attempt_recorder.write_attempts([attempt_record(self.alice, 1, 1), attempt_record(self.alice, 1, 2)])
+        attempt_recorder.write_attempts([attempt_record(self.alice, 1, 3), attempt_record(self.bob, 1, 1)])
+        self.assertEqual(self.scores(), {'alice': 3, 'bob': 1})
+        # Each user counted once, at their latest score
+        self.assertEqual(histogram_buckets(1), {'1': 1, '3': 1})
+
+    def test_orphaned_journal_is_replayed(self):
+        self.write_journal('attempts-1234_1.jsonl', [attempt_record(self.alice, 1, 2)], torn_line=True)
+        with self.assertLogs('quiz.attempt_recorder', 'WARNING'):
+            self.assertEqual(attempt_recorder.replay_orphans(), 1)
+        self.assertEqual(self.scores(), {'alice': 2})
+        self.assertEqual([path.name for path in self.journal_dir.iterdir() if not path.name.startswith('owner-')], [])
+
+    @skipUnless(attempt_recorder.fcntl, 'needs flock')
+    def test_journal_of_a_running_process_is_left_alone(self):
+        self.write_journal('attempts-1234_1.jsonl', [attempt_record(self.alice, 1, 2)])
+        lock_path = self.journal_dir / 'owner-1234_1.lock'
+        with open(lock_path, 'wb') as held:
+            attempt_recorder.fcntl.flock(held, attempt_recorder.fcntl.LOCK_EX)
+            self.assertEqual(attempt_recorder.replay_orphans(), 0)
+            self.assertTrue((self.journal_dir / 'attempts-1234_1.jsonl').exists())
+
+        # Released when the owner exits
+        self.assertEqual(attempt_recorder.replay_orphans(), 1)
+        self.assertEqual(self.scores(), {'alice': 2})
+        self.assertFalse(lock_path.exists())
+
+    def test_own_journal_is_not_replayed(self):
+        self.recorder.record('quiz', self.alice, 1, **attempt_record(self.alice, 1, 2)['fields'])
+        self.assertEqual(attempt_recorder.replay_orphans(), 0)
+        self.assertEqual(self.recorder.flush(), 1)
+
+
+class RejectedAttemptTests(JournalMixin, TransactionTestCase):
+    """Foreign keys are checked at commit, so these tests commit."""
+
+    def setUp(self):
+        question_cache.clear()
+        tag_index._indexes.clear()
+        search._indexes.clear()
+        forget_versions()
+        # The cache table is not flushed between transaction tests
+        self.addCleanup(cache.clear)
+        make_quiz(1)
+        self.alice = User.objects.create_user('alice')
+        self.ghost = User(pk=9999, username='deleted')
+        self.use_temporary_journal()
+
+    def test_rejected_attempt_does_not_block_the_queue(self):
+        for user, score in ((self.ghost, 1), (self.alice, 2)):
+            self.recorder.record('quiz', user, 1, **attempt_record(user, 1, score)['fields'])
+
+        with self.assertLogs('quiz.attempt_recorder', 'WARNING'):
+            self.assertEqual(self.recorder.flush(), 1)
+        self.assertEqual(self.scores(), {'alice': 2})
+        self.assertEqual([record['user_id'] for record in self.dead_letters()], [9999])
+        self.assertEqual(self.recorder._failed, [])
+        self.assertEqual(self.recorder.flush(), 0)
+
+    def test_rejected_attempt_in_a_replayed_journal(self):
+        self.write_journal('attempts-1234_1.jsonl', [attempt_record(self.ghost, 1, 1), attempt_record(self.alice, 1, 2)])
+        with self.assertLogs('quiz.attempt_recorder', 'WARNING'):
+            self.assertEqual(attempt_recorder.replay_orphans(), 1)
+        self.assertEqual(self.scores(), {'alice': 2})
+        self.assertEqual([record['user_id'] for record in self.dead_letters()], [9999])
+        self.assertFalse((self.journal_dir / 'attempts-1234_1.jsonl').exists())
+
+
+class ScoreHistogramTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        attempt_recorder.write_attempts([attempt_record(self.alice, 1, 1), attempt_record(self.bob, 1, 3)])
+
+    def test_standing_counts_the_new_score_as_a_candidate(self):
+        self.assertEqual(score_distribution.standing('quiz', 1, 2), {'rank': 2, 'total': 3, 'beaten_percent': 33})
+
+    def test_standing_leaves_out_the_replaced_attempt(self):
+        # Alice's stored 1 is replaced by her new 2, so only Bob remains
+        self.assertEqual(score_distribution.standing('quiz', 1, 2, self.alice), {'rank': 2, 'total': 2, 'beaten_percent': 0})
+        self.assertEqual(score_distribution.standing('quiz', 1, 3, self.bob), {'rank': 1, 'total': 2, 'beaten_percent': 50})
+
+    def test_standing_without_attempts(self):
+        self.assertEqual(score_distribution.standing('quiz', 2, 5), {'rank': 1, 'total': 1, 'beaten_percent': 0})
+
+    def test_super_quizzes_use_half_mark_buckets(self):
+        self.assertEqual(score_distribution.bucket('super', 3.5), 7)
+        self.assertEqual(score_distribution.bucket('quiz', 3), 3)
+
+    def test_deleted_attempt_is_taken_out(self):
+        QuizAttempt.objects.get(user=self.bob).delete()
+        histogram = ScoreHistogram.objects.get(quiz_type='quiz', quiz_id=1)
+        self.assertEqual((histogram.buckets, histogram.total), ({'1': 1}, 1))
+
+    def test_rebuild_matches_the_maintained_rows(self):
+        attempt_recorder.write_attempts([attempt_record(self.alice, 1, 3)])
+        maintained = histogram_buckets(1)
+        ScoreHistogram.objects.update(buckets={}, total=0)
+        ScoreHistogram.objects.create(quiz_type='quiz', quiz_id=99, buckets={'1': 1}, total=1)
+
+        self.assertEqual(score_distribution.rebuild('quiz'), 1)
+        self.assertEqual(histogram_buckets(1), maintained)
+        self.assertEqual(maintained, {'3': 2})
+        self.assertFalse(ScoreHistogram.objects.filter(quiz_id=99).exists())
+
+
+class QuestionStatTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+        self.alice = User.objects.create_user('alice')
+        self.bob = User.objects.create_user('bob')
+        attempt_recorder.write_attempts([
+            attempt_record(self.alice, 1, 1, {'0': 'A', '1': 'C'}),
+            attempt_record(self.bob, 1, 2, {'0': 'B', '1': 'B', '2': 'C'}),
+        ])
+
+    def counts(self):
+        return {
+            row.question_index: (row.correct, row.wrong, row.skipped, row.options)
+            for row in QuestionStat.objects.filter(quiz_type='quiz', quiz_id=1)
+        }
+
+    def test_counts_outcomes_and_options(self):
+        self.assertEqual(self.counts(), {
+            0: (1, 1, 0, {'A': 1, 'B': 1}),
+            1: (1, 1, 0, {'B': 1, 'C': 1}),
+            2: (1, 0, 1, {'C': 1}),
+        })
+
+    def test_replaced_attempt_is_subtracted(self):
+        attempt_recorder.write_attempts([attempt_record(self.alice, 1, 3, {'0': 'A', '1': 'B', '2': 'C'})])
+        self.assertEqual(self.counts(), {
+            0: (1, 1, 0, {'A': 1, 'B': 1}),
+            1: (2, 0, 0, {'B': 2}),
+            2: (2, 0, 0, {'C': 2}),
+        })
+
+    def test_unknown_option_is_wrong_without_an_option_count(self):
+        carol = User.objects.create_user('carol')
+        attempt_recorder.write_attempts([attempt_record(carol, 1, 0, {'0': 'Z'})])
+        self.assertEqual(self.counts()[0], (1, 2, 0, {'A': 1, 'B': 1}))
+
+    def test_display_stats(self):
+        stats = question_stats.question_stats('quiz', 1)
+        self.assertEqual(stats[0], {'attempts': 2, 'correct_percent': 50, 'skipped_percent': 0, 'options': {'A': 1, 'B': 1}})
+        self.assertEqual(stats[2]['skipped_percent'], 50)
+
+    def test_quiz_without_question_set_is_skipped(self):
+        make_quiz(2)
+        attempt_recorder.write_attempts([attempt_record(self.alice, 2, 1, {'0': 'A'})])
+        self.assertFalse(QuestionStat.objects.filter(quiz_id=2).exists())
+
+    def test_rebuild_matches_the_maintained_rows(self):
+        maintained = self.counts()
+        QuestionStat.objects.all().delete()
+        self.assertEqual(question_stats.rebuild('quiz'), 1)
+        self.assertEqual(self.counts(), maintained)
+
+
+class TagPerformanceTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1, tags=('UPSC', 'SSC'))
+        make_quiz(2, tags=('UPSC',))
+        self.alice = User.objects.create_user('alice')
+        attempt_recorder.write_attempts([attempt_record(self.alice, 1, 1), attempt_record(self.alice, 2, 3)])
+
+    def rows(self):
+        return {
+            row.exam_tag: (row.attempts, round(row.total_percentage), round(row.best_percentage))
+            for row in TagPerformance.objects.filter(user=self.alice, quiz_type='quiz')
+        }
+
+    def test_attempts_are_summed_per_tag(self):
+        self.assertEqual(self.rows(), {'SSC': (1, 33, 33), 'UPSC': (2, 133, 100)})
+
+    def test_removed_best_is_reread(self):
+        attempt_recorder.write_attempts([attempt_record(self.alice, 2, 2)])
+        self.assertEqual(self.rows(), {'SSC': (1, 33, 33), 'UPSC': (2, 100, 67)})
+
+    def test_retagged_quiz_is_recounted(self):
+        quiz = Quiz.objects.get(quiz_id=1)
+        quiz.exam_tags = ['SSC', 'CGL']
+        quiz.save()
+        self.assertEqual(self.rows(), {'CGL': (1, 33, 33), 'SSC': (1, 33, 33), 'UPSC': (1, 100, 100)})
+
+    def test_deleted_attempt_empties_its_tags(self):
+        QuizAttempt.objects.get(user=self.alice, quiz_id=1).delete()
+        self.assertEqual(self.rows(), {'UPSC': (1, 100, 100)})
+
+    def test_summary_for_the_profile(self):
+        summary = tag_performance.tag_summary(self.alice)
+        self.assertEqual([(row['exam_tag'], row['quiz_type'], row['attempts']) for row in summary],
+                         [('SSC', 'Quizzes', 1), ('UPSC', 'Quizzes', 2)])
+        self.assertAlmostEqual(summary[1]['average_percentage'], 200 / 3)
+
+    def test_rebuild_matches_the_maintained_rows(self):
+        maintained = self.rows()
+        TagPerformance.objects.all().delete()
+        self.assertEqual(tag_performance.rebuild('quiz'), 2)
+        self.assertEqual(self.rows(), maintained)
+
+
+class KeysetPaginationTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice')
+        for quiz_id in range(1, 8):
+            make_quiz(quiz_id)
+            QuizAttempt.objects.create(
+                user=self.alice, quiz_id=quiz_id, score=1, total_questions=3, percentage=33, answers={}, total_score=3,
+            )
+        # Ties on the date, broken by id
+        QuizAttempt.objects.filter(quiz_id__lte=4).update(attempt_date=timezone.now())
+
+    def walk(self, per_page):
+        pages, cursor = [], None
+        while True:
+            page = keyset_paginate(QuizAttempt.objects.all(), ('-attempt_date', '-id'), cursor, per_page)
+            pages.append([attempt.id for attempt in page])
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(QuizAttempt.objects.order_by('-attempt_date', '-id').values_list('id', flat=True))
+        pages = self.walk(per_page=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_last_full_page_has_no_next(self):
+        self.assertEqual([len(page) for page in self.walk(per_page=7)], [7])
+
+    def test_forged_cursor_starts_over(self):
+        cursor = encode_cursor([1, 2]) + 'x'
+        self.assertIsNone(decode_cursor(cursor))
+        page = keyset_paginate(QuizAttempt.objects.all(), ('-id',), cursor, per_page=3)
+        self.assertEqual(page.object_list[0], QuizAttempt.objects.order_by('-id').first())
+
+    def test_next_page_url_keeps_the_query(self):
+        page = keyset_paginate(QuizAttempt.objects.all(), ('-id',), per_page=3)
+        url = next_page_url(RequestFactory().get('/quizzes/', {'tag': 'UPSC', 'cursor': 'old'}), page)
+        self.assertTrue(url.startswith('/quizzes/?tag=UPSC&cursor='))
+        self.assertNotIn('old', url)
+        self.assertIsNone(next_page_url(RequestFactory().get('/'), keyset_paginate(QuizAttempt.objects.none(), ('-id',))))
+
+
+class AttemptTimelineTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user('alice')
+        bob = User.objects.create_user('bob')
+        now = timezone.now()
+        for quiz_id in (1, 2):
+            make_quiz(quiz_id, f'Quiz {quiz_id}')
+            AdvanceQuiz.objects.create(quiz_id=quiz_id, quiz_name=f'Sectional {quiz_id}', exam_tags=['UPSC'], requires_signup=False)
+            SuperQuiz.objects.create(quiz_id=quiz_id, quiz_name=f'Mock {quiz_id}', exam_tags=['UPSC'], requires_signup=False)
+            for user in (self.alice, bob):
+                QuizAttempt.objects.create(user=user, quiz_id=quiz_id, score=2, total_questions=3, percentage=67, answers={}, total_score=3)
+                AdvanceQuizAttempt.objects.create(user=user, quiz_id=quiz_id, score=20, total_questions=25, percentage=80, answers={}, total_score=25)
+                SuperQuizAttempt.objects.create(user=user, quiz_id=quiz_id, score=150, total_questions=100, percentage=75, is_completed=True, total_score=200)
+        # Quiz 1 attempts of every kind share a date, so the order falls back to kind and id
+        for model in (QuizAttempt, AdvanceQuizAttempt, SuperQuizAttempt):
+            model.objects.filter(quiz_id=1).update(attempt_date=now)
+            model.objects.filter(quiz_id=2).update(attempt_date=now - timedelta(days=1))
+
+    def walk(self, kinds=('quiz', 'advance', 'super'), per_page=2):
+        rows, cursor = [], None
+        while True:
+            page = timeline_page(self.alice, kinds, cursor, per_page)
+            rows += [(row['kind'], row['quiz_id']) for row in page]
+            if not page.has_next:
+                return rows
+            cursor = page.next_cursor
+
+    def test_pages_merge_every_kind_newest_first(self):
+        self.assertEqual(self.walk(), [
+            ('super', 1), ('quiz', 1), ('advance', 1),
+            ('super', 2), ('quiz', 2), ('advance', 2),
+        ])
+
+    def test_one_kind(self):
+        self.assertEqual(self.walk(kinds=('advance',), per_page=1), [('advance', 1), ('advance', 2)])
+
+    def test_card_columns(self):
+        row = timeline_page(self.alice, ('advance',), per_page=1).object_list[0]
+        self.assertEqual(row['quiz_name'], 'Sectional 1')
+        self.assertEqual((row['score'], row['out_of']), (20, 25))
+        self.assertEqual(row['label'], 'Sectional Test')
+        self.assertEqual(row['solutions_url'], '/advance-quiz/1/solutions/')
+
+    def test_cursor_of_an_unknown_kind_starts_over(self):
+        cursor = encode_cursor([timezone.now().isoformat(), 'blog', 1])
+        self.assertEqual(timeline_page(self.alice, cursor=cursor, per_page=1).object_list[0]['kind'], 'super')
+
+
+class QuestionEndpointTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+
+    def get(self, quiz_id=1, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(f'/quiz/{quiz_id}/questions/', secure=True, headers=headers)
+
+    def test_questions_without_answers(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Q1', response.content.decode())
+        self.assertNotIn('Because', response.content.decode())
+        self.assertNotIn('"answer"', response.content.decode())
+
+    def test_repeat_request_gets_304(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(etag=etag).status_code, 304)
+
+    def test_edited_question_set_changes_the_etag(self):
+        etag = self.get()['ETag']
+        question_set = QuestionSet.objects.get(quiz_id=1)
+        question_set.questions = make_questions('ABCD')
+        question_set.save()
+        response = self.get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_quiz_is_404_before_any_304(self):
+        self.assertEqual(self.get(quiz_id=2, etag='*').status_code, 404)
+
+    def test_signup_quiz_is_refused_without_an_etag(self):
+        make_quiz(2, requires_signup=True)
+        QuestionSet.objects.create(quiz_id=2, questions=make_questions('AB'))
+        self.client.force_login(User.objects.create_user('alice'))
+        etag = self.get(quiz_id=2)['ETag']
+        self.client.logout()
+
+        response = self.get(quiz_id=2, etag=etag)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class QuestionProjectionTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+
+    def edit_outside_django(self, answers):
+        QuestionSet.objects.filter(quiz_id=1).update(questions=make_questions(answers))
+
+    def test_check_reads_checksums_not_questions(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(_load_outline('quiz', 1), ([[None, 3]], QuestionProjection.objects.get().digest))
+        raw_reads = [query['sql'] for query in queries if 'FROM "questions"' in query['sql']]
+        self.assertEqual(len(raw_reads), 1)
+        self.assertIn('MD5', raw_reads[0].upper())
+        self.assertEqual(raw_reads[0].count('"questions"."questions"'), 1)
+
+    def test_edit_outside_django_is_reprojected(self):
+        digest = QuestionProjection.objects.get().digest
+        self.edit_outside_django('ABCD')
+        outline, new_digest = _load_outline('quiz', 1)
+        self.assertEqual(outline, [[None, 4]])
+        self.assertNotEqual(new_digest, digest)
+        self.assertEqual(QuestionProjection.objects.get().digest, new_digest)
+        self.assertEqual(len(get_question_set('quiz', 1).questions), 4)
+
+    def test_command_rebuilds_only_changed_sets(self):
+        out = StringIO()
+        call_command('build_question_projections', '--quiz-type', 'quiz', stdout=out)
+        self.assertIn('rebuilt 0', out.getvalue())
+        self.edit_outside_django('ABCD')
+        call_command('build_question_projections', '--quiz-type', 'quiz', stdout=out)
+        self.assertIn('rebuilt 1', out.getvalue())
+        self.assertEqual(QuestionProjection.objects.get().outline, [[None, 4]])
+        self.assertEqual(_load_outline('quiz', 1)[1], QuestionProjection.objects.get().digest)
+
+class SolutionsPageTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = make_quiz(1)
+        QuestionSet.objects.create(quiz_id=1, questions=make_questions('ABC'))
+
+    def get(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get('/quiz/1/solutions/', secure=True, headers=headers)
+
+    def solutions_key(self):
+        return solutions_context('quiz', Quiz.objects.get(quiz_id=1))['solutions_key']
+
+    def test_body_is_rendered_once_per_version(self):
+        with mock.patch.object(views, 'solution_rows', wraps=solution_rows) as rows:
+            first = self.get()
+            second = self.get()
+        self.assertEqual(rows.call_count, 1)
+        self.assertIn('Because C', first.content.decode())
+        self.assertIn('Because C', second.content.decode())
+
+    def test_edits_change_the_solutions_key(self):
+        key = self.solutions_key()
+        self.quiz.quiz_name = 'Renamed'
+        self.quiz.save()
+        renamed_key = self.solutions_key()
+        self.assertNotEqual(renamed_key, key)
+
+        question_set = QuestionSet.objects.get(quiz_id=1)
+        question_set.questions = make_questions('ABD')
+        question_set.save()
+        self.assertNotEqual(self.solutions_key(), renamed_key)
+
+    def test_edited_question_set_is_rerendered(self):
+        self.get()
+        question_set = QuestionSet.objects.get(quiz_id=1)
+        question_set.questions = make_questions('ABD')
+        question_set.save()
+        content = self.get().content.decode()
+        self.assertIn('Because D', content)
+        self.assertNotIn('Because C', content)
+
+    def test_repeat_request_gets_304(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(etag=etag).status_code, 304)
+
+    def test_edited_quiz_changes_the_etag(self):
+        etag = self.get()['ETag']
+        self.quiz.quiz_name = 'Renamed'
+        self.quiz.save()
+        response = self.get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_user(self):
+        etag = self.get()['ETag']
+        self.client.force_login(User.objects.create_user('alice'))
+        self.assertEqual(self.get(etag=etag).status_code, 200)
+
+    def test_page_loads_books_as_a_fragment(self):
+        RecommendedBook.objects.create(title='Indian Polity', link='https://example.com/polity')
+        content = self.get().content.decode()
+        self.assertIn('hx-get="/recommended-books/"', content)
+        self.assertNotIn('Indian Polity', content)
+
+
+class RecommendedBooksFragmentTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(recommendations, 'book_sampler', BookSampler())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self):
+        return self.client.get('/recommended-books/', secure=True, headers={'HX-Request': 'true'})
+
+    def test_renders_the_books_partial(self):
+        for i in range(3):
+            RecommendedBook.objects.create(title=f'Book {i}', link=f'https://example.com/{i}')
+        response = self.get()
+        self.assertTemplateUsed(response, 'quiz/partials/recommended_books.html')
+        self.assertTemplateNotUsed(response, 'quiz/base.html')
+        content = response.content.decode()
+        for i in range(3):
+            self.assertIn(f'Book {i}', content)
+            self.assertIn(f'href="https://example.com/{i}"', content)
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_empty_catalogue_renders_nothing(self):
+        self.assertEqual(self.get().content.decode().strip(), '')
+
+
+class StubTransport:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    def send(self, text):
+        if self.error:
+            raise DeliveryError(self.error)
+        self.sent.append(text)
+
+
+@override_settings(ISSUE_REPORT_WORKER=False, ISSUE_REPORT_RETRY_BASE=30, ISSUE_REPORT_RETRY_MAX=100,
+                   ISSUE_REPORT_MAX_ATTEMPTS=3)
+class IssueReportTests(TestCase):
+    def make_due(self):
+        IssueReport.objects.update(next_attempt_at=timezone.now())
+
+    def deliver_failing(self, error='timed out'):
+        with self.assertLogs('quiz.notifications', 'WARNING'):
+            return deliver_due(StubTransport(error=error))
+
+    def test_pending_duplicate_is_counted_not_stored(self):
+        enqueue('Wrong answer')
+        enqueue('  Wrong answer\n')
+        report = IssueReport.objects.get()
+        self.assertEqual(report.duplicates, 1)
+
+        transport = StubTransport()
+        deliver_due(transport)
+        self.assertEqual(transport.sent, ['Wrong answer\n(reported 2 times)'])
+        enqueue('Wrong answer')
+        self.assertEqual(IssueReport.objects.filter(status=IssueReport.PENDING).count(), 1)
+
+    def test_reports_are_coalesced_into_one_message(self):
+        for i in range(3):
+            enqueue(f'Report {i}')
+        transport = StubTransport()
+        self.assertEqual(deliver_due(transport), 3)
+        self.assertEqual(len(transport.sent), 1)
+        self.assertEqual([line for line in transport.sent[0].splitlines() if line.startswith('Report')],
+                         ['Report 0', 'Report 1', 'Report 2'])
+        self.assertEqual(IssueReport.objects.filter(status=IssueReport.SENT).count(), 3)
+        self.assertEqual(deliver_due(transport), 0)
+
+    def test_long_reports_are_split_at_the_length_limit(self):
+        enqueue('a' * 3000)
+        enqueue('b' * 3000)
+        transport = StubTransport()
+        deliver_due(transport)
+        self.assertEqual(len(transport.sent), 2)
+        self.assertTrue(all(len(text) <= MAX_MESSAGE_LENGTH for text in transport.sent))
+
+    def test_failed_delivery_backs_off_exponentially(self):
+        enqueue('Typo')
+        delays = []
+        for _ in range(2):
+            before = timezone.now()
+            self.assertEqual(self.deliver_failing(), 0)
+            report = IssueReport.objects.get()
+            delays.append(round((report.next_attempt_at - before).total_seconds()))
+            self.assertEqual(deliver_due(StubTransport()), 0)
+            self.make_due()
+        self.assertEqual(delays, [30, 60])
+        self.assertEqual(report.status, IssueReport.PENDING)
+        self.assertEqual(report.attempts, 2)
+        self.assertEqual(report.last_error, 'timed out')
+
+    def test_backoff_is_capped(self):
+        enqueue('Typo')
+        IssueReport.objects.update(attempts=1)
+        before = timezone.now()
+        with self.settings(ISSUE_REPORT_MAX_ATTEMPTS=8):
+            self.deliver_failing()
+        delay = (IssueReport.objects.get().next_attempt_at - before).total_seconds()
+        self.assertEqual(round(delay), 60)
+        IssueReport.objects.update(attempts=5, next_attempt_at=timezone.now())
+        before = timezone.now()
+        with self.settings(ISSUE_REPORT_MAX_ATTEMPTS=8):
+            self.deliver_failing()
+        delay = (IssueReport.objects.get().next_attempt_at - before).total_seconds()
+        self.assertEqual(round(delay), 100)
+
+    def test_report_fails_after_the_last_attempt(self):
+        enqueue('Typo')
+        for _ in range(3):
+            self.deliver_failing('502: Bad Gateway')
+            self.make_due()
+        report = IssueReport.objects.get()
+        self.assertEqual(report.status, IssueReport.FAILED)
+        self.assertEqual(report.attempts, 3)
+
+        transport = StubTransport()
+        self.assertEqual(deliver_due(transport), 0)
+        self.assertEqual(transport.sent, [])
+        enqueue('Typo')
+        self.assertEqual(IssueReport.objects.filter(status=IssueReport.PENDING).count(), 1)
+
+
+class TelegramTransportTests(SimpleTestCase):
+    """The default transport against a local stand-in for the Bot API."""
+
+    def serve(self, status):
+        received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length'])).decode()
+                received.append((self.path, parse_qs(body)))
+                self.send_response(status)
+                self.end_headers()
+                self.wfile.write(b'{"ok": true}' if status == 200 else b'{"ok": false}')
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f'http://127.0.0.1:{server.server_port}', received
+
+    def test_message_is_posted_to_the_chat(self):
+        url, received = self.serve(200)
+        with self.settings(TELEGRAM_API_URL=url, TELEGRAM_BOT_TOKEN='123:abc', TELEGRAM_CHAT_ID='42'):
+            TelegramTransport(timeout=5).send('Hello')
+        self.assertEqual(received, [('/bot123:abc/sendMessage', {'chat_id': ['42'], 'text': ['Hello']})])
+
+    def test_error_status_raises(self):
+        url, _ = self.serve(502)
+        with self.settings(TELEGRAM_API_URL=url, TELEGRAM_BOT_TOKEN='123:abc', TELEGRAM_CHAT_ID='42'):
+            with self.assertRaisesMessage(DeliveryError, '502'):
+                TelegramTransport(timeout=5).send('Hello')
+
+
+class BlogLikeTests(TestCase):
+    def setUp(self):
+        self.post = BlogPost.objects.create(title='Post', content='Body')
+        self.alice = User.objects.create_user('alice')
+        self.client.force_login(self.alice)
+
+    def like(self):
+        return self.client.post(f'/blog/{self.post.pk}/like/', secure=True).json()
+
+    def likes_count(self):
+        return BlogPost.objects.values_list('likes_count', flat=True).get(pk=self.post.pk)
+
+    def test_second_like_toggles_it_off(self):
+        self.assertEqual((self.like()['liked'], self.likes_count()), (True, 1))
+        self.assertEqual((self.like()['liked'], self.likes_count()), (False, 0))
+        self.assertEqual((self.like()['liked'], self.likes_count()), (True, 1))
+        self.assertEqual(self.post.likes.count(), 1)
+
+    def test_concurrent_like_is_counted_once(self):
+        self.like()
+        # The other request's like lands between our delete and insert
+        with mock.patch.object(QuerySet, 'delete', return_value=(0, {})):
+            response = self.like()
+        self.assertEqual((response['liked'], response['like_count']), (True, 1))
+        self.assertEqual(self.post.likes.count(), 1)
+
+    def test_likes_changed_through_the_relation_are_recounted(self):
+        bob = User.objects.create_user('bob')
+        self.post.likes.add(self.alice, bob)
+        self.assertEqual(self.likes_count(), 2)
+        bob.blog_likes.clear()
+        self.assertEqual(self.likes_count(), 1)
+
+    def test_reconcile_repairs_drifted_counts(self):
+        self.like()
+        other = BlogPost.objects.create(title='Other', content='Body')
+        BlogPost.objects.filter(pk=self.post.pk).update(likes_count=5)
+        BlogPost.objects.filter(pk=other.pk).update(likes_count=-1)
+
+        out = StringIO()
+        call_command('reconcile_like_counts', '--dry-run', stdout=out)
+        self.assertIn('Found 2 drifted', out.getvalue())
+        self.assertEqual(self.likes_count(), 5)
+
+        out = StringIO()
+        call_command('reconcile_like_counts', stdout=out)
+        self.assertIn('Post: 5 -> 1', out.getvalue())
+        self.assertIn('Fixed 2 drifted', out.getvalue())
+        self.assertEqual(dict(BlogPost.objects.values_list('title', 'likes_count')), {'Post': 1, 'Other': 0})
+
+
+class InvertedIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = InvertedIndex([
+            (1, 'Indian Polity Basics', ['UPSC']),
+            (2, 'Modern History', ['UPSC', 'Polity']),
+            (3, 'Polity', ['SSC']),
+            (4, 'Political Theory', ['UPSC']),
+        ])
+
+    def test_terms_match_as_prefixes(self):
+        self.assertEqual(set(self.index.search(['polit'])), {1, 2, 3, 4})
+        self.assertEqual(self.index.search(['hist']), [2])
+        self.assertEqual(self.index.search(['story']), [])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.index.search(['polity', 'upsc']), [1, 2])
+        self.assertEqual(self.index.search(['polity', 'cgl']), [])
+
+    def test_name_matches_outrank_tag_matches(self):
+        self.assertEqual(self.index.search(['polity']), [3, 1, 2])
+
+    def test_whole_words_outrank_prefixes(self):
+        index = InvertedIndex([(1, 'Econ Basics', []), (2, 'Economy', [])])
+        self.assertEqual(index.search(['econ']), [1, 2])
+        self.assertEqual(index.search(['econo']), [2])
+
+
+class MemorySearchTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        make_quiz(1, name='Indian Polity')
+        make_quiz(2, name='Modern History', tags=('SSC',))
+
+    def search(self, *terms):
+        return list(search._memory_search(Quiz.objects.all(), list(terms), 'quiz').values_list('quiz_id', flat=True))
+
+    def test_results_are_ranked(self):
+        make_quiz(3, name='Polity Practice')
+        make_quiz(4, name='Geography', tags=('Polity',))
+        self.assertEqual(self.search('polity'), [3, 1, 4])
+
+    def test_index_is_reused_until_a_quiz_changes(self):
+        index = memory_index('quiz')
+        with self.assertNumQueries(0):
+            self.assertIs(memory_index('quiz'), index)
+
+    def test_renamed_quiz_is_found_by_its_new_name(self):
+        self.assertEqual(self.search('history'), [2])
+        quiz = Quiz.objects.get(quiz_id=2)
+        quiz.quiz_name = 'Ancient Economy'
+        quiz.save()
+        self.assertEqual(self.search('history'), [])
+        self.assertEqual(self.search('econ'), [2])
+
+    def test_added_and_deleted_quizzes(self):
+        self.assertEqual(self.search('geo'), [])
+        make_quiz(3, name='Geography')
+        self.assertEqual(self.search('geo'), [3])
+        Quiz.objects.get(quiz_id=1).delete()
+        self.assertEqual(self.search('polity'), [])
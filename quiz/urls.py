@@ -18,12 +18,16 @@ urlpatterns = [
     path('quiz/<int:quiz_id>/', views.quiz_detail, name='quiz_detail'),
     path('quiz/<int:quiz_id>/start/', views.quiz_paginated, name='quiz_paginated'),
     path('quiz/<int:quiz_id>/submit/', views.quiz_submit_paginated, name='quiz_submit_paginated'),
+    path('quiz/<int:quiz_id>/questions/', views.quiz_questions_json, {'quiz_type': 'quiz'}, name='quiz_questions'),
+    path('quiz/<int:quiz_id>/draft/', views.save_answer_draft, {'quiz_type': 'quiz'}, name='quiz_answer_draft'),
     path('quiz/<int:quiz_id>/solutions/', views.quiz_solutions, name='quiz_solutions'),
 
     # New Advance Quiz Views
     path('advance-quiz/<int:quiz_id>/', views.advance_quiz_detail, name='advance_quiz_detail'),
     path('advance-quiz/<int:quiz_id>/start/', views.advance_quiz_paginated, name='advance_quiz_paginated'),
     path('advance-quiz/<int:quiz_id>/submit/', views.advance_quiz_submit_paginated, name='advance_quiz_submit_paginated'),
+    path('advance-quiz/<int:quiz_id>/questions/', views.quiz_questions_json, {'quiz_type': 'advance'}, name='advance_quiz_questions'),
+    path('advance-quiz/<int:quiz_id>/draft/', views.save_answer_draft, {'quiz_type': 'advance'}, name='advance_quiz_answer_draft'),
     path('advance-quiz/<int:quiz_id>/solutions/', views.advance_quiz_solutions, name='advance_quiz_solutions'),
 
     # Search
@@ -56,5 +60,11 @@ urlpatterns = [
     path('super-quiz/<int:quiz_id>/instructions/', views.super_quiz_instructions, name='super_quiz_instructions'),
     path('super-quiz/<int:quiz_id>/start/', views.super_quiz_paginated, name='super_quiz_paginated'),
     path('super-quiz/<int:quiz_id>/submit/', views.super_quiz_submit_paginated, name='super_quiz_submit_paginated'),
+    path('super-quiz/<int:quiz_id>/questions/', views.quiz_questions_json, {'quiz_type': 'super'}, name='super_quiz_questions'),
+    path('super-quiz/<int:quiz_id>/draft/', views.save_answer_draft, {'quiz_type': 'super'}, name='super_quiz_answer_draft'),
     path('super-quiz/<int:quiz_id>/solutions/', views.super_quiz_solutions, name='super_quiz_solutions'),
+
+    # Internal
+    path('recommended-books/', views.recommended_books_fragment, name='recommended_books_fragment'),
+    path('internal/cache-stats/', views.cache_stats, name='cache_stats'),
 ]
\ No newline at end of file
@@ -1,15 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django_htmx.http import HttpResponseClientRedirect
 from django.urls import reverse
 from functools import wraps
 from django.core.paginator import Paginator
 from .models import Quiz, QuestionSet, QuizAttempt, UserProfile
-from django.views.decorators.http import require_http_methods
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
 from django.utils import timezone
 import json
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
 from .models import Quiz
 from django.contrib.auth import get_user_model
 from django.shortcuts import render, redirect
@@ -26,6 +29,25 @@ from django.db.models import Value, BooleanField
 from .models import AdvanceQuiz, AdvanceQuestionSet, AdvanceQuizAttempt
 from .models import SuperQuiz, SuperQuestionSet, SuperQuizAttempt
 from .models import RecommendedBook
+from .question_cache import question_cache
+from .quiz_loader import load_quiz
+from .answer_drafts import get_drafts
+from .db_routing import replica_reads
+from . import attempt_recorder
+from .score_distribution import standing
+from .question_stats import question_stats
+from .attempt_timeline import KINDS as TIMELINE_KINDS, timeline_page
+from .tag_performance import tag_summary
+from .question_payloads import PAGE_SIZE as QUESTION_PAGE_SIZE, question_page, question_section, section_outline
+from .scoring import score_submission
+from .recommendations import book_sampler, recommend_books
+from .home_feed import build_home_feed
+from .blog_render import ensure_rendered
+from .notifications import enqueue
+from .solutions import solution_rows, solutions_context, solutions_etag
+from . import tag_index
+from .quiz_queries import get_quiz_page, get_quiz_keyset_page, attempt_count
+from .pagination import approximate_count, keyset_paginate, next_page_url
 
 
 # Decorator for AdvanceQuiz login requirement
@@ -33,7 +55,7 @@ def conditional_advance_quiz_login_required(view_func):
     """Decorator that requires login only if the advance quiz requires signup"""
     @wraps(view_func)
     def _wrapped_view(request, quiz_id, *args, **kwargs):
-        quiz = get_object_or_404(AdvanceQuiz, quiz_id=quiz_id)
+        quiz, _ = load_quiz(request, 'advance', quiz_id)
         if quiz.requires_signup and not request.user.is_authenticated:
             messages.info(request, 'Please sign in to take this advance quiz.')
             return redirect('account_login')
@@ -41,6 +63,7 @@ def conditional_advance_quiz_login_required(view_func):
     return _wrapped_view
 
 # Advance Quiz Views
+@replica_reads
 def advance_quiz_detail(request, quiz_id):
     """Advance quiz detail page with start quiz functionality"""
     quiz = get_object_or_404(AdvanceQuiz, quiz_id=quiz_id)
@@ -48,9 +71,7 @@ def advance_quiz_detail(request, quiz_id):
         messages.info(request, 'Please sign in to take this advance quiz.')
         return redirect('account_login')
     if request.method == 'POST' or request.htmx:
-        user_id = request.user.id if request.user.is_authenticated else 'anonymous'
-        session_key = f'advance_{quiz_id}_answers_{user_id}'
-        request.session[session_key] = {}
+        get_drafts(request).start('advance', quiz_id)
         if request.htmx:
             return HttpResponseClientRedirect(
                 reverse('advance_quiz_paginated', kwargs={'quiz_id': quiz_id})
@@ -58,14 +79,17 @@ def advance_quiz_detail(request, quiz_id):
         return redirect('advance_quiz_paginated', quiz_id=quiz_id)
     return render(request, 'quiz/advance_quiz_detail.html', {'quiz': quiz})
 
+@replica_reads
 @conditional_advance_quiz_login_required
 def advance_quiz_paginated(request, quiz_id):
     """Render advance quiz with paginated questions"""
-    quiz = get_object_or_404(AdvanceQuiz, quiz_id=quiz_id)
-    question_set = get_object_or_404(AdvanceQuestionSet, quiz_id=quiz_id)
+    quiz, question_set = load_quiz(request, 'advance', quiz_id)
+    # Questions are fetched page by page from quiz_questions_json
     return render(request, 'quiz/advance_quiz_paginated.html', {
         'quiz': quiz,
-        'questions': question_set.questions,
+        'total': question_set.total_questions,
+        'page_size': QUESTION_PAGE_SIZE,
+        'draft_answers': get_drafts(request).get('advance', quiz_id),
     })
 
 @conditional_advance_quiz_login_required
@@ -76,9 +100,7 @@ def advance_quiz_submit_paginated(request, quiz_id):
     if getattr(request, 'limited', False):
         return HttpResponseTooManyRequests("Too many requests. Please slow down.")
 
-    quiz = get_object_or_404(AdvanceQuiz, quiz_id=quiz_id)
-    question_set = get_object_or_404(AdvanceQuestionSet, quiz_id=quiz_id)
-    questions = question_set.questions
+    quiz, question_set = load_quiz(request, 'advance', quiz_id)
 
     try:
         answers = json.loads(request.POST.get('answers', '{}'))
@@ -87,75 +109,48 @@ def advance_quiz_submit_paginated(request, quiz_id):
         messages.error(request, "Invalid answers submitted.")
         return redirect('advance_quiz_paginated', quiz_id=quiz_id)
 
-    score = 0
-    results = []
-    for i, q in enumerate(questions):
-        user_ans = answers.get(str(i), '')
-        correct = q['answer']
-        is_correct = user_ans == correct
-        if is_correct:
-            score += 1
-        results.append({
-            'question': q['question'],
-            'options': q['options'],
-            'your_answer': user_ans,
-            'correct_answer': correct,
-            'is_correct': is_correct,
-            'explanation': q.get('explanation', '')
-        })
-
-    percentage = (score / len(questions)) * 100 if questions else 0
+    scorecard = score_submission(question_set, answers)
+    score = scorecard.score
+    percentage = scorecard.percentage
 
+    # Ranked before recording, so the histogram does not hold this attempt yet
+    result_standing = standing('advance', quiz.quiz_id, score, request.user)
     if request.user.is_authenticated:
-        UserProfile.objects.get_or_create(user=request.user)
-        AdvanceQuizAttempt.objects.update_or_create(
-            user=request.user,
-            quiz=quiz,
-            defaults={
-                'score': score,
-                'total_questions': len(questions),
-                'percentage': percentage,
-                'answers': answers,
-                'attempt_date': timezone.now(),
-                'total_score': 25,
-            }
+        attempt_recorder.record(
+            'advance', request.user, quiz.quiz_id,
+            score=score,
+            total_questions=scorecard.total,
+            percentage=percentage,
+            answers=answers,
+            total_score=25,
         )
 
-    recommended_books = RecommendedBook.objects.order_by('?')[:7]
+    get_drafts(request).clear('advance', quiz_id)
+
+    recommended_books = recommend_books(7)
 
     return render(request, 'quiz/advance_quiz_result.html', {
         'quiz': quiz,
         'score': score,
-        'total': len(questions),
+        'total': scorecard.total,
         'percentage': round(percentage, 1),
-        'results': results,
+        'results': scorecard.results,
         'time_taken': time_taken,
+        'standing': result_standing,
         'recommended_books': recommended_books
     })
 
+@replica_reads
+@condition(etag_func=solutions_etag('advance'))
+@cache_control(private=True, no_cache=True)
 def advance_quiz_solutions(request, quiz_id):
     """Display all questions with correct answers and explanations for an advance quiz"""
-    quiz = get_object_or_404(AdvanceQuiz, quiz_id=quiz_id)
-    question_set = get_object_or_404(AdvanceQuestionSet, quiz_id=quiz_id)
-    questions = question_set.questions
-
-    solutions = []
-    for i, q in enumerate(questions):
-        solutions.append({
-            'question': q['question'],
-            'options': q['options'],
-            'correct_answer': q['answer'],
-            'explanation': q.get('explanation', ''),
-        })
-
-    recommended_books = RecommendedBook.objects.order_by('?')[:7]
-
-    return render(request, 'quiz/advance_quiz_solutions.html', {
-        'quiz': quiz,
-        'solutions': solutions,
-        'total': len(questions),
-        'recommended_books': recommended_books
-    })
+    quiz, question_set = load_quiz(request, 'advance', quiz_id)
+    context = solutions_context('advance', quiz, solutions=lambda: solution_rows(
+        question_set.questions, question_stats('advance', quiz.quiz_id),
+    ))
+    context['total'] = question_set.total_questions
+    return render(request, 'quiz/advance_quiz_solutions.html', context)
 
 
 
@@ -163,13 +158,14 @@ def conditional_super_quiz_login_required(view_func):
     """Decorator that requires login only if the super quiz requires signup"""
     @wraps(view_func)
     def _wrapped_view(request, quiz_id, *args, **kwargs):
-        quiz = get_object_or_404(SuperQuiz, quiz_id=quiz_id)
+        quiz, _ = load_quiz(request, 'super', quiz_id)
         if quiz.requires_signup and not request.user.is_authenticated:
             messages.info(request, 'Please sign in to take this super quiz.')
             return redirect('account_login')
         return view_func(request, quiz_id, *args, **kwargs)
     return _wrapped_view
 
+@replica_reads
 def super_quiz_detail(request, quiz_id):
     """Super quiz detail page with start quiz functionality"""
     quiz = get_object_or_404(SuperQuiz, quiz_id=quiz_id)
@@ -180,6 +176,7 @@ def super_quiz_detail(request, quiz_id):
         return redirect('super_quiz_instructions', quiz_id=quiz_id)
     return render(request, 'quiz/super_quiz_instructions.html', {'quiz': quiz})
 
+@replica_reads
 def super_quiz_instructions(request, quiz_id):
     """Instruction page for super quiz"""
     quiz = get_object_or_404(SuperQuiz, quiz_id=quiz_id)
@@ -187,9 +184,7 @@ def super_quiz_instructions(request, quiz_id):
         messages.info(request, 'Please sign in to take this super quiz.')
         return redirect('account_login')
     if request.method == 'POST' or request.htmx:
-        user_id = request.user.id if request.user.is_authenticated else 'anonymous'
-        session_key = f'super_{quiz_id}_answers_{user_id}'
-        request.session[session_key] = {}
+        get_drafts(request).start('super', quiz_id)
         if request.htmx:
             return HttpResponseClientRedirect(
                 reverse('super_quiz_paginated', kwargs={'quiz_id': quiz_id})
@@ -197,22 +192,17 @@ def super_quiz_instructions(request, quiz_id):
         return redirect('super_quiz_paginated', quiz_id=quiz_id)
     return render(request, 'quiz/super_quiz_instructions.html', {'quiz': quiz})
 
+@replica_reads
 @conditional_super_quiz_login_required
 def super_quiz_paginated(request, quiz_id):
     """Render super quiz with section tabs"""
-    quiz = get_object_or_404(SuperQuiz, quiz_id=quiz_id)
-    question_sets = SuperQuestionSet.objects.filter(quiz_id=quiz_id).order_by('part_number')
-    sections = []
-    for qs in question_sets:
-        part_name = quiz.part_names.get(str(qs.part_number), f"Part {qs.part_number}")
-        sections.append({
-            'part_number': qs.part_number,
-            'part_name': part_name,
-            'questions': qs.questions,
-        })
+    quiz, question_set = load_quiz(request, 'super', quiz_id)
+    # Each section's questions are fetched from quiz_questions_json when opened
+    sections = section_outline(quiz, question_set)
     return render(request, 'quiz/super_quiz_paginated.html', {
         'quiz': quiz,
         'sections': sections,
+        'draft_answers': get_drafts(request).get('super', quiz_id),
     })
 
 @conditional_super_quiz_login_required
@@ -223,8 +213,7 @@ def super_quiz_submit_paginated(request, quiz_id):
     if getattr(request, 'limited', False):
         return HttpResponseTooManyRequests("Too many requests. Please slow down.")
 
-    quiz = get_object_or_404(SuperQuiz, quiz_id=quiz_id)
-    question_sets = SuperQuestionSet.objects.filter(quiz_id=quiz_id).order_by('part_number')
+    quiz, question_set = load_quiz(request, 'super', quiz_id)
     try:
         answers = json.loads(request.POST.get('answers', '{}'))
         time_taken = int(request.POST.get('time_taken', 0))
@@ -232,74 +221,43 @@ def super_quiz_submit_paginated(request, quiz_id):
         messages.error(request, "Invalid answers submitted.")
         return redirect('super_quiz_paginated', quiz_id=quiz_id)
 
+    # +2 for correct, -0.5 for wrong, skipped questions contribute 0
+    scorecard = score_submission(question_set, answers)
     section_results = []
-    total_score = 0
-    total_questions = 0
-    max_possible_marks = 0
-
-    for qs in question_sets:
-        questions = qs.questions
-        part_number = qs.part_number
-        part_name = quiz.part_names.get(str(part_number), f"Part {part_number}")
-        score = 0  # Score in marks
-        correct_count = 0
-        wrong_count = 0
-        results = []
-        for i, q in enumerate(questions):
-            user_ans = answers.get(f"{part_number}_{i}", '')
-            correct = q['answer']
-            is_correct = user_ans == correct
-            if user_ans and is_correct:
-                score += 2  # +2 for correct
-                correct_count += 1
-            elif user_ans and not is_correct:
-                score -= 0.5  # -0.5 for wrong
-                wrong_count += 1
-            # Skipped questions (user_ans is empty) contribute 0 to score
-            results.append({
-                'question': q['question'],
-                'options': q['options'],
-                'your_answer': user_ans,
-                'correct_answer': correct,
-                'is_correct': is_correct,
-                'explanation': q.get('explanation', ''),
-            })
-        total_questions_part = len(questions)
-        max_marks_part = total_questions_part * 2  # Max marks per question is 2
-        percentage = (score / max_marks_part * 100) if max_marks_part > 0 else 0
+    for part in scorecard.parts:
         section_results.append({
-            'part_number': part_number,
-            'part_name': part_name,
-            'score': score,  # Score in marks
-            'correct_count': correct_count,
-            'wrong_count': wrong_count,
-            'total': total_questions_part,
-            'max_marks': max_marks_part,
-            'percentage': round(percentage, 1),
-            'results': results,
+            'part_number': part.part_number,
+            'part_name': quiz.part_names.get(str(part.part_number), f"Part {part.part_number}"),
+            'score': part.score,  # Score in marks
+            'correct_count': part.correct_count,
+            'wrong_count': part.wrong_count,
+            'total': part.total,
+            'max_marks': part.max_marks,
+            'percentage': round(part.percentage, 1),
+            'results': part.results,
         })
-        total_score += score
-        total_questions += total_questions_part
-        max_possible_marks += max_marks_part
+    total_score = scorecard.score
+    total_questions = scorecard.total
+    max_possible_marks = scorecard.max_marks
 
     percentage = (total_score / 100) * 100
+    # Ranked before recording, so the histogram does not hold this attempt yet
+    result_standing = standing('super', quiz.quiz_id, total_score, request.user)
     if request.user.is_authenticated:
-        SuperQuizAttempt.objects.update_or_create(
-            user=request.user,
-            quiz=quiz,
-            defaults={
-                'score': total_score,
-                'total_questions': 100,
-                'percentage': percentage,
-                'attempt_date': timezone.now(),
-                'is_completed': True,
-                'total_score': 200
-            }
+        attempt_recorder.record(
+            'super', request.user, quiz.quiz_id,
+            score=total_score,
+            total_questions=100,
+            percentage=percentage,
+            is_completed=True,
+            total_score=200,
         )
 
     overall_percentage = (total_score / max_possible_marks * 100) if max_possible_marks > 0 else 0
 
-    recommended_books = RecommendedBook.objects.order_by('?')[:7]
+    get_drafts(request).clear('super', quiz_id)
+
+    recommended_books = recommend_books(7)
 
     return render(request, 'quiz/super_quiz_result.html', {
         'quiz': quiz,
@@ -309,38 +267,26 @@ def super_quiz_submit_paginated(request, quiz_id):
         'max_possible_marks': max_possible_marks,
         'overall_percentage': round(overall_percentage, 1),
         'time_taken': time_taken,
+        'standing': result_standing,
         'recommended_books': recommended_books
     })
 
+@replica_reads
+@condition(etag_func=solutions_etag('super'))
+@cache_control(private=True, no_cache=True)
 def super_quiz_solutions(request, quiz_id):
     """Display all questions with correct answers and explanations for a super quiz"""
-    quiz = get_object_or_404(SuperQuiz, quiz_id=quiz_id)
-    question_sets = SuperQuestionSet.objects.filter(quiz_id=quiz_id).order_by('part_number')
-    sections = []
-    for qs in question_sets:
-        part_name = quiz.part_names.get(str(qs.part_number), f"Part {qs.part_number}")
-        solutions = []
-        for i, q in enumerate(qs.questions):
-            solutions.append({
-                'question': q['question'],
-                'options': q['options'],
-                'correct_answer': q['answer'],
-                'explanation': q.get('explanation', ''),
-            })
-        sections.append({
-            'part_number': qs.part_number,
-            'part_name': part_name,
-            'solutions': solutions,
-            'total': len(qs.questions),
-        })
+    quiz, question_set = load_quiz(request, 'super', quiz_id)
 
-    recommended_books = RecommendedBook.objects.order_by('?')[:7]
+    def sections():
+        return [{
+            'part_number': part_number,
+            'part_name': quiz.part_names.get(str(part_number), f"Part {part_number}"),
+            'solutions': solution_rows(questions),
+            'total': len(questions),
+        } for part_number, questions in question_set.parts]
 
-    return render(request, 'quiz/super_quiz_solutions.html', {
-        'quiz': quiz,
-        'sections': sections,
-        'recommended_books': recommended_books
-    })
+    return render(request, 'quiz/super_quiz_solutions.html', solutions_context('super', quiz, sections=sections))
 
 class HttpResponseTooManyRequests(HttpResponse):
     status_code = 429
@@ -350,7 +296,7 @@ def conditional_login_required(view_func):
 
     @wraps(view_func)
     def _wrapped_view(request, quiz_id, *args, **kwargs):
-        quiz = get_object_or_404(Quiz, quiz_id=quiz_id)
+        quiz, _ = load_quiz(request, 'quiz', quiz_id)
         if quiz.requires_signup and not request.user.is_authenticated:
             messages.info(request, 'Please sign in to take this quiz.')
             return redirect('account_login')
@@ -365,41 +311,31 @@ def like_blog_post(request, post_id):
     if getattr(request, 'limited', False):
         return HttpResponseTooManyRequests("Too many requests. Please slow down.")
 
-    blog_post = get_object_or_404(BlogPost, post_id=post_id)
-    user = request.user
+    get_object_or_404(BlogPost.objects.only('post_id'), post_id=post_id)
+    Like = BlogPost.likes.through
+    like = {'blogpost_id': post_id, 'user_id': request.user.pk}
 
-    # Toggle like
-    if user in blog_post.likes.all():
-        blog_post.likes.remove(user)
-        liked = False
-    else:
-        blog_post.likes.add(user)
-        liked = True
+    # Toggle like: the delete doubles as the existence check
+    with transaction.atomic():
+        if Like.objects.filter(**like).delete()[0]:
+            liked, delta = False, -1
+        else:
+            try:
+                with transaction.atomic():
+                    Like.objects.create(**like)
+                liked, delta = True, 1
+            except IntegrityError:
+                # A concurrent request already added this like
+                liked, delta = True, 0
+        if delta:
+            BlogPost.objects.filter(post_id=post_id).update(likes_count=F('likes_count') + delta)
 
     return JsonResponse({
         'status': 'success',
         'liked': liked,
-        'like_count': blog_post.like_count(),
+        'like_count': BlogPost.objects.values_list('likes_count', flat=True).get(post_id=post_id),
     })
 
-def Send_report_telegram(user_message):
-    import requests
-    BOT_TOKEN = ''
-    CHAT_ID = ''
-
-    MESSAGE = str(user_message)
-
-    url = f'https://api.telegram.org/bot{BOT_TOKEN}/sendMessage'
-    payload = {
-        'chat_id': CHAT_ID,
-        'text': MESSAGE
-    }
-    response = requests.post(url, data=payload)
-    if response.status_code == 200:
-        print('Message sent successfully!')
-    else:
-        print(f'Failed to send message: {response.text}')
-
 @login_required
 @require_http_methods(["POST"])
 @ratelimit(key='ip', rate='30/d', block=True)
@@ -420,29 +356,41 @@ Question Index: {question_index}
 Issue: {issue_text}
 User:{user}
 """
-    Send_report_telegram(message)
+    # Delivered to Telegram by the background worker in quiz/notifications.py
+    enqueue(message)
     return JsonResponse({'status': 'success', 'message': 'Issue sent successfully.'})
 
 
 
+@replica_reads
 def blog_list(request):
     """Display a list of blog posts."""
-    page = request.GET.get('page', 1)
-    posts = BlogPost.objects.all()
-    paginator = Paginator(posts, 5)
-    page_obj = paginator.get_page(page)
-
-    return render(request, 'quiz/blog_list.html', {
+    # List cards only show the stored excerpt, never the full content
+    posts = BlogPost.objects.only('post_id', 'title', 'excerpt', 'likes_count')
+    page_obj = keyset_paginate(
+        posts, ('-post_id',), request.GET.get('cursor'), 5,
+        total=approximate_count(BlogPost),
+    )
+    context = {
         'page_obj': page_obj,
-    })
+        'next_url': next_page_url(request, page_obj),
+    }
+    if request.htmx:
+        return render(request, 'quiz/partials/blog_cards.html', context)
+    return render(request, 'quiz/blog_list.html', context)
 
+@replica_reads
 def blog_detail(request, post_id):
     """Display a single blog post."""
-    post = get_object_or_404(BlogPost, post_id=post_id)
-    recommended_books = RecommendedBook.objects.order_by('?')[:3]
+    post = ensure_rendered(get_object_or_404(BlogPost, post_id=post_id))
+    recommended_books = recommend_books(3)
+    has_liked = request.user.is_authenticated and BlogPost.likes.through.objects.filter(
+        blogpost_id=post_id, user_id=request.user.pk,
+    ).exists()
 
     return render(request, 'quiz/blog_detail.html', {
         'post': post,
+        'has_liked': has_liked,
         'recommended_books': recommended_books
     })
 
@@ -471,91 +419,35 @@ def accept_terms(request):
 
 
 # quiz/views.py
+@replica_reads
 def home(request):
-    # quizzes = Quiz.objects.order_by('-quiz_id')[:6]
-    # advance_quizzes = AdvanceQuiz.objects.order_by('-quiz_id')[:3]
-    # super_quizzes = SuperQuiz.objects.order_by('-quiz_id')[:3]
-    # blog_posts = BlogPost.objects.order_by('-post_id')[:3]
-
-    quizzes = Quiz.objects.order_by('?')[:6]
-    advance_quizzes = AdvanceQuiz.objects.order_by('?')[:6]
-    super_quizzes = SuperQuiz.objects.order_by('?')[:3]
-    blog_posts = BlogPost.objects.order_by('?')[:3]
-
-    if request.user.is_authenticated:
-        quizzes = quizzes.annotate(
-            has_attempted=Exists(
-                QuizAttempt.objects.filter(
-                    user=request.user,
-                    quiz_id=OuterRef('quiz_id')
-                )
-            )
-        )
-        advance_quizzes = advance_quizzes.annotate(
-            has_attempted=Exists(
-                AdvanceQuizAttempt.objects.filter(
-                    user=request.user,
-                    quiz_id=OuterRef('quiz_id')
-                )
-            )
-        )
-        super_quizzes = super_quizzes.annotate(
-            has_attempted=Exists(
-                SuperQuizAttempt.objects.filter(
-                    user=request.user,
-                    quiz_id=OuterRef('quiz_id')
-                )
-            )
-        )
-        blog_posts = blog_posts.annotate(
-            has_liked=Exists(
-                BlogPost.likes.through.objects.filter(
-                    user=request.user,
-                    blogpost_id=OuterRef('post_id')
-                )
-            )
-        )
-    else:
-        quizzes = quizzes.annotate(has_attempted=Value(False, output_field=BooleanField()))
-        advance_quizzes = advance_quizzes.annotate(has_attempted=Value(False, output_field=BooleanField()))
-        super_quizzes = super_quizzes.annotate(has_attempted=Value(False, output_field=BooleanField()))
-        blog_posts = blog_posts.annotate(has_liked=Value(False, output_field=BooleanField()))
-
-    return render(request, 'quiz/home.html', {
-        'quizzes': quizzes,
-        'advance_quizzes': advance_quizzes,
-        'super_quizzes': super_quizzes,
-        'blog_posts': blog_posts,
-    })
+    # Sections are sampled from cached, periodically reshuffled ID pools
+    # (see quiz.home_feed) instead of ORDER BY RANDOM() on every hit.
+    return render(request, 'quiz/home.html', build_home_feed(request.user))
 
+@replica_reads
+@condition(etag_func=solutions_etag('quiz'))
+@cache_control(private=True, no_cache=True)
 def quiz_solutions(request, quiz_id):
     """Display all questions with correct answers and explanations for a quiz."""
-    quiz = get_object_or_404(Quiz, quiz_id=quiz_id)
-    question_set = get_object_or_404(QuestionSet, quiz_id=quiz_id)
-    questions = question_set.questions
-
-    # Prepare data for the template
-    solutions = []
-    for i, q in enumerate(questions):
-        solutions.append({
-            'question': q['question'],
-            'options': q['options'],
-            'correct_answer': q['answer'],
-            'explanation': q.get('explanation', ''),
-        })
-
-    recommended_books = RecommendedBook.objects.order_by('?')[:7]
+    quiz, question_set = load_quiz(request, 'quiz', quiz_id)
+    context = solutions_context('quiz', quiz, solutions=lambda: solution_rows(
+        question_set.questions, question_stats('quiz', quiz.quiz_id),
+    ))
+    context['total'] = question_set.total_questions
+    return render(request, 'quiz/solutions.html', context)
 
-    context = {
-        'quiz': quiz,
-        'solutions': solutions,
-        'total': len(questions),
-        'recommended_books': recommended_books
-    }
 
-    return render(request, 'quiz/solutions.html', context)
+@replica_reads
+@cache_control(public=True, max_age=300)
+def recommended_books_fragment(request):
+    """Book recommendations loaded into otherwise cacheable pages."""
+    return render(request, 'quiz/partials/recommended_books.html', {
+        'recommended_books': recommend_books(7),
+    })
 
 
+@replica_reads
 @ratelimit(key='ip', rate='30/m', block=True)
 def search_quizzes(request):
     if getattr(request, 'limited', False):
@@ -566,166 +458,50 @@ def search_quizzes(request):
     page = request.GET.get('page', 1)
     quiz_type = request.GET.get('quiz_type', '')
 
-    if quiz_type == 'super':
-        quizzes = SuperQuiz.objects.all()
-        if query:
-            quizzes = quizzes.filter(
-                Q(quiz_name__icontains=query) |
-                Q(exam_tags__icontains=query)
-            )
-        if tag:
-            quizzes = quizzes.filter(exam_tags__contains=[tag.strip()])
-        if request.user.is_authenticated:
-            quizzes = quizzes.annotate(
-                has_attempted=Exists(
-                    SuperQuizAttempt.objects.filter(
-                        user=request.user,
-                        quiz_id=OuterRef('quiz_id')
-                    )
-                )
-            )
-        else:
-            # quizzes = quizzes.annotate(has_attempted=Value(False, output_field=BooleanField()))
-            pass
-
-    elif quiz_type == 'advance':
-        quizzes = AdvanceQuiz.objects.all()
-        if query:
-            quizzes = quizzes.filter(
-                Q(quiz_name__icontains=query) |
-                Q(exam_tags__icontains=query)
-            )
-        if tag:
-            quizzes = quizzes.filter(exam_tags__contains=[tag.strip()])
-        if request.user.is_authenticated:
-            quizzes = quizzes.annotate(
-                has_attempted=Exists(
-                    AdvanceQuizAttempt.objects.filter(
-                        user=request.user,
-                        quiz_id=OuterRef('quiz_id')
-                    )
-                )
-            )
-        else:
-            # quizzes = quizzes.annotate(has_attempted=Value(False, output_field=BooleanField()))
-            pass
-
-    else:
-        quizzes = Quiz.objects.all()
-
-        if query:
-            quizzes = quizzes.filter(
-                Q(quiz_name__icontains=query) |
-                Q(exam_tags__icontains=query)
-            )
-
-        if tag:
-            quizzes = quizzes.filter(exam_tags__contains=[tag.strip()])
-
-        # Annotate quizzes with whether the user has attempted them
-        if request.user.is_authenticated:
-            quizzes = quizzes.annotate(
-                has_attempted=Exists(
-                    QuizAttempt.objects.filter(
-                        user=request.user,
-                        quiz_id=OuterRef('quiz_id')
-                    )
-                )
-            )
-        else:
-            pass
-
-    quizzes = quizzes.order_by('-quiz_id')
-    paginator = Paginator(quizzes, 15)
-    page_obj = paginator.get_page(page)
-
-    if quiz_type == 'super':
-        tags = get_all_tags(SuperQuiz)
-    elif quiz_type == 'advance':
-        tags = get_all_tags(AdvanceQuiz)
+    next_url = None
+    if query:
+        # Ranked results have no stable key to seek on, so they keep numbered pages
+        page_obj = get_quiz_page(quiz_type, query, tag, page, request.user)
     else:
-        tags = get_all_tags(Quiz)
+        page_obj = get_quiz_keyset_page(quiz_type, tag, request.GET.get('cursor'), request.user)
+        next_url = next_page_url(request, page_obj)
+        if request.htmx:
+            return render(request, 'quiz/partials/search_cards.html', {
+                'quiz_type': quiz_type,
+                'page_obj': page_obj,
+                'next_url': next_url,
+            })
+    tag_facets = get_tag_facets(quiz_type)
 
     return render(request, 'quiz/search.html', {
         'quiz_type': quiz_type,
         'page_obj': page_obj,
+        'next_url': next_url,
         'query': query,
         'tag': tag,
-        'tags': tags,
+        'tags': [t for t, _ in tag_facets],
+        'tag_facets': tag_facets,
     })
 
 # quiz/views.py
 
+@replica_reads
 def quiz_list_partial(request):
     query = request.GET.get('q', '')
     tag = request.GET.get('tag', '')
     page = request.GET.get('page', 1)
     quiz_type = request.GET.get('quiz_type', '')  # Add quiz_type parameter
 
-    if quiz_type == 'super':
-        quizzes = SuperQuiz.objects.all()
-        template_name = 'quiz/partials/quiz_cards.html'  # Reuse or create specific template if needed
-        if query:
-            quizzes = quizzes.filter(
-                Q(quiz_name__icontains=query) |
-                Q(exam_tags__icontains=query)
-            )
-        if tag:
-            quizzes = quizzes.filter(exam_tags__contains=[tag.strip()])
-        if request.user.is_authenticated:
-            quizzes = quizzes.annotate(
-                has_attempted=Exists(
-                    SuperQuizAttempt.objects.filter(
-                        user=request.user,
-                        quiz_id=OuterRef('quiz_id')
-                    )
-                )
-            )
-    elif quiz_type == 'advance':
-        quizzes = AdvanceQuiz.objects.all()
-        template_name = 'quiz/partials/quiz_cards.html'  # Reuse or create specific template if needed
-        if query:
-            quizzes = quizzes.filter(
-                Q(quiz_name__icontains=query) |
-                Q(exam_tags__icontains=query)
-            )
-        if tag:
-            quizzes = quizzes.filter(exam_tags__contains=[tag.strip()])
-        if request.user.is_authenticated:
-            quizzes = quizzes.annotate(
-                has_attempted=Exists(
-                    AdvanceQuizAttempt.objects.filter(
-                        user=request.user,
-                        quiz_id=OuterRef('quiz_id')
-                    )
-                )
-            )
+    next_url = None
+    if query:
+        page_obj = get_quiz_page(quiz_type, query, tag, page, request.user)
     else:
-        quizzes = Quiz.objects.all()
-        template_name = 'quiz/partials/quiz_cards.html'
-        if query:
-            quizzes = quizzes.filter(
-                Q(quiz_name__icontains=query) |
-                Q(exam_tags__icontains=query)
-            )
-        if tag:
-            quizzes = quizzes.filter(exam_tags__contains=[tag.strip()])
-        if request.user.is_authenticated:
-            quizzes = quizzes.annotate(
-                has_attempted=Exists(
-                    QuizAttempt.objects.filter(
-                        user=request.user,
-                        quiz_id=OuterRef('quiz_id')
-                    )
-                )
-            )
-
-    quizzes = quizzes.order_by('-quiz_id')
-    paginator = Paginator(quizzes, 15)
-    page_obj = paginator.get_page(page)
+        page_obj = get_quiz_keyset_page(quiz_type, tag, request.GET.get('cursor'), request.user)
+        next_url = next_page_url(request, page_obj)
 
-    return render(request, template_name, {
+    return render(request, 'quiz/partials/quiz_cards.html', {
         'page_obj': page_obj,
+        'next_url': next_url,
         'query': query,
         'tag': tag,
         'quiz_type': quiz_type,  # Pass quiz_type to template
@@ -735,16 +511,17 @@ def get_all_tags(quiz_model=None):
     """Extract unique tags from quizzes, optionally filtered by quiz model"""
     if quiz_model is None:
         quiz_model = Quiz  # default to normal quiz
+    quiz_type = {SuperQuiz: 'super', AdvanceQuiz: 'advance'}.get(quiz_model, 'quiz')
+    return [t for t, _ in tag_index.tag_facets(quiz_type)]
 
-    all_tags = quiz_model.objects.values_list('exam_tags', flat=True)
-    tag_set = set()
-    for taglist in all_tags:
-        if taglist:
-            tag_set.update(taglist)
-    return sorted(tag_set)
 
+def get_tag_facets(quiz_type):
+    """(tag, count) pairs for the search page, served from the tag index"""
+    return tag_index.tag_facets(quiz_type if quiz_type in ('super', 'advance') else 'quiz')
 
 
+
+@replica_reads
 def quiz_detail(request, quiz_id):
     """Quiz detail page with start quiz functionality"""
     quiz = get_object_or_404(Quiz, quiz_id=quiz_id)
@@ -755,10 +532,8 @@ def quiz_detail(request, quiz_id):
         return redirect('account_login')
 
     if request.method == 'POST' or request.htmx:
-        # Initialize session for quiz answers
-        user_id = request.user.id if request.user.is_authenticated else 'anonymous'
-        session_key = f'{quiz_id}_answers_{user_id}'
-        request.session[session_key] = {}
+        # Start with an empty answer draft
+        get_drafts(request).start('quiz', quiz_id)
         if request.htmx:
             return HttpResponseClientRedirect(
                 reverse('question', kwargs={'quiz_id': quiz_id, 'question_index': 0})
@@ -771,9 +546,7 @@ def quiz_detail(request, quiz_id):
 @conditional_login_required
 def start_quiz(request, quiz_id):
     """Start a quiz by redirecting to first question"""
-    user_id = request.user.id if request.user.is_authenticated else 'anonymous'
-    session_key = f'{quiz_id}_answers_{user_id}'
-    request.session[session_key] = {}
+    get_drafts(request).start('quiz', quiz_id)
     messages.success(request, f'Quiz started! Good luck!')
     return redirect('question', quiz_id=quiz_id, question_index=0)
 
@@ -787,56 +560,35 @@ def quiz_result(request, quiz_id):
     if getattr(request, 'limited', False):
         return HttpResponseTooManyRequests("Too many requests. Please slow down.")
 
-    question_set = get_object_or_404(QuestionSet, quiz_id=quiz_id)
-    questions = question_set.questions
-    user_id = request.user.id if request.user.is_authenticated else 'anonymous'
-    session_key = f'{quiz_id}_answers_{user_id}'
-    answers = request.session.get(session_key, {})
+    quiz, question_set = load_quiz(request, 'quiz', quiz_id)
+    answers = get_drafts(request).get('quiz', quiz_id)
 
     if not answers:
         messages.error(request, 'No quiz answers found. Please start the quiz again.')
         return redirect('start_quiz', quiz_id=quiz_id)
 
-    score = 0
-    results = []
-    for i, q in enumerate(questions):
-        correct = q['answer']
-        user_ans = answers.get(str(i), '')
-        is_correct = user_ans == correct
-        if is_correct:
-            score += 1
-        results.append({
-            'question': q['question'],
-            'options': q['options'],
-            'your_answer': user_ans,
-            'correct_answer': correct,
-            'is_correct': is_correct,
-            'explanation': q.get('explanation', '')
-        })
-
-    percentage = (score / len(questions)) * 100 if questions else 0
+    scorecard = score_submission(question_set, answers)
+    score = scorecard.score
+    percentage = scorecard.percentage
 
     if request.user.is_authenticated:
-        UserProfile.objects.get_or_create(user=request.user)
-        QuizAttempt.objects.create(
-            user=request.user,
-            quiz=get_object_or_404(Quiz, quiz_id=quiz_id),
+        attempt_recorder.record(
+            'quiz', request.user, quiz.quiz_id,
             score=score,
-            total_questions=len(questions),
+            total_questions=scorecard.total,
             percentage=percentage,
-            answers=answers
+            answers=answers,
+            total_score=10,
         )
 
-    if session_key in request.session:
-        del request.session[session_key]
-        request.session.modified = True
+    get_drafts(request).clear('quiz', quiz_id)
 
     context = {
-        'quiz': get_object_or_404(Quiz, quiz_id=quiz_id),
+        'quiz': quiz,
         'score': score,
-        'total': len(questions),
+        'total': scorecard.total,
         'percentage': round(percentage, 1),
-        'results': results,
+        'results': scorecard.results,
         'user': request.user,
     }
 
@@ -849,45 +601,106 @@ def user_profile(request):
     user = request.user
     UserProfile.objects.get_or_create(user=user)
 
-    # Fetch attempts for all quiz types
-    quiz_attempts = QuizAttempt.objects.filter(user=user).select_related('quiz').order_by('-attempt_date')
-    super_quiz_attempts = SuperQuizAttempt.objects.filter(user=user).select_related('quiz').order_by('-attempt_date')
-    advance_quiz_attempts = AdvanceQuizAttempt.objects.filter(user=user).select_related('quiz').order_by('-attempt_date')
-
-    # Paginate each queryset
+    # Each tab pages through its attempts newest first with its own cursor
+    # (``all_cursor``, ``quiz_cursor``, ...). Only the tab being shown is
+    # queried; the others load their first page over HTMX when opened.
     quizzes_per_page = 9
-    quiz_paginator = Paginator(quiz_attempts, quizzes_per_page)
-    super_quiz_paginator = Paginator(super_quiz_attempts, quizzes_per_page)
-    advance_quiz_paginator = Paginator(advance_quiz_attempts, quizzes_per_page)
-
-    # Get page numbers from request
-    quiz_page = request.GET.get('quiz_page', 1)
-    super_quiz_page = request.GET.get('super_quiz_page', 1)
-    advance_quiz_page = request.GET.get('advance_quiz_page', 1)
-
-    # Get paginated objects
-    quiz_page_obj = quiz_paginator.get_page(quiz_page)
-    super_quiz_page_obj = super_quiz_paginator.get_page(super_quiz_page)
-    advance_quiz_page_obj = advance_quiz_paginator.get_page(advance_quiz_page)
+    tabs = {
+        'all': ('All', tuple(TIMELINE_KINDS), 'No attempts yet.'),
+        'quiz': ('Quizzes', ('quiz',), 'No quiz attempts yet.'),
+        'advance_quiz': ('Sectional Tests', ('advance',), 'No advance quiz attempts yet.'),
+        'super_quiz': ('Mock Tests', ('super',), 'No super quiz attempts yet.'),
+    }
+    active_tab = request.GET.get('tab')
+    if active_tab not in tabs:
+        active_tab = 'all'
+
+    _, kinds, empty_message = tabs[active_tab]
+    param = f'{active_tab}_cursor'
+    page_obj = timeline_page(user, kinds, request.GET.get(param), quizzes_per_page)
+    cards = {
+        'page_obj': page_obj,
+        'next_url': next_page_url(request, page_obj, param, tab=active_tab),
+        'show_kind': len(kinds) > 1,
+        'empty_message': empty_message,
+    }
+    if request.htmx and request.GET.get('tab') == active_tab:
+        return render(request, 'quiz/partials/attempt_cards.html', cards)
 
     context = {
-        'quiz_page_obj': quiz_page_obj,
-        'super_quiz_page_obj': super_quiz_page_obj,
-        'advance_quiz_page_obj': advance_quiz_page_obj,
-        'edit_mode': request.GET.get('edit') == 'true' or request.method == 'POST',
+        'tabs': [{
+            'key': tab,
+            'label': label,
+            'active': tab == active_tab,
+            'url': f"{reverse('user_profile')}?tab={tab}",
+        } for tab, (label, _, _) in tabs.items()],
+        'cards': cards,
     }
+    for tab, kind in (('quiz', 'quiz'), ('advance_quiz', 'advance'), ('super_quiz', 'super')):
+        context[f'{tab}_total'] = attempt_count(kind, user)
+
+    context['tag_summary'] = tag_summary(user)
+    context['edit_mode'] = request.GET.get('edit') == 'true' or request.method == 'POST'
     return render(request, 'quiz/profile.html', context)
 
+@replica_reads
 @conditional_login_required
 def quiz_paginated(request, quiz_id):
-    quiz = get_object_or_404(Quiz, quiz_id=quiz_id)
-    question_set = get_object_or_404(QuestionSet, quiz_id=quiz_id)
+    quiz, question_set = load_quiz(request, 'quiz', quiz_id)
+    # Questions are fetched page by page from quiz_questions_json
     return render(request, 'quiz/quiz_paginated.html', {
         'quiz': quiz,
-        'questions': question_set.questions,
+        'total': question_set.total_questions,
+        'page_size': QUESTION_PAGE_SIZE,
+        'draft_answers': get_drafts(request).get('quiz', quiz_id),
     })
 
 
+def _questions_etag(request, quiz_id, quiz_type):
+    """The question set's content digest; a missing quiz 404s here, before any 304."""
+    quiz, question_set = load_quiz(request, quiz_type, quiz_id)
+    if quiz.requires_signup and not request.user.is_authenticated:
+        # No ETag, so the view runs and refuses the request
+        return None
+    return f'{quiz_type}-{quiz_id}-{question_set.digest[:16]}'
+
+
+@replica_reads
+@condition(etag_func=_questions_etag)
+def quiz_questions_json(request, quiz_id, quiz_type):
+    """Questions of a quiz without answers, a page (or super quiz section) at a time."""
+    quiz, question_set = load_quiz(request, quiz_type, quiz_id)
+    if quiz.requires_signup and not request.user.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Please sign in to take this quiz.'}, status=403)
+
+    if quiz_type == 'super':
+        payload = question_section(question_set, request.GET.get('part'))
+    else:
+        payload = question_page(question_set, request.GET.get('page', 0))
+    response = JsonResponse(payload)
+    # Question text only changes with the set's digest, which is in the ETag
+    patch_cache_control(response, max_age=300, **{'private' if quiz.requires_signup else 'public': True})
+    return response
+
+
+@require_http_methods(["POST"])
+@ratelimit(key='ip', rate='120/m', block=True)
+def save_answer_draft(request, quiz_id, quiz_type):
+    """Autosave the answers of a quiz in progress to the answer-draft store."""
+    if getattr(request, 'limited', False):
+        return HttpResponseTooManyRequests("Too many requests. Please slow down.")
+
+    quiz, _ = load_quiz(request, quiz_type, quiz_id)
+    if quiz.requires_signup and not request.user.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Please sign in to take this quiz.'}, status=403)
+
+    try:
+        get_drafts(request).save(quiz_type, quiz_id, json.loads(request.POST.get('answers', '{}')))
+    except ValueError:
+        # Malformed JSON, or a draft over ANSWER_DRAFT_MAX_BYTES
+        return JsonResponse({'status': 'error', 'message': 'Invalid answers.'}, status=400)
+    return JsonResponse({'status': 'success'})
+
 @conditional_login_required
 @require_http_methods(["POST"])
 @ratelimit(key='ip', rate='30/m', block=True)
@@ -895,9 +708,7 @@ def quiz_submit_paginated(request, quiz_id):
     if getattr(request, 'limited', False):
         return HttpResponseTooManyRequests("Too many requests. Please slow down.")
 
-    quiz = get_object_or_404(Quiz, quiz_id=quiz_id)
-    question_set = get_object_or_404(QuestionSet, quiz_id=quiz_id)
-    questions = question_set.questions
+    quiz, question_set = load_quiz(request, 'quiz', quiz_id)
 
     try:
         answers = json.loads(request.POST.get('answers', '{}'))
@@ -906,49 +717,42 @@ def quiz_submit_paginated(request, quiz_id):
         messages.error(request, "Invalid answers submitted.")
         return redirect('quiz_paginated', quiz_id=quiz_id)
 
-    score = 0
-    results = []
-
-    for i, q in enumerate(questions):
-        user_ans = answers.get(str(i), '')
-        correct = q['answer']
-        is_correct = user_ans == correct
-        if is_correct:
-            score += 1
-        results.append({
-            'question': q['question'],
-            'options': q['options'],
-            'your_answer': user_ans,
-            'correct_answer': correct,
-            'is_correct': is_correct,
-            'explanation': q.get('explanation', '')
-        })
-
-    percentage = (score / len(questions)) * 100 if questions else 0
+    scorecard = score_submission(question_set, answers)
+    score = scorecard.score
+    percentage = scorecard.percentage
 
+    # Ranked before recording, so the histogram does not hold this attempt yet
+    result_standing = standing('quiz', quiz.quiz_id, score, request.user)
     if request.user.is_authenticated:
-        UserProfile.objects.get_or_create(user=request.user)
-        QuizAttempt.objects.update_or_create(
-            user=request.user,
-            quiz=quiz,
-            defaults={
-                'score': score,
-                'total_questions': len(questions),
-                'percentage': percentage,
-                'answers': answers,
-                'attempt_date': timezone.now(),
-                'total_score': 10
-            }
+        attempt_recorder.record(
+            'quiz', request.user, quiz.quiz_id,
+            score=score,
+            total_questions=scorecard.total,
+            percentage=percentage,
+            answers=answers,
+            total_score=10,
         )
 
-    recommended_books = RecommendedBook.objects.order_by('?')[:7]
+    get_drafts(request).clear('quiz', quiz_id)
+
+    recommended_books = recommend_books(7)
 
     return render(request, 'quiz/result.html', {
         'quiz': quiz,
         'score': score,
-        'total': len(questions),
+        'total': scorecard.total,
         'percentage': round(percentage, 1),
-        'results': results,
+        'results': scorecard.results,
         'time_taken': time_taken,  # Pass time_taken to template
+        'standing': result_standing,
         'recommended_books': recommended_books
     })
+
+
+@user_passes_test(lambda u: u.is_staff)
+def cache_stats(request):
+    """Per-worker cache counters, used to size caches against VM memory."""
+    return JsonResponse({
+        'question_sets': question_cache.stats(),
+        'recommended_books': book_sampler.stats(),
+    })